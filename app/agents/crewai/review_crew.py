@@ -1,6 +1,24 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.core.fallback_codes import FallbackCode
+from app.core.metrics import REVIEW_PENDING, REVIEW_SKIPPED
+from app.core.tracing import span, submit_with_context
+
+
+logger = logging.getLogger(__name__)
+
+_REVIEW_EXECUTOR_LOCK = threading.Lock()
+_REVIEW_EXECUTOR: ThreadPoolExecutor | None = None
+_PENDING_LOCK = threading.Lock()
+_PENDING_REVIEWS = 0
+# Agents keep executor state while running, so each worker thread reuses its own instance.
+_REVIEWER_LOCAL = threading.local()
 
 
 def _heuristic_review(answer: str, sources: list[dict], intent: str) -> dict[str, Any]:
@@ -15,45 +33,48 @@ def _heuristic_review(answer: str, sources: list[dict], intent: str) -> dict[str
     return {"approved": not needs_fix, "reason": reason}
 
 
-def review_response(
+def _get_reviewer_agent():
+    reviewer = getattr(_REVIEWER_LOCAL, "agent", None)
+    if reviewer is None:
+        from crewai import Agent
+
+        reviewer = Agent(
+            role="CS Quality Supervisor",
+            goal="정책 위반/근거 부족 답변을 사전에 차단한다.",
+            backstory="이커머스 고객 상담 품질 검수 에이전트",
+            verbose=False,
+            allow_delegation=False,
+        )
+        _REVIEWER_LOCAL.agent = reviewer
+    return reviewer
+
+
+def _crew_review(
+    settings: Settings,
     *,
     question: str,
     answer: str,
     intent: str,
     sources: list[dict],
 ) -> dict[str, Any]:
-    """
-    CrewAI 검수 워커 진입점.
-    CrewAI가 설치/설정되지 않아도 서비스가 중단되지 않도록 휴리스틱 검수로 폴백한다.
-    """
-    settings = get_settings()
-    if not settings.crewai_review_enabled:
-        return _heuristic_review(answer, sources, intent)
-
     try:
-        from crewai import Agent, Crew, Process, Task
+        from crewai import Crew, Process, Task
     except Exception:
         return _heuristic_review(answer, sources, intent)
 
     if not settings.openai_api_key:
         return _heuristic_review(answer, sources, intent)
 
-    reviewer = Agent(
-        role="CS Quality Supervisor",
-        goal="정책 위반/근거 부족 답변을 사전에 차단한다.",
-        backstory="이커머스 고객 상담 품질 검수 에이전트",
-        verbose=False,
-        allow_delegation=False,
-    )
-    task = Task(
-        description=(
-            "아래 응답을 검수하고 APPROVED=YES/NO와 REASON을 반환해라.\n"
-            f"QUESTION: {question}\nINTENT: {intent}\nANSWER: {answer}\nSOURCES: {sources}"
-        ),
-        expected_output="APPROVED=YES|NO;REASON=<short>",
-        agent=reviewer,
-    )
     try:
+        reviewer = _get_reviewer_agent()
+        task = Task(
+            description=(
+                "아래 응답을 검수하고 APPROVED=YES/NO와 REASON을 반환해라.\n"
+                f"QUESTION: {question}\nINTENT: {intent}\nANSWER: {answer}\nSOURCES: {sources}"
+            ),
+            expected_output="APPROVED=YES|NO;REASON=<short>",
+            agent=reviewer,
+        )
         crew = Crew(agents=[reviewer], tasks=[task], process=Process.sequential, verbose=False)
         result = str(crew.kickoff())
         result_upper = result.upper()
@@ -62,3 +83,185 @@ def review_response(
         return {"approved": approved, "reason": reason}
     except Exception:
         return _heuristic_review(answer, sources, intent)
+
+
+def review_response(
+    *,
+    question: str,
+    answer: str,
+    intent: str,
+    sources: list[dict],
+) -> dict[str, Any]:
+    """
+    CrewAI 검수 워커 진입점.
+    CrewAI가 설치/설정되지 않아도 서비스가 중단되지 않도록 휴리스틱 검수로 폴백한다.
+    """
+    settings = get_settings()
+    if not settings.crewai_review_enabled:
+        return _heuristic_review(answer, sources, intent)
+    return _crew_review(settings, question=question, answer=answer, intent=intent, sources=sources)
+
+
+def should_sample_review(settings: Settings, *, intent: str, confidence: float) -> bool:
+    """sampled 모드: 정책 저신뢰 답변은 항상, 나머지는 표본 비율만큼 동기 검수한다."""
+    if intent == "policy" and confidence < settings.crewai_review_low_confidence_threshold:
+        return True
+    return random.random() < settings.crewai_review_sample_rate
+
+
+def _review_executor(settings: Settings) -> ThreadPoolExecutor:
+    global _REVIEW_EXECUTOR
+    with _REVIEW_EXECUTOR_LOCK:
+        if _REVIEW_EXECUTOR is None:
+            _REVIEW_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, settings.crewai_review_workers),
+                thread_name_prefix="crewai-review",
+            )
+        return _REVIEW_EXECUTOR
+
+
+def pending_reviews() -> int:
+    """async 검수 중 큐에 있거나 실행 중인 건수."""
+    with _PENDING_LOCK:
+        return _PENDING_REVIEWS
+
+
+def _reserve_pending(limit: int) -> bool:
+    global _PENDING_REVIEWS
+    with _PENDING_LOCK:
+        if _PENDING_REVIEWS >= limit:
+            return False
+        _PENDING_REVIEWS += 1
+        REVIEW_PENDING.set(_PENDING_REVIEWS)
+        return True
+
+
+def _release_pending(_future: Future | None = None) -> None:
+    global _PENDING_REVIEWS
+    with _PENDING_LOCK:
+        _PENDING_REVIEWS = max(0, _PENDING_REVIEWS - 1)
+        REVIEW_PENDING.set(_PENDING_REVIEWS)
+
+
+def _run_background_review(
+    settings: Settings,
+    *,
+    tenant_id: str,
+    session_id: str,
+    question: str,
+    answer: str,
+    intent: str,
+    sources: list[dict],
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    with span("review.crewai", mode="async"):
+        review = _crew_review(settings, question=question, answer=answer, intent=intent, sources=sources)
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    approved = bool(review.get("approved", True))
+    if not approved:
+        logger.warning(
+            "review retracted delivered answer tenant=%s session=%s reason=%s",
+            tenant_id,
+            session_id,
+            review.get("reason", ""),
+        )
+    try:
+        from app.repositories.supabase_repo import get_supabase_repo
+
+        get_supabase_repo().log_tool_call(
+            tenant_id=tenant_id,
+            session_id=session_id,
+            tool="crewai_review",
+            status="approved" if approved else "retracted",
+            latency_ms=latency_ms,
+            detail={"mode": "async", "reason": review.get("reason", ""), "answer": answer},
+            why_fallback=None if approved else FallbackCode.REVIEW_REJECTED.value,
+        )
+    except Exception:
+        logger.exception("failed to log background review result")
+    return review
+
+
+def submit_background_review(
+    *,
+    tenant_id: str,
+    session_id: str,
+    question: str,
+    answer: str,
+    intent: str,
+    sources: list[dict],
+) -> Future | None:
+    """
+    async 모드: 응답은 즉시 반환하고, 검수 결과(반려 시 retracted)는 로그로 남긴다.
+    대기+실행 중인 검수가 crewai_review_max_pending에 도달하면 제출하지 않고 None을 반환한다.
+    """
+    settings = get_settings()
+    if not _reserve_pending(max(1, settings.crewai_review_max_pending)):
+        REVIEW_SKIPPED.inc()
+        logger.warning(
+            "review backlog full, skipping async review tenant=%s session=%s pending=%d",
+            tenant_id,
+            session_id,
+            pending_reviews(),
+        )
+        return None
+    try:
+        future = submit_with_context(
+            _review_executor(settings),
+            _run_background_review,
+            settings,
+            tenant_id=tenant_id,
+            session_id=session_id,
+            question=question,
+            answer=answer,
+            intent=intent,
+            sources=list(sources),
+        )
+    except Exception:
+        _release_pending()
+        raise
+    future.add_done_callback(_release_pending)
+    return future
+
+
+def review_for_mode(
+    *,
+    tenant_id: str,
+    session_id: str,
+    question: str,
+    answer: str,
+    intent: str,
+    sources: list[dict],
+    confidence: float,
+) -> dict[str, Any]:
+    """
+    crewai_review_mode에 따라 검수한다. 휴리스틱 검수는 모든 모드에서 동기로 수행하고,
+    CrewAI 검수는 inline(전체 동기), sampled(표본+정책 저신뢰 동기), async(백그라운드)로 나눈다.
+    반환값의 review_mode는 응답 반환 전에 어떤 검수를 거쳤는지 나타낸다.
+    """
+    settings = get_settings()
+    mode = settings.crewai_review_mode if settings.crewai_review_enabled else "inline"
+    if mode == "inline":
+        review = review_response(question=question, answer=answer, intent=intent, sources=sources)
+        return {**review, "review_mode": mode}
+
+    review = _heuristic_review(answer, sources, intent)
+    if not review["approved"]:
+        return {**review, "review_mode": "heuristic"}
+
+    if mode == "sampled":
+        if should_sample_review(settings, intent=intent, confidence=confidence):
+            with span("review.crewai", mode="sampled"):
+                review = _crew_review(settings, question=question, answer=answer, intent=intent, sources=sources)
+            return {**review, "review_mode": "sampled"}
+        return {**review, "review_mode": "skipped"}
+
+    future = submit_background_review(
+        tenant_id=tenant_id,
+        session_id=session_id,
+        question=question,
+        answer=answer,
+        intent=intent,
+        sources=sources,
+    )
+    return {**review, "review_mode": "async" if future is not None else "async_skipped"}
@@ -1,16 +1,40 @@
+import copy
+import logging
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from functools import lru_cache
-from typing import Literal, TypedDict
+from typing import Any, Literal, TypedDict
 
-from app.agents.crewai.review_crew import review_response
-from app.core.config import get_settings
+from app.agents.crewai.review_crew import review_for_mode
+from app.core.config import Settings, get_settings
 from app.core.fallback_codes import FallbackCode
+from app.core.metrics import FALLBACKS, record_cache
+from app.core.tracing import submit_with_context, traced
 from app.integrations.shipping.client import ShippingAPIError, ShippingClient
-from app.rag.retriever import get_rag_service
-from app.services.classifier import get_intent_classifier
+from app.rag.answer_cache import lookup_precomputed_answer, normalize_question
+from app.rag.retriever import RetrievalPrefetch, get_rag_service
+from app.services.classifier import get_intent_classifier, looks_like_tracking
+from app.services.session_memory import (
+    RESOLVED_INTENTS,
+    SessionMemory,
+    contextualize_question,
+    is_follow_up,
+    load_session_memory,
+    save_session_turn,
+)
+from app.services.tenant_config import get_tenant_settings, scoped_settings, tenant_scope
+from app.services.usage import is_over_budget, usage_scope
+
 
+logger = logging.getLogger(__name__)
 
 IntentType = Literal["tracking", "policy", "fallback"]
+_PREFETCH_LOCK = threading.Lock()
+_PREFETCH_EXECUTOR: ThreadPoolExecutor | None = None
+# anyio's default threadpool size: the most chat graphs that can run at once without an admission cap.
+_DEFAULT_PREFETCH_WORKERS = 40
 
 
 class SupportGraphState(TypedDict, total=False):
@@ -28,6 +52,9 @@ class SupportGraphState(TypedDict, total=False):
     route: str
     tracking_status_raw: str | None
     tracking_progress: dict | None
+    answer_mode: str | None
+    retrieval_prefetch: Future | None
+    session_memory: SessionMemory | None
 
 
 def _append_trace(state: SupportGraphState, trace: dict) -> None:
@@ -36,6 +63,97 @@ def _append_trace(state: SupportGraphState, trace: dict) -> None:
     state["tool_trace"] = traces
 
 
+def _prefetch_executor(settings: Settings) -> ThreadPoolExecutor:
+    global _PREFETCH_EXECUTOR
+    with _PREFETCH_LOCK:
+        if _PREFETCH_EXECUTOR is None:
+            # One prefetch per in-flight chat, so a request never queues behind other requests' prefetches.
+            workers = settings.speculative_retrieval_workers or settings.admission_chat_max_inflight
+            _PREFETCH_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, workers or _DEFAULT_PREFETCH_WORKERS),
+                thread_name_prefix="rag-prefetch",
+            )
+        return _PREFETCH_EXECUTOR
+
+
+def _start_retrieval_prefetch(state: SupportGraphState, settings: Settings) -> None:
+    """Start retrieval for the raw message so the rag route pays max(classify, retrieve)."""
+    if not settings.speculative_retrieval_enabled:
+        return
+    question = state["user_message"]
+
+    def _run() -> RetrievalPrefetch:
+        return get_rag_service().prefetch(question)
+
+    state["retrieval_prefetch"] = submit_with_context(_prefetch_executor(settings), _run)
+
+
+def _log_discarded_prefetch(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    logger.info("discarded retrieval prefetch latency_ms=%d", future.result().latency_ms)
+
+
+def _discard_retrieval_prefetch(state: SupportGraphState) -> None:
+    future = state.get("retrieval_prefetch")
+    if future is None:
+        return
+    state["retrieval_prefetch"] = None
+    record_cache("retrieval_prefetch", False)
+    if future.cancel():
+        status, latency_ms = "cancelled", 0
+    elif future.done():
+        prefetched = None if future.exception() is not None else future.result()
+        status, latency_ms = "discarded", prefetched.latency_ms if prefetched else 0
+    else:
+        # Already running against the index; its cost is logged when it completes.
+        future.add_done_callback(_log_discarded_prefetch)
+        status, latency_ms = "discarded", 0
+    _append_trace(state, {"tool": "retrieval_prefetch", "status": status, "latency_ms": latency_ms})
+
+
+def _take_retrieval_prefetch(state: SupportGraphState, settings: Settings) -> RetrievalPrefetch | None:
+    """The prefetched candidates, or None to retrieve inline (prefetch still queued, too slow or failed)."""
+    future = state.get("retrieval_prefetch")
+    if future is None:
+        return None
+    state["retrieval_prefetch"] = None
+    if future.cancel():
+        # Never started: retrieving inline now is faster than waiting for a worker.
+        record_cache("retrieval_prefetch", False)
+        _append_trace(state, {"tool": "retrieval_prefetch", "status": "cancelled", "latency_ms": 0})
+        return None
+    started = time.perf_counter()
+    try:
+        prefetched = future.result(timeout=settings.speculative_retrieval_wait_seconds)
+    except FutureTimeoutError:
+        future.add_done_callback(_log_discarded_prefetch)
+        record_cache("retrieval_prefetch", False)
+        _append_trace(
+            state,
+            {
+                "tool": "retrieval_prefetch",
+                "status": "timeout",
+                "latency_ms": int((time.perf_counter() - started) * 1000),
+            },
+        )
+        return None
+    except Exception as exc:
+        logger.warning("retrieval prefetch failed; retrieving after classification: %s", exc)
+        _append_trace(
+            state,
+            {
+                "tool": "retrieval_prefetch",
+                "status": "error",
+                "latency_ms": int((time.perf_counter() - started) * 1000),
+            },
+        )
+        return None
+    _append_trace(state, {"tool": "retrieval_prefetch", "status": "ok", "latency_ms": prefetched.latency_ms})
+    record_cache("retrieval_prefetch", True)
+    return prefetched
+
+
 TRACKING_STAGE_LABELS = {
     1: "결제완료",
     2: "배송중",
@@ -92,18 +210,53 @@ def _is_unsupported_action_request(question: str) -> bool:
     return any(_normalize(keyword) in q for keyword in UNSUPPORTED_ACTION_KEYWORDS)
 
 
+def _apply_session_memory(state: SupportGraphState, settings: Settings) -> None:
+    """Resolve a low-confidence follow-up with the session's last intent and fill entities it omitted."""
+    memory = state.get("session_memory")
+    if memory is None or memory.last_intent not in RESOLVED_INTENTS:
+        return
+    carried = False
+    if state["confidence"] < settings.classification_confidence_threshold and is_follow_up(state["user_message"]):
+        state["intent"] = memory.last_intent
+        state["confidence"] = settings.classification_confidence_threshold
+        carried = True
+    if state["intent"] == "tracking":
+        entities = state.get("entities") or {}
+        for key in ("tracking_number", "courier_code"):
+            if not entities.get(key) and memory.last_entities.get(key):
+                entities[key] = memory.last_entities[key]
+                carried = True
+        state["entities"] = entities
+    if carried:
+        _append_trace(state, {"tool": "session_memory", "status": "carried_over", "latency_ms": 0})
+
+
+def _retrieval_question(state: SupportGraphState) -> str:
+    """The follow-up rewritten with the previous turn, but only when session memory carried its intent."""
+    carried = any(
+        item.get("tool") == "session_memory" and item.get("status") == "carried_over"
+        for item in state.get("tool_trace", [])
+    )
+    if not carried:
+        return state["user_message"]
+    return contextualize_question(state["user_message"], state.get("session_memory"))
+
+
 def classify_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
+    state["session_memory"] = load_session_memory(settings, state.get("tenant_id", ""), state.get("session_id", ""))
+    _start_retrieval_prefetch(state, settings)
     try:
         classifier = get_intent_classifier()
         result = classifier.classify(state["user_message"])
         state["intent"] = result.intent
         state["confidence"] = result.confidence
         state["entities"] = result.entities.model_dump()
+        _apply_session_memory(state, settings)
 
-        if result.confidence < settings.classification_confidence_threshold:
+        if state["confidence"] < settings.classification_confidence_threshold:
             state["route"] = "clarify"
-        elif result.intent == "tracking":
+        elif state["intent"] == "tracking":
             state["route"] = "tracking"
         else:
             state["route"] = "rag"
@@ -113,6 +266,8 @@ def classify_node(state: SupportGraphState) -> SupportGraphState:
         state["entities"] = {}
         state["route"] = "runtime_config"
         state["why_fallback"] = FallbackCode.RUNTIME_CONFIG_MISSING.value
+    if state["route"] != "rag":
+        _discard_retrieval_prefetch(state)
     return state
 
 
@@ -121,7 +276,7 @@ def route_node(state: SupportGraphState) -> str:
 
 
 def clarify_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
     state["needs_human"] = False
     state["sources"] = []
     state["why_fallback"] = FallbackCode.CLARIFY_LOW_CONFIDENCE.value
@@ -135,7 +290,7 @@ def clarify_node(state: SupportGraphState) -> SupportGraphState:
 
 
 def runtime_config_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
     state["needs_human"] = True
     state["sources"] = []
     state["tracking_progress"] = None
@@ -149,7 +304,7 @@ def runtime_config_node(state: SupportGraphState) -> SupportGraphState:
 
 
 def tracking_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
     entities = state.get("entities", {})
     tracking_number = (entities.get("tracking_number") or "").strip()
     courier_code = (entities.get("courier_code") or settings.default_courier_code).strip()
@@ -208,7 +363,7 @@ def tracking_node(state: SupportGraphState) -> SupportGraphState:
 
 
 def rag_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
     intent: IntentType = state.get("intent", "fallback")
     if intent == "fallback" and _is_unsupported_action_request(state["user_message"]):
         state["answer"] = (
@@ -219,15 +374,29 @@ def rag_node(state: SupportGraphState) -> SupportGraphState:
         state["sources"] = []
         state["needs_human"] = True
         state["why_fallback"] = FallbackCode.UNSUPPORTED_ACTION.value
+        _discard_retrieval_prefetch(state)
         return state
 
+    retrieval_question = _retrieval_question(state)
+    if retrieval_question != state["user_message"]:
+        # The prefetch searched the raw message, which lacks the topic the rewrite adds.
+        _discard_retrieval_prefetch(state)
     try:
+        prefetched = _take_retrieval_prefetch(state, settings)
         rag_service = get_rag_service()
         upgrade = bool(state.get("confidence", 0.0) < 0.85 and intent == "policy")
+        if upgrade and is_over_budget(settings, state.get("tenant_id", "")):
+            # Tenant spent its daily token budget: answer with the regular generation model.
+            upgrade = False
+            _append_trace(state, {"tool": "generation_upgrade", "status": "budget_downgraded", "latency_ms": 0})
+        answer_kwargs: dict[str, Any] = {"prefetched": prefetched} if prefetched is not None else {}
+        if retrieval_question != state["user_message"]:
+            answer_kwargs["retrieval_question"] = retrieval_question
         rag_answer = rag_service.answer(
             question=state["user_message"],
             intent=intent,
             upgrade_generation=upgrade,
+            **answer_kwargs,
         )
         state["answer"] = rag_answer.answer
         state["sources"] = [
@@ -239,6 +408,9 @@ def rag_node(state: SupportGraphState) -> SupportGraphState:
             for src in rag_answer.sources
         ]
         state["needs_human"] = rag_answer.needs_human
+        state["answer_mode"] = rag_answer.answer_mode
+        for trace in rag_answer.trace:
+            _append_trace(state, trace)
         if rag_answer.needs_human:
             if intent == "policy":
                 state["why_fallback"] = FallbackCode.POLICY_NO_SOURCE.value
@@ -259,14 +431,27 @@ def rag_node(state: SupportGraphState) -> SupportGraphState:
 
 
 def review_node(state: SupportGraphState) -> SupportGraphState:
-    review = review_response(
+    settings = scoped_settings(get_settings())
+    started = time.perf_counter()
+    review = review_for_mode(
+        tenant_id=state.get("tenant_id", ""),
+        session_id=state.get("session_id", ""),
         question=state["user_message"],
         answer=state["answer"],
         intent=state.get("intent", "fallback"),
         sources=state.get("sources", []),
+        confidence=state.get("confidence", 0.0),
     )
+    if settings.crewai_review_enabled:
+        _append_trace(
+            state,
+            {
+                "tool": "crewai_review",
+                "status": review["review_mode"],
+                "latency_ms": int((time.perf_counter() - started) * 1000),
+            },
+        )
     if not review.get("approved", True):
-        settings = get_settings()
         state["answer"] = (
             "확인 불가입니다. 현재 답변을 자동 검수 기준으로 확정할 수 없습니다. "
             "담당자가 확인 후 안내드리겠습니다. "
@@ -278,7 +463,7 @@ def review_node(state: SupportGraphState) -> SupportGraphState:
 
 
 def finalize_node(state: SupportGraphState) -> SupportGraphState:
-    settings = get_settings()
+    settings = scoped_settings(get_settings())
     answer = (state.get("answer") or "").strip()
     if answer and not answer.endswith(settings.default_answer_closing):
         answer = f"{answer} {settings.default_answer_closing}"
@@ -288,6 +473,8 @@ def finalize_node(state: SupportGraphState) -> SupportGraphState:
     state["needs_human"] = bool(state.get("needs_human", False))
     state["tracking_progress"] = state.get("tracking_progress")
     state["why_fallback"] = state.get("why_fallback")
+    state["answer_mode"] = state.get("answer_mode")
+    _discard_retrieval_prefetch(state)
     return state
 
 
@@ -295,13 +482,17 @@ def _build_graph():
     from langgraph.graph import END, StateGraph
 
     graph = StateGraph(SupportGraphState)
-    graph.add_node("classify", classify_node)
-    graph.add_node("clarify", clarify_node)
-    graph.add_node("runtime_config", runtime_config_node)
-    graph.add_node("tracking", tracking_node)
-    graph.add_node("rag", rag_node)
-    graph.add_node("review", review_node)
-    graph.add_node("finalize", finalize_node)
+    nodes = {
+        "classify": classify_node,
+        "clarify": clarify_node,
+        "runtime_config": runtime_config_node,
+        "tracking": tracking_node,
+        "rag": rag_node,
+        "review": review_node,
+        "finalize": finalize_node,
+    }
+    for name, node in nodes.items():
+        graph.add_node(name, traced(f"graph.{name}")(node))
 
     graph.set_entry_point("classify")
     graph.add_conditional_edges(
@@ -329,12 +520,124 @@ def get_support_graph():
     return _build_graph()
 
 
+def _finish_turn(
+    tenant_settings: Settings,
+    *,
+    tenant_id: str,
+    session_id: str,
+    user_message: str,
+    memory: SessionMemory | None,
+    state: SupportGraphState,
+) -> None:
+    FALLBACKS.labels(code=state.get("why_fallback") or "none").inc()
+    save_session_turn(
+        tenant_settings,
+        tenant_id=tenant_id,
+        session_id=session_id,
+        memory=memory,
+        user_message=user_message,
+        intent=state.get("intent", "fallback"),
+        entities=state.get("entities"),
+        resolved=state.get("route") in ("tracking", "rag") and not state.get("needs_human", False),
+    )
+
+
+def _precomputed_state(state: SupportGraphState, settings: Settings) -> SupportGraphState | None:
+    """Serve a known FAQ question from the answer cache built at ingest, skipping the graph."""
+    if is_follow_up(state["user_message"]):
+        return None
+    started = time.perf_counter()
+    try:
+        hit = lookup_precomputed_answer(settings, state["user_message"], get_rag_service())
+    except Exception as exc:
+        logger.warning("answer cache lookup failed: %s", exc)
+        hit = None
+    record_cache("answer_cache", hit is not None)
+    if hit is None:
+        return None
+    entry, match = hit
+    state.update(
+        intent=entry.intent,
+        confidence=entry.confidence,
+        entities={},
+        route="rag",
+        answer=entry.answer,
+        sources=[dict(source) for source in entry.sources],
+        needs_human=False,
+        why_fallback=None,
+        answer_mode="precomputed",
+        session_memory=load_session_memory(settings, state.get("tenant_id", ""), state.get("session_id", "")),
+    )
+    _append_trace(
+        state,
+        {"tool": "answer_cache", "status": match, "latency_ms": int((time.perf_counter() - started) * 1000)},
+    )
+    return state
+
+
 def run_support_flow(*, tenant_id: str, session_id: str, user_message: str) -> SupportGraphState:
-    app = get_support_graph()
     initial_state: SupportGraphState = {
         "tenant_id": tenant_id,
         "session_id": session_id,
         "user_message": user_message,
         "tool_trace": [],
     }
-    return app.invoke(initial_state)
+    tenant_settings = get_tenant_settings(tenant_id, get_settings())
+    with usage_scope(tenant_id), tenant_scope(tenant_settings):
+        state = _precomputed_state(initial_state, tenant_settings)
+        if state is None:
+            state = get_support_graph().invoke(initial_state)
+    _finish_turn(
+        tenant_settings,
+        tenant_id=tenant_id,
+        session_id=session_id,
+        user_message=user_message,
+        memory=state.pop("session_memory", None),
+        state=state,
+    )
+    return state
+
+
+def coalescing_key(tenant_id: str, user_message: str) -> tuple[str, str] | None:
+    """
+    Key under which identical in-flight questions may share one graph run, or None when the
+    answer can depend on the asking session (follow-ups are rewritten with the session's history,
+    tracking fills numbers from it). Decided before joining, since a follower whose shared result
+    is unusable has to wait for the leader and then run the graph again.
+    """
+    if is_follow_up(user_message) or looks_like_tracking(user_message):
+        return None
+    normalized = normalize_question(user_message)
+    return (tenant_id, normalized) if normalized else None
+
+
+def is_shareable_result(state: SupportGraphState) -> bool:
+    # Tracking fills missing numbers/couriers from each session's memory, so only session-free
+    # intents are handed to other askers.
+    if state.get("intent") == "tracking":
+        return False
+    return not any(item.get("tool") == "session_memory" for item in state.get("tool_trace", []))
+
+
+def adopt_shared_result(
+    shared: SupportGraphState,
+    *,
+    tenant_id: str,
+    session_id: str,
+    user_message: str,
+) -> SupportGraphState:
+    """Reuse another session's run of the same question, recording the turn in this session."""
+    state: SupportGraphState = copy.deepcopy(shared)
+    state["session_id"] = session_id
+    state["user_message"] = user_message
+    _append_trace(state, {"tool": "coalesced", "status": "shared", "latency_ms": 0})
+    tenant_settings = get_tenant_settings(tenant_id, get_settings())
+    _finish_turn(
+        tenant_settings,
+        tenant_id=tenant_id,
+        session_id=session_id,
+        user_message=user_message,
+        memory=load_session_memory(tenant_settings, tenant_id, session_id),
+        state=state,
+    )
+    return state
@@ -0,0 +1,64 @@
+import math
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import HTTPException, Request
+
+from app.core.config import Settings, get_settings
+from app.services.rate_limit import (
+    AdmissionRejected,
+    RateLimitExceeded,
+    get_admission_controller,
+    get_rate_limiter,
+)
+
+
+BUSY_DETAIL = "요청이 많아 잠시 후 다시 시도해 주세요."
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=BUSY_DETAIL,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_ip(request: Request, settings: Settings | None = None) -> str:
+    """
+    Caller address for rate limiting. With N trusted proxy hops the client is the Nth entry from the
+    right of X-Forwarded-For; entries further left are client-supplied and can be spoofed.
+    """
+    hops = (settings or get_settings()).rate_limit_trusted_proxy_hops
+    forwarded = [item.strip() for item in request.headers.get("x-forwarded-for", "").split(",") if item.strip()]
+    if hops > 0 and forwarded:
+        return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(
+    request: Request,
+    scope: str,
+    *,
+    tenant_id: str | None = None,
+    session_id: str | None = None,
+) -> None:
+    limiter = get_rate_limiter()
+    keys = {
+        "ip": client_ip(request, limiter.settings),
+        "tenant": tenant_id,
+        "session": f"{tenant_id}:{session_id}" if session_id else None,
+    }
+    try:
+        await limiter.check(scope, keys)
+    except RateLimitExceeded as exc:
+        raise too_many_requests(exc.retry_after) from exc
+
+
+@contextmanager
+def admission(scope: str) -> Iterator[None]:
+    try:
+        with get_admission_controller().admit(scope):
+            yield
+    except AdmissionRejected as exc:
+        raise too_many_requests(1) from exc
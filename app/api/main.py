@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
 
@@ -6,8 +8,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 
+from app.api.routes.admin_settings import router as admin_settings_router
 from app.api.routes.chat import router as chat_router
-from app.api.routes.infra import router as infra_router
+from app.api.routes.infra import (
+    router as infra_router,
+    start_health_prober,
+    stop_health_prober,
+)
 from app.api.routes.infra_test import router as infra_test_router
 from app.api.routes.leads import router as leads_router
 from app.api.routes.rag import router as rag_router
@@ -16,8 +23,15 @@ from app.api.routes.tools import (
     start_naver_autoreply_worker_if_enabled,
     stop_naver_autoreply_worker,
 )
+from app.api.routes.usage import router as usage_router
 from app.core.config import get_settings
 from app.core.observability import configure_observability
+from app.repositories.supabase_repo import get_async_supabase_repo
+from app.services.usage import start_usage_flusher, stop_usage_flusher
+from app.services.warmup import start_warmup, wait_for_warmup
+
+
+logger = logging.getLogger("shop_ai")
 
 
 def create_app() -> FastAPI:
@@ -26,11 +40,23 @@ def create_app() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
+        if start_warmup(settings):
+            # Startup (and therefore the health check) waits for warm clients, up to the timeout.
+            if not await asyncio.to_thread(wait_for_warmup, settings.startup_warmup_timeout_seconds):
+                logger.warning(
+                    "warmup still running after %.0fs; serving anyway",
+                    settings.startup_warmup_timeout_seconds,
+                )
+        start_health_prober(settings)
         start_naver_autoreply_worker_if_enabled()
+        start_usage_flusher(settings)
         try:
             yield
         finally:
+            stop_health_prober()
             stop_naver_autoreply_worker()
+            stop_usage_flusher()
+            await get_async_supabase_repo().aclose()
 
     app = FastAPI(title="Shop AI API", version="0.1.0", lifespan=lifespan)
     app.add_middleware(
@@ -49,6 +75,8 @@ def create_app() -> FastAPI:
     app.include_router(leads_router)
     app.include_router(rag_router)
     app.include_router(tools_router)
+    app.include_router(usage_router)
+    app.include_router(admin_settings_router)
 
     @app.get("/")
     def root() -> RedirectResponse:
@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel
+
+from app.api.routes.infra_test import _validate_infra_test_token
+from app.services.settings_reload import reload_application_settings
+
+
+router = APIRouter(prefix="/v1/infra/settings", tags=["infra"])
+
+
+class SettingsReloadResponse(BaseModel):
+    status: str
+    changed: list[str]
+    rebuilt: list[str]
+    updated: list[str]
+    restart_required: list[str]
+    errors: dict[str, str]
+
+
+@router.post("/reload", response_model=SettingsReloadResponse)
+async def reload_settings(
+    x_infra_test_token: str | None = Header(default=None, alias="x-infra-test-token"),
+) -> SettingsReloadResponse:
+    _validate_infra_test_token(x_infra_test_token)
+    try:
+        # Rebuilding a component may open connections; keep that off the event loop.
+        result = await asyncio.to_thread(reload_application_settings)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    for instance in result.retired:
+        if hasattr(instance, "aclose"):
+            try:
+                await instance.aclose()
+            except Exception:  # pragma: no cover - pool bound to another loop
+                pass
+
+    if result.errors:
+        status = "degraded"
+    elif not result.changed:
+        status = "unchanged"
+    else:
+        status = "ok"
+    # Field names only: values may be secrets.
+    return SettingsReloadResponse(
+        status=status,
+        changed=result.changed,
+        rebuilt=result.rebuilt,
+        updated=result.updated,
+        restart_required=result.restart_required,
+        errors=result.errors,
+    )
@@ -1,8 +1,23 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+import asyncio
 
-from app.agents.langgraph.support_graph import run_support_flow
-from app.repositories.supabase_repo import get_supabase_repo
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app.agents.langgraph.support_graph import (
+    adopt_shared_result,
+    coalescing_key,
+    is_shareable_result,
+    run_support_flow,
+)
+from app.api.guards import admission, enforce_rate_limit, too_many_requests
+from app.core.config import Settings
+from app.core.metrics import record_cache
+from app.core.tracing import span
+from app.repositories.supabase_repo import get_async_supabase_repo
+from app.services.coalescing import get_chat_single_flight
+from app.services.tenant_config import get_tenant_config_cache, get_tenant_settings
+from app.services.tenant_limits import TenantBusyError, get_tenant_limiter
 
 
 router = APIRouter(prefix="/v1/chat", tags=["chat"])
@@ -24,6 +39,7 @@ class ToolTraceItem(BaseModel):
     tool: str
     status: str
     latency_ms: int
+    prompt_tokens: int | None = None
 
 
 class TrackingProgress(BaseModel):
@@ -41,20 +57,55 @@ class ChatQueryResponse(BaseModel):
     needs_human: bool
     why_fallback: str | None = None
     tracking_progress: TrackingProgress | None = None
-
-
-@router.post("/query", response_model=ChatQueryResponse)
-def query(payload: ChatQueryRequest) -> ChatQueryResponse:
-    try:
-        state = run_support_flow(
+    answer_mode: str | None = None
+
+
+async def _answer(payload: ChatQueryRequest, tenant_settings: Settings) -> dict:
+    async def _run_flow() -> dict:
+        async with get_tenant_limiter().slot(payload.tenant_id, tenant_settings):
+            # The graph is sync (LLM/tool SDKs); it runs on anyio's threadpool (40 tokens), the same
+            # one sync routes use, not asyncio's default executor of min(32, cpu + 4) threads.
+            return await run_in_threadpool(
+                run_support_flow,
+                tenant_id=payload.tenant_id,
+                session_id=payload.session_id,
+                user_message=payload.user_message,
+            )
+
+    key = coalescing_key(payload.tenant_id, payload.user_message) if tenant_settings.chat_coalescing_enabled else None
+    if key is None:
+        return await _run_flow()
+    state, shared = await get_chat_single_flight().do(key, _run_flow)
+    adopted = shared and is_shareable_result(state)
+    record_cache("chat_coalescing", adopted)
+    if adopted:
+        return await run_in_threadpool(
+            adopt_shared_result,
+            state,
             tenant_id=payload.tenant_id,
             session_id=payload.session_id,
             user_message=payload.user_message,
         )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail="Internal processing error.") from exc
+    # The leader's answer used its own session's memory; run this session's turn separately.
+    return await _run_flow() if shared else state
+
+
+@router.post("/query", response_model=ChatQueryResponse)
+async def query(payload: ChatQueryRequest, request: Request) -> ChatQueryResponse:
+    # Cheap checks first: abusive or excess traffic is refused before any tenant lookup or LLM call.
+    await enforce_rate_limit(request, "chat", tenant_id=payload.tenant_id, session_id=payload.session_id)
+    with admission("chat"):
+        tenant_settings = get_tenant_config_cache().cached(payload.tenant_id) or await run_in_threadpool(
+            get_tenant_settings, payload.tenant_id
+        )
+        try:
+            state = await _answer(payload, tenant_settings)
+        except TenantBusyError as exc:
+            raise too_many_requests(tenant_settings.tenant_queue_timeout_seconds) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail="Internal processing error.") from exc
 
     response = ChatQueryResponse(
         answer=state.get("answer", ""),
@@ -67,23 +118,30 @@ def query(payload: ChatQueryRequest) -> ChatQueryResponse:
         tracking_progress=TrackingProgress.model_validate(state.get("tracking_progress"))
         if state.get("tracking_progress") is not None
         else None,
+        answer_mode=state.get("answer_mode"),
     )
 
-    repo = get_supabase_repo()
-    repo.log_chat_interaction(
-        tenant_id=payload.tenant_id,
-        session_id=payload.session_id,
-        user_message=payload.user_message,
-        response_payload=response.model_dump(),
-        why_fallback=response.why_fallback,
-    )
-    for trace in response.tool_trace:
-        repo.log_tool_call(
-            tenant_id=payload.tenant_id,
-            session_id=payload.session_id,
-            tool=trace.tool,
-            status=trace.status,
-            latency_ms=trace.latency_ms,
-            why_fallback=response.why_fallback,
+    repo = get_async_supabase_repo()
+    with span("supabase.log", rows=1 + len(response.tool_trace)):
+        await asyncio.gather(
+            repo.log_chat_interaction(
+                tenant_id=payload.tenant_id,
+                session_id=payload.session_id,
+                user_message=payload.user_message,
+                response_payload=response.model_dump(),
+                why_fallback=response.why_fallback,
+            ),
+            *(
+                repo.log_tool_call(
+                    tenant_id=payload.tenant_id,
+                    session_id=payload.session_id,
+                    tool=trace.tool,
+                    status=trace.status,
+                    latency_ms=trace.latency_ms,
+                    detail={"prompt_tokens": trace.prompt_tokens} if trace.prompt_tokens is not None else None,
+                    why_fallback=response.why_fallback,
+                )
+                for trace in response.tool_trace
+            ),
         )
     return response
@@ -1,12 +1,20 @@
-from concurrent.futures import ThreadPoolExecutor, wait
-
-from fastapi import APIRouter
+import logging
+import threading
+import time
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.core.metrics import render_metrics
+from app.services.warmup import warmup_status
 
 
 router = APIRouter(tags=["infra"])
+logger = logging.getLogger(__name__)
 
 READINESS_TIMEOUT_SECONDS = 2.0
 
@@ -16,10 +24,14 @@ class ReadyChecks(BaseModel):
     supabase: str
     pinecone: str
     deliveryapi_config: str
+    warmup: str = "skipped"
 
 
 class ReadyDetails(BaseModel):
     failed: list[str]
+    checked_at: str | None = None
+    age_seconds: float = 0.0
+    stale: bool = False
 
 
 class ReadyResponse(BaseModel):
@@ -28,6 +40,28 @@ class ReadyResponse(BaseModel):
     details: ReadyDetails
 
 
+# Probe still running per check after overrunning its deadline. A hung upstream call cannot be
+# cancelled, so it keeps its thread and later probes report a timeout instead of queueing behind it.
+_OVERRUNNING: dict[str, Future] = {}
+_OVERRUNNING_LOCK = threading.Lock()
+
+
+def _start_check(name: str, func) -> Future:
+    """Run one check on its own daemon thread so a hung call never blocks other probes or shutdown."""
+    future: Future = Future()
+
+    def _run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func())
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=_run, name=f"ready-check-{name}", daemon=True).start()
+    return future
+
+
 def _run_dependency_checks(timeout: float) -> dict[str, tuple[bool, str]]:
     if timeout <= 0:
         return {"supabase": (False, "timeout"), "pinecone": (False, "timeout")}
@@ -38,36 +72,37 @@ def _run_dependency_checks(timeout: float) -> dict[str, tuple[bool, str]]:
     }
     results: dict[str, tuple[bool, str]] = {}
 
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        futures = {name: executor.submit(func) for name, func in checks.items()}
-        done, not_done = wait(set(futures.values()), timeout=timeout)
-
-        for name, future in futures.items():
-            if future in not_done:
-                results[name] = (False, "timeout")
-                future.cancel()
+    futures: dict[str, Future] = {}
+    with _OVERRUNNING_LOCK:
+        for name, func in checks.items():
+            previous = _OVERRUNNING.get(name)
+            if previous is not None and not previous.done():
+                results[name] = (False, "timeout: previous probe still running")
                 continue
-            try:
-                future.result()
-                results[name] = (True, "")
-            except Exception as exc:  # pragma: no cover - defensive
-                results[name] = (False, str(exc))
+            _OVERRUNNING.pop(name, None)
+            futures[name] = _start_check(name, func)
+    done, not_done = wait(set(futures.values()), timeout=timeout)
+
+    for name, future in futures.items():
+        if future in not_done:
+            results[name] = (False, "timeout")
+            with _OVERRUNNING_LOCK:
+                _OVERRUNNING[name] = future
+            continue
+        try:
+            future.result()
+            results[name] = (True, "")
+        except Exception as exc:  # pragma: no cover - defensive
+            results[name] = (False, str(exc))
 
-    return results
+    return {name: results[name] for name in checks}
 
 
 def _check_supabase() -> None:
-    settings = get_settings()
-    if not settings.supabase_url or not settings.supabase_service_role_key:
-        raise ValueError("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY missing")
-    try:
-        from supabase import create_client
-    except Exception as exc:
-        raise RuntimeError("supabase client import failed") from exc
+    # Reuse the app's repository client rather than building (and authenticating) a new one per probe.
+    from app.repositories.supabase_repo import get_supabase_repo
 
-    client = create_client(settings.supabase_url, settings.supabase_service_role_key)
-    # Real connectivity check: lightweight select query.
-    client.table("tenant_settings").select("tenant_id").limit(1).execute()
+    get_supabase_repo().ping()
 
 
 def _check_pinecone() -> None:
@@ -76,14 +111,84 @@ def _check_pinecone() -> None:
         raise ValueError("PINECONE_API_KEY missing")
     if not settings.pinecone_index:
         raise ValueError("PINECONE_INDEX missing")
-    from pinecone import Pinecone
+    from app.rag.retriever import get_rag_service
 
-    pc = Pinecone(api_key=settings.pinecone_api_key)
-    if settings.pinecone_index_host:
-        index = pc.Index(host=settings.pinecone_index_host)
-        index.describe_index_stats()
-    else:
-        pc.describe_index(settings.pinecone_index)
+    get_rag_service().ping()
+
+
+@dataclass(frozen=True)
+class DependencySnapshot:
+    results: dict[str, tuple[bool, str]]
+    checked_at: datetime
+    checked_monotonic: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.checked_monotonic
+
+
+_PROBER_LOCK = threading.Lock()
+_PROBER_STOP_EVENT = threading.Event()
+_PROBER_THREAD: threading.Thread | None = None
+_SNAPSHOT: DependencySnapshot | None = None
+
+
+def probe_dependencies() -> DependencySnapshot:
+    return DependencySnapshot(
+        results=_run_dependency_checks(READINESS_TIMEOUT_SECONDS),
+        checked_at=datetime.now(tz=timezone.utc),
+        checked_monotonic=time.monotonic(),
+    )
+
+
+def _prober_loop(interval_seconds: float) -> None:
+    global _SNAPSHOT
+    while True:
+        try:
+            _SNAPSHOT = probe_dependencies()
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("health probe failed")
+        if _PROBER_STOP_EVENT.wait(interval_seconds):
+            return
+
+
+def start_health_prober(settings: Settings) -> bool:
+    """Refresh dependency status in the background so /ready answers from a snapshot."""
+    global _PROBER_THREAD, _SNAPSHOT
+    if settings.health_probe_interval_seconds <= 0:
+        return False
+    with _PROBER_LOCK:
+        if _PROBER_THREAD and _PROBER_THREAD.is_alive():
+            return False
+        _PROBER_STOP_EVENT.clear()
+        _SNAPSHOT = None
+        _PROBER_THREAD = threading.Thread(
+            target=_prober_loop,
+            args=(max(1.0, settings.health_probe_interval_seconds),),
+            name="health-prober",
+            daemon=True,
+        )
+        _PROBER_THREAD.start()
+        return True
+
+
+def stop_health_prober() -> None:
+    global _PROBER_THREAD, _SNAPSHOT
+    with _PROBER_LOCK:
+        thread = _PROBER_THREAD
+        _PROBER_THREAD = None
+        _PROBER_STOP_EVENT.set()
+    if thread and thread.is_alive():
+        thread.join(timeout=READINESS_TIMEOUT_SECONDS + 1.0)
+    _SNAPSHOT = None
+
+
+def _dependency_snapshot() -> DependencySnapshot:
+    """The prober's latest snapshot; without a running prober (or before its first pass) probe inline."""
+    snapshot = _SNAPSHOT
+    if snapshot is None or _PROBER_THREAD is None:
+        return probe_dependencies()
+    return snapshot
 
 
 @router.get("/ready", response_model=ReadyResponse)
@@ -107,7 +212,12 @@ def ready() -> ReadyResponse:
         checks.deliveryapi_config = "fail"
         failed.append("deliveryapi_config")
 
-    dep_results = _run_dependency_checks(READINESS_TIMEOUT_SECONDS)
+    snapshot = _dependency_snapshot()
+    dep_results = snapshot.results
+    age_seconds = round(snapshot.age_seconds, 3)
+    stale = age_seconds > settings.health_probe_stale_seconds
+    if stale:
+        failed.append(f"probe:stale:{age_seconds:.0f}s")
     ok_supabase, err_supabase = dep_results["supabase"]
     if ok_supabase:
         checks.supabase = "ok"
@@ -122,13 +232,45 @@ def ready() -> ReadyResponse:
         checks.pinecone = "fail"
         failed.append(f"pinecone:{err_pinecone or 'unknown'}")
 
+    warmup = warmup_status()
+    checks.warmup = warmup["status"]
+    failed.extend(
+        f"warmup:{name}:{step.get('error', 'unknown')}"
+        for name, step in warmup["steps"].items()
+        if step["status"] == "fail"
+    )
+
     if checks.env == "fail":
         status = "fail"
-    elif checks.supabase == "ok" and checks.pinecone == "ok" and checks.deliveryapi_config == "ok":
+    elif checks.warmup == "warming":
+        # Not green until clients are built, so the first real request doesn't pay for it.
+        status = "warming"
+    elif (
+        checks.supabase == "ok"
+        and checks.pinecone == "ok"
+        and checks.deliveryapi_config == "ok"
+        and checks.warmup != "degraded"
+        and not stale
+    ):
         status = "ok"
     elif checks.supabase == "fail" and checks.pinecone == "fail":
         status = "fail"
     else:
         status = "degraded"
 
-    return ReadyResponse(status=status, checks=checks, details=ReadyDetails(failed=failed))
+    return ReadyResponse(
+        status=status,
+        checks=checks,
+        details=ReadyDetails(
+            failed=failed,
+            checked_at=snapshot.checked_at.isoformat(),
+            age_seconds=age_seconds,
+            stale=stale,
+        ),
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,12 +1,13 @@
 import ipaddress
 from datetime import datetime, timezone
-from typing import Literal
+from typing import Any, Literal
 
 import requests
-from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Query, Request
 from pydantic import BaseModel
 
 from app.core.config import get_settings
+from app.core.tracing import get_span_buffer
 
 
 router = APIRouter(prefix="/v1/infra", tags=["infra-test"])
@@ -32,6 +33,24 @@ class EgressIPResponse(BaseModel):
     checked_at: str
 
 
+class TraceSpanItem(BaseModel):
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    started_at: float
+    duration_ms: float
+    status: str
+    error: str | None = None
+    attributes: dict[str, Any]
+
+
+class TracesResponse(BaseModel):
+    status: str
+    count: int
+    spans: list[TraceSpanItem]
+
+
 def _get_sentry_sdk():
     import sentry_sdk
 
@@ -122,3 +141,19 @@ def infra_egress_ip(
         request_id=request_id,
         checked_at=datetime.now(tz=timezone.utc).isoformat(),
     )
+
+
+@router.get("/traces", response_model=TracesResponse)
+def infra_traces(
+    trace_id: str | None = Query(default=None),
+    name: str | None = Query(default=None),
+    limit: int = Query(default=200, ge=1, le=5000),
+    x_infra_test_token: str | None = Header(default=None, alias="x-infra-test-token"),
+) -> TracesResponse:
+    _validate_infra_test_token(x_infra_test_token)
+    spans = get_span_buffer().spans(trace_id=trace_id, name=name, limit=limit)
+    return TracesResponse(
+        status="ok",
+        count=len(spans),
+        spans=[TraceSpanItem.model_validate(item.to_dict()) for item in spans],
+    )
@@ -2,10 +2,11 @@ import re
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 
-from app.repositories.supabase_repo import get_supabase_repo
+from app.api.guards import enforce_rate_limit
+from app.repositories.supabase_repo import get_async_supabase_repo
 
 
 router = APIRouter(prefix="/v1/leads", tags=["leads"])
@@ -26,7 +27,8 @@ class LeadSignupResponse(BaseModel):
 
 
 @router.post("/signup", response_model=LeadSignupResponse)
-def lead_signup(payload: LeadSignupRequest) -> LeadSignupResponse:
+async def lead_signup(payload: LeadSignupRequest, request: Request) -> LeadSignupResponse:
+    await enforce_rate_limit(request, "leads")
     email = payload.email.strip().lower()
     if not EMAIL_PATTERN.fullmatch(email):
         raise HTTPException(status_code=400, detail="유효한 이메일 주소를 입력해 주세요.")
@@ -37,8 +39,8 @@ def lead_signup(payload: LeadSignupRequest) -> LeadSignupResponse:
         metadata["plan"] = payload.plan
     metadata["received_at"] = datetime.now(tz=timezone.utc).isoformat()
 
-    repo = get_supabase_repo()
-    saved = repo.save_lead_signup(email=email, source=source, metadata=metadata)
+    repo = get_async_supabase_repo()
+    saved = await repo.save_lead_signup(email=email, source=source, metadata=metadata)
 
     if saved:
         return LeadSignupResponse(status="ok", message="신청이 접수되었습니다. 빠르게 연락드리겠습니다.")
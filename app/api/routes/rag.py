@@ -3,7 +3,6 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from app.rag.ingest import ingest_gold_data
 from app.repositories.supabase_repo import get_supabase_repo
 
 
@@ -14,6 +13,8 @@ class RAGIngestRequest(BaseModel):
     source_paths: list[str] = Field(default_factory=lambda: ["data/gold"])
     doc_type: str = Field(default="gold")
     version_tag: str
+    promote: bool = True
+    precompute_answers: bool = False
 
 
 class RAGIngestResponse(BaseModel):
@@ -31,8 +32,16 @@ def ingest(payload: RAGIngestRequest) -> RAGIngestResponse:
     if not source_root.exists():
         raise HTTPException(status_code=400, detail=f"source path not found: {source_root}")
 
+    # pandas and the text splitters are only needed here; keep them out of API startup.
+    from app.rag.ingest import ingest_gold_data
+
     try:
-        upserted = ingest_gold_data(data_root=source_root, version_tag=payload.version_tag)
+        upserted = ingest_gold_data(
+            data_root=source_root,
+            version_tag=payload.version_tag,
+            promote=payload.promote,
+            precompute_answers=payload.precompute_answers,
+        )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
@@ -3,18 +3,21 @@ import time
 import logging
 from collections import deque
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.agents.langgraph.support_graph import run_support_flow
+from app.api.guards import admission, enforce_rate_limit
 from app.core.config import get_settings
 from app.core.fallback_codes import FallbackCode
+from app.core.metrics import NAVER_WORKER_CYCLE_DURATION
 from app.integrations.naver.client import NaverCommerceAPIError, NaverCommerceClient
 from app.integrations.shipping.client import ShippingAPIError, ShippingClient
-from app.services.llm_provider import invoke_with_fallback
+from app.services.llm_provider import cached_chain, invoke_with_fallback
+from app.services.usage import usage_scope
 
 
 router = APIRouter(prefix="/v1/tools", tags=["tools"])
@@ -253,23 +256,25 @@ def _tracking_api_delay_answer(product_name: str | None = None) -> str:
     )
 
 
+NAVER_SAFE_ANSWER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "너는 한국 이커머스 쇼핑몰 CS 상담원이다. "
+            "상품문의에 답할 때는 친절하고 짧게 2~3문장으로 답한다. "
+            "모르는 사실을 단정하지 말고 확인이 필요한 내용은 '확인 후 안내'라고 답한다. "
+            "반드시 마지막에 '추가로 궁금하신 점 있으신가요?'를 붙인다.",
+        ),
+        ("human", "상품명: {product_name}\n고객 문의: {question}"),
+    ]
+)
+
+
 def _generate_naver_safe_answer(question: str, product_name: str | None = None) -> str:
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                "너는 한국 이커머스 쇼핑몰 CS 상담원이다. "
-                "상품문의에 답할 때는 친절하고 짧게 2~3문장으로 답한다. "
-                "모르는 사실을 단정하지 말고 확인이 필요한 내용은 '확인 후 안내'라고 답한다. "
-                "반드시 마지막에 '추가로 궁금하신 점 있으신가요?'를 붙인다.",
-            ),
-            ("human", "상품명: {product_name}\n고객 문의: {question}"),
-        ]
-    )
     settings = get_settings()
 
     def _invoke(llm, _provider):
-        chain = prompt | llm
+        chain = cached_chain("naver_safe_answer", llm, lambda model: NAVER_SAFE_ANSWER_PROMPT | model)
         out = chain.invoke({"question": question, "product_name": product_name or "미지정"})
         return str(getattr(out, "content", out)).strip()
 
@@ -445,7 +450,8 @@ def _run_naver_auto_answer_once(payload: NaverAutoAnswerRequest) -> NaverAutoAns
             if why_fallback == FallbackCode.TRACKING_API_ERROR.value:
                 generated_answer = _tracking_api_delay_answer(product_name=product_name)
             else:
-                generated_answer = _generate_naver_safe_answer(question=question, product_name=product_name)
+                with usage_scope(payload.tenant_id):
+                    generated_answer = _generate_naver_safe_answer(question=question, product_name=product_name)
             needs_human = False
             why_fallback = None
         else:
@@ -522,6 +528,7 @@ def _run_naver_worker_cycle() -> None:
             "latency_ms": latency_ms,
         }
         _set_worker_last_result(payload)
+        NAVER_WORKER_CYCLE_DURATION.labels(status=result.status).observe(time.perf_counter() - started)
         if result.posted:
             logger.info("Naver auto-reply worker posted answer question_id=%s", result.question_id)
     except Exception as exc:
@@ -537,6 +544,7 @@ def _run_naver_worker_cycle() -> None:
             "error": str(exc),
         }
         _set_worker_last_result(payload)
+        NAVER_WORKER_CYCLE_DURATION.labels(status="error").observe(time.perf_counter() - started)
         logger.exception("Naver auto-reply worker cycle failed")
 
 
@@ -704,7 +712,18 @@ def naver_auto_answer_drain(
     )
 
 
-@router.get("/naver/public-demo-feed", response_model=NaverPublicDemoFeedResponse)
+async def _guard_public_demo_feed(request: Request) -> AsyncIterator[None]:
+    # The feed handler is sync; the guard runs on the loop before it takes a threadpool worker.
+    await enforce_rate_limit(request, "demo_feed")
+    with admission("demo_feed"):
+        yield
+
+
+@router.get(
+    "/naver/public-demo-feed",
+    response_model=NaverPublicDemoFeedResponse,
+    dependencies=[Depends(_guard_public_demo_feed)],
+)
 def naver_public_demo_feed(
     tenant_id: str = "tenant-demo",
     page: int = 1,
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Header, Query
+from pydantic import BaseModel
+
+from app.api.routes.infra_test import _validate_infra_test_token
+from app.core.config import get_settings
+from app.repositories.supabase_repo import get_supabase_repo
+from app.services.usage import get_usage_aggregator, token_budget_for
+
+
+router = APIRouter(prefix="/v1/usage", tags=["usage"])
+
+
+class UsageItem(BaseModel):
+    tenant_id: str
+    purpose: str
+    provider: str
+    model: str
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+
+
+class UsageBudget(BaseModel):
+    daily_token_budget: int
+    tokens_today: int
+    over_budget: bool
+
+
+class UsageResponse(BaseModel):
+    status: str
+    since: str
+    items: list[UsageItem]
+    budget: UsageBudget | None = None
+
+
+def _aggregate(rows: list[dict]) -> list[UsageItem]:
+    merged: dict[tuple[str, str, str, str], dict] = {}
+    for row in rows:
+        key = (str(row["tenant_id"]), str(row["purpose"]), str(row["provider"]), str(row["model"]))
+        current = merged.setdefault(
+            key,
+            {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        )
+        for field in current:
+            current[field] += int(row.get(field) or 0)
+    items = [
+        UsageItem(tenant_id=tenant_id, purpose=purpose, provider=provider, model=model, **totals)
+        for (tenant_id, purpose, provider, model), totals in merged.items()
+    ]
+    return sorted(items, key=lambda item: item.total_tokens, reverse=True)
+
+
+@router.get("", response_model=UsageResponse)
+def usage(
+    tenant_id: str | None = Query(default=None),
+    days: int = Query(default=1, ge=1, le=90),
+    x_infra_test_token: str | None = Header(default=None, alias="x-infra-test-token"),
+) -> UsageResponse:
+    _validate_infra_test_token(x_infra_test_token)
+    settings = get_settings()
+    since = datetime.now(tz=timezone.utc) - timedelta(days=days)
+
+    # Flushed windows from Supabase plus the not-yet-flushed in-memory window.
+    aggregator = get_usage_aggregator()
+    rows = get_supabase_repo().list_llm_usage(tenant_id=tenant_id, since=since)
+    rows.extend(row for row in aggregator.pending_rows() if not tenant_id or row["tenant_id"] == tenant_id)
+
+    budget = None
+    if tenant_id:
+        daily_budget = token_budget_for(settings, tenant_id)
+        tokens_today = aggregator.tokens_today(tenant_id)
+        budget = UsageBudget(
+            daily_token_budget=daily_budget,
+            tokens_today=tokens_today,
+            over_budget=daily_budget > 0 and tokens_today >= daily_budget,
+        )
+    return UsageResponse(status="ok", since=since.isoformat(), items=_aggregate(rows), budget=budget)
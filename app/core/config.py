@@ -1,3 +1,4 @@
+import threading
 from functools import lru_cache
 from typing import Literal
 
@@ -31,14 +32,74 @@ class Settings(BaseSettings):
     pinecone_index_host: str = Field(default="")
     pinecone_cloud: str = "aws"
     pinecone_region: str = "us-east-1"
+    pinecone_namespace_prefix: str = "gold-"
+    index_version_store: Literal["file", "supabase"] = "file"
+    index_version_pointer_path: str = "data/index/active_version.json"
+    index_version_refresh_seconds: float = 30.0
+    index_version_keep: int = 3
     retriever_k: int = 4
+    retriever_backend: Literal["pinecone", "local", "hybrid"] = "hybrid"
+    retriever_rrf_k: int = 60
+    retriever_overfetch_factor: int = 3
+    retriever_mmr_lambda: float = 0.7
+    reranker: Literal["none", "lexical", "onnx"] = "lexical"
+    reranker_top_n: int = 3
+    reranker_batch_size: int = 16
+    reranker_latency_budget_ms: int = 150
+    reranker_onnx_model_path: str = Field(default="")
+    reranker_onnx_tokenizer_path: str = Field(default="")
+    reranker_max_length: int = 256
+    generation_context_token_budget: int = 1500
+    generation_upgrade_context_token_budget: int = 3000
+    sparse_index_dir: str = "data/index"
+    speculative_retrieval_enabled: bool = True
+    speculative_retrieval_fetch_factor: int = 2
+    speculative_retrieval_workers: int = 0
+    speculative_retrieval_wait_seconds: float = 2.0
+    session_memory_enabled: bool = True
+    session_memory_backend: Literal["memory", "supabase"] = "memory"
+    session_memory_ttl_seconds: float = 1800.0
+    session_memory_max_sessions: int = 10000
+    session_memory_max_turns: int = 4
+    session_memory_max_bytes: int = 2048
+    tenant_config_ttl_seconds: float = 60.0
+    tenant_config_max_entries: int = 5000
+    tenant_max_concurrency: int = 8
+    tenant_max_queue: int = 16
+    tenant_queue_timeout_seconds: float = 5.0
+    chat_coalescing_enabled: bool = True
+    answer_cache_enabled: bool = True
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_build_workers: int = 4
+    paraphrase_workers: int = 8
+    paraphrase_requests_per_minute: int = 120
+    rate_limit_enabled: bool = True
+    rate_limit_backend: Literal["memory", "supabase"] = "memory"
+    rate_limit_max_keys: int = 50000
+    rate_limit_trusted_proxy_hops: int = 1
+    rate_limit_chat_session_per_minute: int = 12
+    rate_limit_chat_ip_per_minute: int = 30
+    rate_limit_chat_tenant_per_minute: int = 600
+    rate_limit_leads_ip_per_minute: int = 5
+    rate_limit_demo_feed_ip_per_minute: int = 20
+    admission_chat_max_inflight: int = 32
+    admission_demo_feed_max_inflight: int = 4
 
     classification_confidence_threshold: float = 0.75
     source_score_threshold: float = 0.35
+    sparse_score_threshold: float = 0.75
+    faq_direct_answer_enabled: bool = True
+    faq_direct_score_threshold: float = 0.85
+    faq_direct_sparse_min_words: int = 4
 
     default_answer_closing: str = "추가로 궁금하신 점 있으신가요?"
     default_courier_code: str = "lotte"
     crewai_review_enabled: bool = False
+    crewai_review_mode: Literal["inline", "async", "sampled"] = "inline"
+    crewai_review_sample_rate: float = 0.1
+    crewai_review_low_confidence_threshold: float = 0.85
+    crewai_review_workers: int = 2
+    crewai_review_max_pending: int = 50
 
     deliveryapi_key: str = Field(default="")
     deliveryapi_secret: str = Field(default="")
@@ -62,9 +123,21 @@ class Settings(BaseSettings):
 
     supabase_url: str = Field(default="")
     supabase_service_role_key: str = Field(default="")
+    supabase_http_timeout_seconds: float = 5.0
+    supabase_http_max_connections: int = 20
 
     token_encryption_key: str = Field(default="")
     sentry_dsn: str = Field(default="")
+    tracing_buffer_size: int = 2000
+    startup_warmup_enabled: bool = False
+    startup_warmup_timeout_seconds: float = 30.0
+    health_probe_interval_seconds: float = 10.0
+    health_probe_stale_seconds: float = 30.0
+    usage_flush_interval_seconds: float = 60.0
+    usage_daily_token_budget: int = 0
+    usage_tenant_token_budgets: str = Field(default="")
+    tracing_otlp_endpoint: str = Field(default="")
+    tracing_sentry_spans: bool = False
     infra_test_token: str = Field(default="")
     cors_allowed_origins: str = Field(default="")
     api_base_url: str = Field(default="")
@@ -124,6 +197,28 @@ class Settings(BaseSettings):
                 raise ValueError("INFRA_TEST_TOKEN must be set for API service in staging/prod.")
 
 
+_RELOAD_LOCK = threading.Lock()
+_RELOADED: Settings | None = None
+
+
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    return Settings()
+    return _RELOADED or Settings()
+
+
+def reload_settings() -> tuple[Settings, Settings]:
+    """
+    Re-read the environment/.env and swap the cached instance; returns (previous, current).
+    Invalid configuration raises before the swap, so callers keep the old settings.
+    """
+    global _RELOADED
+    current = Settings()
+    current.validate_runtime()
+    with _RELOAD_LOCK:
+        previous = get_settings()
+        # Readers racing the swap also resolve to `current` rather than building their own.
+        _RELOADED = current
+        get_settings.cache_clear()
+        get_settings()
+        _RELOADED = None
+    return previous, current
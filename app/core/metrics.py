@@ -0,0 +1,118 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+_UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0)
+_WORKER_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+_SESSION_MEMORY_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "shop_ai_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+LLM_CALLS = Counter(
+    "shop_ai_llm_calls_total",
+    "LLM invocations per provider attempt.",
+    ["provider", "purpose", "status"],
+)
+LLM_CALL_DURATION = Histogram(
+    "shop_ai_llm_call_duration_seconds",
+    "LLM invocation latency per provider attempt.",
+    ["provider", "purpose"],
+    buckets=_LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "shop_ai_llm_tokens_total",
+    "LLM/embedding tokens by direction (embedding tokens are estimated).",
+    ["provider", "purpose", "direction"],
+)
+FALLBACKS = Counter(
+    "shop_ai_fallback_total",
+    "Support flow responses by why_fallback code.",
+    ["code"],
+)
+CACHE_REQUESTS = Counter(
+    "shop_ai_cache_requests_total",
+    "Cache lookups by result; hit ratio = hit / (hit + miss).",
+    ["cache", "result"],
+)
+UPSTREAM_DURATION = Histogram(
+    "shop_ai_upstream_request_duration_seconds",
+    "Latency of shipping/Naver HTTP calls per attempt.",
+    ["upstream", "operation", "status"],
+    buckets=_UPSTREAM_BUCKETS,
+)
+NAVER_WORKER_CYCLE_DURATION = Histogram(
+    "shop_ai_naver_worker_cycle_duration_seconds",
+    "Duration of one Naver auto-reply worker cycle.",
+    ["status"],
+    buckets=_WORKER_BUCKETS,
+)
+
+SESSION_MEMORY_BYTES = Histogram(
+    "shop_ai_session_memory_bytes",
+    "Encoded size of one session's memory after each turn.",
+    buckets=_SESSION_MEMORY_BUCKETS,
+)
+SESSION_MEMORY_RESIDENT_BYTES = Gauge(
+    "shop_ai_session_memory_resident_bytes",
+    "Total encoded bytes held by the in-process session memory store.",
+)
+SESSION_MEMORY_EVICTIONS = Counter(
+    "shop_ai_session_memory_evictions_total",
+    "Session memory entries dropped by reason (ttl, lru).",
+    ["reason"],
+)
+
+TENANT_QUEUE_WAIT = Histogram(
+    "shop_ai_tenant_queue_wait_seconds",
+    "Time a chat request waited for one of its tenant's concurrency slots.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+TENANT_REJECTIONS = Counter(
+    "shop_ai_tenant_rejections_total",
+    "Chat requests shed because the tenant's queue was full or the wait timed out.",
+    ["reason"],
+)
+PUBLIC_REJECTIONS = Counter(
+    "shop_ai_public_rejections_total",
+    "Public endpoint requests answered 429 by rate limit bucket or admission control.",
+    ["scope", "reason"],
+)
+ADMISSION_INFLIGHT = Gauge(
+    "shop_ai_admission_inflight",
+    "Requests currently admitted per public scope.",
+    ["scope"],
+)
+REVIEW_PENDING = Gauge(
+    "shop_ai_review_pending",
+    "Async CrewAI reviews queued or running in this process.",
+)
+REVIEW_SKIPPED = Counter(
+    "shop_ai_review_skipped_total",
+    "Async CrewAI reviews dropped because the pending backlog was full.",
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def status_class(status_code: int | None) -> str:
+    if status_code is None:
+        return "error"
+    return f"{status_code // 100}xx"
+
+
+def observe_upstream(upstream: str, operation: str, started: float, status_code: int | None) -> None:
+    """Record one upstream HTTP attempt started at `started` (time.perf_counter())."""
+    UPSTREAM_DURATION.labels(upstream=upstream, operation=operation, status=status_class(status_code)).observe(
+        time.perf_counter() - started
+    )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,10 +1,13 @@
 import logging
+import time
 import uuid
 from typing import Callable
 
 from fastapi import FastAPI, Request, Response
 
 from app.core.config import get_settings
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.core.tracing import configure_tracing, span
 
 
 logger = logging.getLogger("shop_ai")
@@ -28,12 +31,26 @@ def _configure_sentry() -> None:
 
 def configure_observability(app: FastAPI) -> None:
     _configure_sentry()
+    configure_tracing(get_settings())
 
     @app.middleware("http")
     async def request_id_middleware(request: Request, call_next: Callable) -> Response:
         request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
         request.state.request_id = request_id
-        response = await call_next(request)
+        started = time.perf_counter()
+        status = "500"
+        try:
+            # The request id doubles as trace id so /v1/infra/traces can be looked up from a response header.
+            with span("http.request", trace_id=request_id, method=request.method, path=request.url.path) as root:
+                response = await call_next(request)
+                root.set_attribute("status_code", response.status_code)
+                status = str(response.status_code)
+        finally:
+            # Label by route template, not raw path, to keep series bounded.
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method=request.method, route=route, status=status).observe(
+                time.perf_counter() - started
+            )
         response.headers["X-Request-ID"] = request_id
         return response
 
@@ -0,0 +1,180 @@
+import contextvars
+import functools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, ContextManager, Iterator
+
+from app.core.config import Settings
+
+
+logger = logging.getLogger("shop_ai")
+
+SpanMirror = Callable[[str, dict[str, Any]], ContextManager[Any]]
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    started_at: float
+    duration_ms: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class SpanBuffer:
+    """Bounded in-process store of finished spans, newest last."""
+
+    def __init__(self, maxlen: int = 2000):
+        self._spans: deque[Span] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def resize(self, maxlen: int) -> None:
+        with self._lock:
+            self._spans = deque(self._spans, maxlen=max(1, maxlen))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def spans(self, *, trace_id: str | None = None, name: str | None = None, limit: int | None = None) -> list[Span]:
+        with self._lock:
+            items = list(self._spans)
+        if trace_id:
+            items = [item for item in items if item.trace_id == trace_id]
+        if name:
+            items = [item for item in items if item.name == name]
+        return items[-limit:] if limit else items
+
+
+_BUFFER = SpanBuffer()
+_CURRENT_SPAN: contextvars.ContextVar[Span | None] = contextvars.ContextVar("shop_ai_current_span", default=None)
+_MIRRORS: list[SpanMirror] = []
+
+
+def get_span_buffer() -> SpanBuffer:
+    return _BUFFER
+
+
+def current_span() -> Span | None:
+    return _CURRENT_SPAN.get()
+
+
+@contextmanager
+def span(name: str, *, trace_id: str | None = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Record a timed span nested under the current one (per contextvars, so threads started with
+    copy_context() keep their parent). Exceptions mark the span as error and propagate.
+    """
+    parent = _CURRENT_SPAN.get()
+    item = Span(
+        name=name,
+        trace_id=trace_id or (parent.trace_id if parent else uuid.uuid4().hex),
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        started_at=time.time(),
+        attributes={key: value for key, value in attributes.items() if value is not None},
+    )
+    token = _CURRENT_SPAN.set(item)
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for mirror in list(_MIRRORS):
+            try:
+                stack.enter_context(mirror(name, item.attributes))
+            except Exception:  # pragma: no cover - exporter must never break a request
+                logger.debug("span mirror failed to start", exc_info=True)
+        try:
+            yield item
+        except BaseException as exc:
+            item.status = "error"
+            item.error = exc.__class__.__name__
+            raise
+        finally:
+            item.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _CURRENT_SPAN.reset(token)
+            _BUFFER.add(item)
+
+
+def traced(name: str, **attributes: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def _decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+
+        return _wrapper
+
+    return _decorate
+
+
+def submit_with_context(executor: Any, func: Callable[..., Any], *args: Any, **kwargs: Any):
+    """executor.submit that carries the caller's span context into the worker thread."""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, func, *args, **kwargs)
+
+
+def _otlp_mirror(endpoint: str, service_name: str) -> SpanMirror | None:
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except Exception as exc:
+        logger.warning("OTLP export requested but opentelemetry-sdk is unavailable: %s", exc)
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    tracer = provider.get_tracer("shop_ai")
+
+    def _mirror(name: str, attributes: dict[str, Any]):
+        return tracer.start_as_current_span(name, attributes={key: str(value) for key, value in attributes.items()})
+
+    return _mirror
+
+
+def _sentry_mirror() -> SpanMirror | None:
+    try:
+        import sentry_sdk
+    except Exception:
+        return None
+
+    def _mirror(name: str, attributes: dict[str, Any]):
+        sentry_span = sentry_sdk.start_span(op=name, name=name)
+        for key, value in attributes.items():
+            sentry_span.set_data(key, value)
+        return sentry_span
+
+    return _mirror
+
+
+def configure_tracing(settings: Settings) -> None:
+    _BUFFER.resize(settings.tracing_buffer_size)
+    _MIRRORS.clear()
+    if settings.tracing_otlp_endpoint:
+        mirror = _otlp_mirror(settings.tracing_otlp_endpoint, f"shop-ai-{settings.service_name}")
+        if mirror:
+            _MIRRORS.append(mirror)
+    if settings.tracing_sentry_spans and settings.sentry_dsn:
+        mirror = _sentry_mirror()
+        if mirror:
+            _MIRRORS.append(mirror)
@@ -8,6 +8,7 @@ import bcrypt
 import requests
 
 from app.core.config import get_settings
+from app.core.metrics import observe_upstream
 
 
 class NaverCommerceAPIError(RuntimeError):
@@ -79,17 +80,23 @@ class NaverCommerceClient:
             timestamp_ms=timestamp_ms,
         )
 
-        response = requests.post(
-            f"{self._base_url()}/external/v1/oauth2/token",
-            data={
-                "grant_type": "client_credentials",
-                "client_id": client_id,
-                "timestamp": timestamp_ms,
-                "client_secret_sign": client_secret_sign,
-                "type": "SELF",
-            },
-            timeout=self.settings.request_timeout_seconds,
-        )
+        started = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self._base_url()}/external/v1/oauth2/token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": client_id,
+                    "timestamp": timestamp_ms,
+                    "client_secret_sign": client_secret_sign,
+                    "type": "SELF",
+                },
+                timeout=self.settings.request_timeout_seconds,
+            )
+        except requests.RequestException:
+            observe_upstream("naver", "token", started, None)
+            raise
+        observe_upstream("naver", "token", started, response.status_code)
 
         try:
             payload = response.json()
@@ -124,6 +131,7 @@ class NaverCommerceClient:
         last_error = "unknown"
 
         for attempt in range(1, self.settings.max_retry_attempts + 1):
+            started = time.perf_counter()
             try:
                 response = requests.request(
                     method=method.upper(),
@@ -134,11 +142,13 @@ class NaverCommerceClient:
                     timeout=self.settings.request_timeout_seconds,
                 )
             except requests.RequestException as exc:
+                observe_upstream("naver", method.lower(), started, None)
                 last_error = str(exc)
                 if attempt >= self.settings.max_retry_attempts:
                     break
                 time.sleep(0.5 * (2 ** (attempt - 1)))
                 continue
+            observe_upstream("naver", method.lower(), started, response.status_code)
 
             if response.status_code in self._RETRYABLE_STATUS_CODES:
                 last_error = f"transient status={response.status_code}"
@@ -5,6 +5,7 @@ from typing import Any
 import requests
 
 from app.core.config import get_settings
+from app.core.metrics import observe_upstream
 
 
 @dataclass
@@ -122,17 +123,23 @@ class ShippingClient:
 
     def _request_tracking(self, params: dict[str, str]) -> requests.Response:
         url = self._tracking_url()
-        response = requests.get(
-            url,
-            params=params,
-            timeout=self.settings.request_timeout_seconds,
-        )
-        if response.status_code in {404, 405}:
-            response = requests.post(
+        started = time.perf_counter()
+        try:
+            response = requests.get(
                 url,
-                json=params,
+                params=params,
                 timeout=self.settings.request_timeout_seconds,
             )
+            if response.status_code in {404, 405}:
+                response = requests.post(
+                    url,
+                    json=params,
+                    timeout=self.settings.request_timeout_seconds,
+                )
+        except requests.RequestException:
+            observe_upstream("shipping", "track_delivery", started, None)
+            raise
+        observe_upstream("shipping", "track_delivery", started, response.status_code)
         return response
 
     @staticmethod
@@ -0,0 +1,301 @@
+import argparse
+import contextvars
+import csv
+import hashlib
+import json
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from app.core.config import Settings, get_settings
+from app.core.tracing import submit_with_context
+
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_TENANT_ID = "answer-cache"
+# Set while building: the support flow must answer live, not copy the previous build's entries forward.
+_BYPASS: contextvars.ContextVar[bool] = contextvars.ContextVar("shop_ai_answer_cache_bypass", default=False)
+# A precomputed answer is only valid for the settings it was generated with; a tenant (or a
+# reload) that changes any of these gets a fingerprint mismatch and runs the live flow.
+ANSWER_AFFECTING_FIELDS = (
+    "pinecone_namespace_prefix",
+    "retriever_backend",
+    "llm_primary_provider",
+    "openai_model_classifier",
+    "openai_model_generation",
+    "gemini_model_classifier",
+    "gemini_model_generation",
+    "embedding_provider",
+    "embedding_model",
+    "embedding_model_gemini",
+    "embedding_output_dimensionality",
+    "retriever_k",
+    "reranker",
+    "reranker_top_n",
+    "generation_context_token_budget",
+    "classification_confidence_threshold",
+    "source_score_threshold",
+    "sparse_score_threshold",
+    "faq_direct_answer_enabled",
+    "faq_direct_score_threshold",
+    "faq_direct_sparse_min_words",
+    "default_answer_closing",
+)
+
+
+def normalize_question(text: str) -> str:
+    """Lookup key: case, spacing and trailing punctuation do not change the question."""
+    return "".join(text.lower().split()).rstrip("?!.~")
+
+
+def settings_fingerprint(settings: Settings) -> str:
+    payload = json.dumps({name: getattr(settings, name) for name in ANSWER_AFFECTING_FIELDS}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def answer_cache_path(settings: Settings, version_tag: str) -> Path:
+    # Lives next to the sparse index of the same version and is garbage collected with it.
+    return Path(settings.sparse_index_dir) / f"answers_{version_tag}.json"
+
+
+@dataclass
+class PrecomputedAnswer:
+    question: str
+    answer: str
+    intent: str
+    confidence: float
+    sources: list[dict] = field(default_factory=list)
+    embedding: list[float] | None = None
+
+
+def _norm(vector: list[float]) -> float:
+    return math.sqrt(sum(value * value for value in vector)) or 1.0
+
+
+class AnswerCache:
+    """Final answers for the known FAQ questions of one index version, by normalized text and by embedding."""
+
+    def __init__(self, *, version_tag: str, fingerprint: str, entries: Iterable[PrecomputedAnswer]):
+        self.version_tag = version_tag
+        self.fingerprint = fingerprint
+        self.entries: dict[str, PrecomputedAnswer] = {}
+        for entry in entries:
+            self.entries.setdefault(normalize_question(entry.question), entry)
+        self._vectors = [
+            (entry, entry.embedding, _norm(entry.embedding)) for entry in self.entries.values() if entry.embedding
+        ]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def has_embeddings(self) -> bool:
+        return bool(self._vectors)
+
+    def exact(self, question: str) -> PrecomputedAnswer | None:
+        return self.entries.get(normalize_question(question))
+
+    def nearest(self, vector: list[float], threshold: float) -> tuple[PrecomputedAnswer, float] | None:
+        """Most similar stored question by cosine similarity, if it clears `threshold`."""
+        query_norm = _norm(vector)
+        best: tuple[PrecomputedAnswer, float] | None = None
+        for entry, stored, stored_norm in self._vectors:
+            similarity = sum(a * b for a, b in zip(vector, stored)) / (query_norm * stored_norm)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (entry, similarity)
+        return best
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version_tag": self.version_tag,
+            "fingerprint": self.fingerprint,
+            "built_at": datetime.now(tz=timezone.utc).isoformat(),
+            "entries": [asdict(entry) for entry in self.entries.values()],
+        }
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "AnswerCache":
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            version_tag=str(payload["version_tag"]),
+            fingerprint=str(payload["fingerprint"]),
+            entries=[PrecomputedAnswer(**item) for item in payload.get("entries") or []],
+        )
+
+
+class AnswerCacheLoader:
+    """
+    Holds the answer cache of the active version; a promote or rollback loads the other file.
+    The file is stat'ed on every lookup, so a cache built (or rebuilt) after the first miss is picked up.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: tuple[str, str, tuple[int, int] | None] | None = None
+        self._cache: AnswerCache | None = None
+
+    def get(self, settings: Settings, version_tag: str | None) -> AnswerCache | None:
+        if not version_tag:
+            return None
+        path = answer_cache_path(settings, version_tag)
+        try:
+            stat = path.stat()
+            file_id: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            file_id = None
+        key = (str(path), version_tag, file_id)
+        if key == self._key:
+            return self._cache
+        with self._lock:
+            if key != self._key:
+                try:
+                    self._cache = AnswerCache.load(path) if file_id is not None else None
+                except (OSError, ValueError, KeyError, TypeError) as exc:
+                    logger.warning("ignoring unreadable answer cache %s: %s", path, exc)
+                    self._cache = None
+                self._key = key
+        return self._cache
+
+
+_LOADER = AnswerCacheLoader()
+
+
+@contextmanager
+def answer_cache_bypassed() -> Iterator[None]:
+    token = _BYPASS.set(True)
+    try:
+        yield
+    finally:
+        _BYPASS.reset(token)
+
+
+def lookup_precomputed_answer(settings: Settings, question: str, service) -> tuple[PrecomputedAnswer, str] | None:
+    """
+    Return (entry, "exact" | "semantic") from the answer cache of `service`'s active version,
+    or None to run the live flow.
+    """
+    if not settings.answer_cache_enabled or _BYPASS.get():
+        return None
+    cache = _LOADER.get(settings, service.active_version())
+    if cache is None or cache.fingerprint != settings_fingerprint(settings):
+        return None
+    entry = cache.exact(question)
+    if entry is not None:
+        return entry, "exact"
+    threshold = settings.answer_cache_similarity_threshold
+    if threshold <= 0 or not cache.has_embeddings:
+        return None
+    vector = service.embed_query(question)
+    match = cache.nearest(vector, threshold) if vector else None
+    return (match[0], "semantic") if match else None
+
+
+def faq_questions(data_root: Path) -> list[str]:
+    """Seed questions from faq/qa.csv followed by their paraphrases, deduplicated by lookup key."""
+    questions: dict[str, str] = {}
+    for name in ("qa.csv", "qa_paraphrases.csv"):
+        path = data_root / "faq" / name
+        if not path.exists():
+            continue
+        with path.open(encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                question = (row.get("question") or "").strip()
+                if question:
+                    questions.setdefault(normalize_question(question), question)
+    return list(questions.values())
+
+
+def _default_answerer(question: str) -> dict:
+    from app.agents.langgraph.support_graph import run_support_flow
+
+    # No session: the stored answer must not depend on anyone's conversation history.
+    return run_support_flow(tenant_id=PRECOMPUTE_TENANT_ID, session_id="", user_message=question)
+
+
+def _is_cacheable(state: dict) -> bool:
+    return (
+        # Tracking answers are live shipment lookups; only retrieval answers are stored.
+        state.get("route") == "rag"
+        and not state.get("needs_human", False)
+        and bool(state.get("sources"))
+        and not state.get("why_fallback")
+    )
+
+
+def build_answer_cache(
+    settings: Settings,
+    data_root: Path,
+    version_tag: str,
+    *,
+    answerer: Callable[[str], dict] | None = None,
+    embed: Callable[[str], list[float] | None] | None = None,
+) -> AnswerCache:
+    """
+    Run the full support flow for every FAQ seed and paraphrase against `version_tag` (which does not
+    have to be promoted yet) and keep the answers that are safe to serve to any session.
+    """
+    from app.rag.retriever import get_rag_service, pinned_index_version
+
+    answerer = answerer or _default_answerer
+    if embed is None:
+        embed = get_rag_service().embed_query
+    questions = faq_questions(data_root)
+
+    def _precompute(question: str) -> PrecomputedAnswer | None:
+        try:
+            state = answerer(question)
+        except Exception as exc:
+            logger.warning("answer precompute failed for %r: %s", question, exc)
+            return None
+        if not _is_cacheable(state):
+            return None
+        return PrecomputedAnswer(
+            question=question,
+            answer=str(state.get("answer", "")),
+            intent=str(state["intent"]),
+            confidence=float(state.get("confidence", 0.0)),
+            sources=list(state.get("sources") or []),
+            embedding=embed(question),
+        )
+
+    with pinned_index_version(version_tag), answer_cache_bypassed():
+        with ThreadPoolExecutor(
+            max_workers=max(1, settings.answer_cache_build_workers),
+            thread_name_prefix="answer-cache",
+        ) as executor:
+            futures = [submit_with_context(executor, _precompute, question) for question in questions]
+            entries = [entry for entry in (future.result() for future in futures) if entry is not None]
+
+    logger.info("answer cache built version=%s questions=%d cached=%d", version_tag, len(questions), len(entries))
+    return AnswerCache(version_tag=version_tag, fingerprint=settings_fingerprint(settings), entries=entries)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Precompute support-flow answers for the gold FAQ questions.")
+    parser.add_argument("--data-root", default="data/gold", help="Root directory containing faq/.")
+    parser.add_argument("--version-tag", required=True, help="Index version to answer from (need not be active).")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    settings = get_settings()
+    cache = build_answer_cache(settings, Path(args.data_root), args.version_tag)
+    path = answer_cache_path(settings, args.version_tag)
+    cache.save(path)
+    print(f"Answer cache written. path={path} entries={len(cache)}")
+
+
+if __name__ == "__main__":
+    main()
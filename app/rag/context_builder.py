@@ -0,0 +1,112 @@
+import math
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from langchain_core.documents import Document
+
+
+MIN_OVERLAP_CHARS = 20
+
+
+class _Scored(Protocol):
+    document: Document
+    score: float
+
+
+@dataclass
+class BuiltContext:
+    text: str
+    token_count: int
+    docs: list = field(default_factory=list)
+    dropped: int = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Provider-agnostic token estimate without a tokenizer download.
+    Hangul syllables cost roughly one token each on current GPT/Gemini tokenizers,
+    other text roughly four characters per token.
+    """
+    if not text:
+        return 0
+    hangul = sum(1 for char in text if "가" <= char <= "힣")
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def _trim_overlap(kept: str, candidate: str) -> str:
+    """Drop the span of `candidate` that a splitter overlap already sent as part of `kept`."""
+    if candidate in kept:
+        return ""
+    head = candidate[:MIN_OVERLAP_CHARS]
+    start = kept.find(head)
+    while start >= 0:
+        tail = kept[start:]
+        if candidate.startswith(tail):
+            return candidate[len(tail) :]
+        start = kept.find(head, start + 1)
+
+    # Lower-scored chunk may precede the kept one in the source document.
+    head = kept[:MIN_OVERLAP_CHARS]
+    start = candidate.find(head)
+    while start >= 0:
+        tail = candidate[start:]
+        if kept.startswith(tail):
+            return candidate[:start]
+        start = candidate.find(head, start + 1)
+    return candidate
+
+
+def _truncate_to_budget(text: str, budget_tokens: int) -> str:
+    if budget_tokens <= 0:
+        return ""
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def build_context(items: list[_Scored], *, budget_tokens: int) -> BuiltContext:
+    """
+    Assemble generation context by descending score, removing text already sent through
+    an adjacent chunk of the same section and stopping at the token budget.
+    """
+    ordered = sorted(items, key=lambda item: item.score, reverse=True)
+    kept_by_section: dict[str, list[str]] = {}
+    parts: list[str] = []
+    used: list = []
+    total = 0
+    dropped = 0
+
+    for item in ordered:
+        metadata = item.document.metadata
+        section = f"{metadata.get('source_file', '')}|{metadata.get('section_path', '')}"
+        text = item.document.page_content
+        for kept in kept_by_section.get(section, []):
+            text = _trim_overlap(kept, text)
+        text = text.strip()
+        if not text:
+            dropped += 1
+            continue
+
+        label = f"[source={len(parts) + 1} score={item.score:.3f}] "
+        part = f"{label}{text}"
+        tokens = estimate_tokens(part)
+        if total + tokens > budget_tokens:
+            if parts:
+                dropped += 1
+                continue
+            # Always keep the best chunk, trimmed to fit.
+            part = _truncate_to_budget(part, budget_tokens)
+            tokens = estimate_tokens(part)
+
+        parts.append(part)
+        used.append(item)
+        kept_by_section.setdefault(section, []).append(item.document.page_content)
+        total += tokens
+
+    text = "\n\n".join(parts)
+    return BuiltContext(text=text, token_count=estimate_tokens(text), docs=used, dropped=dropped)
@@ -0,0 +1,279 @@
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from app.core.config import Settings, get_settings
+from app.rag.index_versions import FileIndexVersionStore, promote_version
+from app.rag.ingest import _chunk_documents, collect_gold_documents, load_qa_csv, load_qa_paraphrases_csv
+from app.rag.reranker import Reranker, get_reranker, rerank
+from app.rag.retriever import RAGService, ScoredDocument
+from app.rag.sparse_index import SparseIndex, sparse_index_path
+
+
+EVAL_VERSION_TAG = "eval"
+
+
+@dataclass
+class EvalQuery:
+    question: str
+    paraphrase_rank: int
+    relevant_hashes: frozenset[str]
+
+
+@dataclass
+class EvalResult:
+    backend: str
+    reranker: str
+    k: int
+    queries: int
+    recall_at_k: float
+    mrr: float
+    recall_above_threshold: float
+    retrieve_p50_ms: float
+    retrieve_p95_ms: float
+    rerank_p50_ms: float
+    rerank_p95_ms: float
+
+
+def load_eval_queries(data_root: Path, ranks: list[int] | None = None, limit: int | None = None) -> list[EvalQuery]:
+    """
+    Paraphrases become queries and the seed question they were generated from is the relevant hit.
+    Seeds with the identical curated answer (near-duplicate FAQ rows) count as relevant too.
+    """
+    docs = load_qa_csv(data_root / "faq" / "qa.csv", version_tag=EVAL_VERSION_TAG)
+    paraphrases = load_qa_paraphrases_csv(data_root / "faq" / "qa_paraphrases.csv", version_tag=EVAL_VERSION_TAG)
+    hashes_by_answer: dict[str, set[str]] = {}
+    for doc in docs + paraphrases:
+        answer = doc.page_content.partition("\nA:")[2].strip()
+        hashes_by_answer.setdefault(answer, set()).add(str(doc.metadata["seed_question_hash"]))
+
+    queries: list[EvalQuery] = []
+    for doc in paraphrases:
+        rank = int(doc.metadata.get("paraphrase_rank") or 0)
+        if not doc.metadata.get("is_paraphrase") or rank <= 0 or (ranks and rank not in ranks):
+            continue
+        question, _, answer = doc.page_content.partition("\nA:")
+        relevant = {str(doc.metadata["seed_question_hash"])} | hashes_by_answer.get(answer.strip(), set())
+        queries.append(EvalQuery(question.removeprefix("Q:").strip(), rank, frozenset(relevant)))
+    return queries[:limit] if limit else queries
+
+
+def holdout_filter(paraphrase_rank: int) -> dict:
+    """
+    Hide the query's own paraphrase rank from the index so a query can't match itself verbatim.
+    Expressed as a metadata filter so the same holdout works on Pinecone and the sparse index.
+    """
+    return {"$or": [{"doc_type": {"$ne": "faq"}}, {"paraphrase_rank": {"$ne": paraphrase_rank}}]}
+
+
+def first_hit_rank(items: list[ScoredDocument], relevant_hashes: frozenset[str]) -> int | None:
+    for position, item in enumerate(items, start=1):
+        if item.document.metadata.get("seed_question_hash") in relevant_hashes:
+            return position
+    return None
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)], 2)
+
+
+def build_local_service(settings: Settings, data_root: Path, workdir: Path) -> RAGService:
+    """Sparse-only RAGService over the gold data at `data_root`, chunked the same way ingest does."""
+    local_settings = settings.model_copy(
+        update={
+            "retriever_backend": "local",
+            "sparse_index_dir": str(workdir),
+            "index_version_store": "file",
+            "index_version_pointer_path": str(workdir / "active_version.json"),
+        }
+    )
+    documents = _chunk_documents(collect_gold_documents(data_root, version_tag=EVAL_VERSION_TAG))
+    SparseIndex(documents).save(sparse_index_path(local_settings, EVAL_VERSION_TAG))
+    promote_version(FileIndexVersionStore(Path(local_settings.index_version_pointer_path)), EVAL_VERSION_TAG)
+    return RAGService(local_settings)
+
+
+def _rerankers(settings: Settings, names: list[str]) -> dict[str, Reranker | None]:
+    rerankers: dict[str, Reranker | None] = {}
+    for name in names:
+        reranker = get_reranker(settings.model_copy(update={"reranker": name}))
+        # get_reranker falls back to lexical when ONNX is unavailable; report what actually ran.
+        rerankers.setdefault(reranker.name if reranker else "none", reranker)
+    return rerankers
+
+
+def evaluate_service(
+    service: RAGService,
+    queries: list[EvalQuery],
+    *,
+    backend: str,
+    k: int,
+    rerankers: dict[str, Reranker | None],
+    score_threshold: float,
+) -> list[EvalResult]:
+    """Retrieve once per query, then score the ranking as-is and after each reranker."""
+    settings = service.settings
+    hits: dict[str, list[int | None]] = {name: [] for name in rerankers}
+    above_threshold: dict[str, int] = {name: 0 for name in rerankers}
+    retrieve_ms: list[float] = []
+    rerank_ms: dict[str, list[float]] = {name: [] for name in rerankers}
+
+    if queries:
+        # Load the version pointer and sparse index before timing.
+        service.retrieve(question=queries[0].question, k=k)
+    for query in queries:
+        started = time.perf_counter()
+        retrieved = service.retrieve(
+            question=query.question,
+            k=k,
+            metadata_filter=holdout_filter(query.paraphrase_rank),
+        )
+        retrieve_ms.append((time.perf_counter() - started) * 1000)
+
+        for name, reranker in rerankers.items():
+            ranked = retrieved
+            if reranker is not None:
+                started = time.perf_counter()
+                ranked = rerank(
+                    query.question,
+                    retrieved,
+                    reranker=reranker,
+                    top_n=k,
+                    batch_size=settings.reranker_batch_size,
+                    budget_ms=settings.reranker_latency_budget_ms,
+                )
+                rerank_ms[name].append((time.perf_counter() - started) * 1000)
+            position = first_hit_rank(ranked[:k], query.relevant_hashes)
+            hits[name].append(position)
+            if position is not None and ranked[position - 1].score >= score_threshold:
+                above_threshold[name] += 1
+
+    total = max(1, len(queries))
+    return [
+        EvalResult(
+            backend=backend,
+            reranker=name,
+            k=k,
+            queries=len(queries),
+            recall_at_k=round(sum(1 for hit in hits[name] if hit is not None) / total, 4),
+            mrr=round(sum(1 / hit for hit in hits[name] if hit is not None) / total, 4),
+            recall_above_threshold=round(above_threshold[name] / total, 4),
+            retrieve_p50_ms=_percentile(retrieve_ms, 50),
+            retrieve_p95_ms=_percentile(retrieve_ms, 95),
+            rerank_p50_ms=_percentile(rerank_ms[name], 50),
+            rerank_p95_ms=_percentile(rerank_ms[name], 95),
+        )
+        for name in rerankers
+    ]
+
+
+def run_evaluation(
+    settings: Settings,
+    *,
+    data_root: Path,
+    backends: list[str],
+    rerankers: list[str],
+    ks: list[int],
+    ranks: list[int] | None = None,
+    limit: int | None = None,
+    score_threshold: float | None = None,
+) -> list[EvalResult]:
+    queries = load_eval_queries(data_root, ranks=ranks, limit=limit)
+    threshold = settings.source_score_threshold if score_threshold is None else score_threshold
+    reranker_map = _rerankers(settings, rerankers)
+    results: list[EvalResult] = []
+    with tempfile.TemporaryDirectory(prefix="shop-ai-eval-") as workdir:
+        for backend in backends:
+            if backend == "local":
+                service = build_local_service(settings, data_root, Path(workdir))
+            else:
+                # pinecone/hybrid evaluate the live index and its promoted version.
+                service = RAGService(settings.model_copy(update={"retriever_backend": backend}))
+            for k in ks:
+                results.extend(
+                    evaluate_service(
+                        service,
+                        queries,
+                        backend=backend,
+                        k=k,
+                        rerankers=reranker_map,
+                        score_threshold=threshold,
+                    )
+                )
+    return results
+
+
+def _int_list(raw: str) -> list[int]:
+    return [int(item) for item in raw.split(",") if item.strip()]
+
+
+def _str_list(raw: str) -> list[str]:
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Evaluate retrieval quality (recall@k, MRR) and latency with held-out FAQ paraphrases."
+    )
+    parser.add_argument("--data-root", default="data/gold", help="Gold data root (faq/, policies/, products/).")
+    parser.add_argument(
+        "--backends",
+        default="local",
+        help="Comma-separated: local (sparse index built from --data-root), pinecone, hybrid (live index).",
+    )
+    parser.add_argument("--rerankers", default="none,lexical", help="Comma-separated: none, lexical, onnx.")
+    parser.add_argument("--k", default="1,3,4,5,10", help="Comma-separated retriever_k values.")
+    parser.add_argument("--ranks", default="", help="Paraphrase ranks to hold out as queries (default: all).")
+    parser.add_argument("--limit", type=int, default=0, help="Evaluate at most N queries.")
+    parser.add_argument(
+        "--score-threshold",
+        type=float,
+        default=None,
+        help="Score a hit must reach to count in recall_above_threshold (default: SOURCE_SCORE_THRESHOLD).",
+    )
+    parser.add_argument("--json", type=Path, help="Also write results as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    data_root = Path(args.data_root)
+    if not data_root.exists():
+        raise FileNotFoundError(f"Data root not found: {data_root}")
+
+    results = run_evaluation(
+        get_settings(),
+        data_root=data_root,
+        backends=_str_list(args.backends),
+        rerankers=_str_list(args.rerankers),
+        ks=_int_list(args.k),
+        ranks=_int_list(args.ranks) or None,
+        limit=args.limit or None,
+        score_threshold=args.score_threshold,
+    )
+    print(
+        f"{'backend':<10}{'reranker':<10}{'k':>4}{'queries':>9}{'recall@k':>10}{'mrr':>8}"
+        f"{'recall>=th':>12}{'ret_p50':>9}{'ret_p95':>9}{'rr_p95':>8}"
+    )
+    for item in results:
+        print(
+            f"{item.backend:<10}{item.reranker:<10}{item.k:>4}{item.queries:>9}{item.recall_at_k:>10.3f}"
+            f"{item.mrr:>8.3f}{item.recall_above_threshold:>12.3f}{item.retrieve_p50_ms:>9.1f}"
+            f"{item.retrieve_p95_ms:>9.1f}{item.rerank_p95_ms:>8.1f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps([asdict(item) for item in results], ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Evaluation written. path={args.json}")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    main()
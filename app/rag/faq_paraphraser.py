@@ -1,15 +1,23 @@
 import argparse
 import hashlib
 import json
+import logging
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import pandas as pd
 from langchain_core.prompts import ChatPromptTemplate
 
-from app.core.config import get_settings
-from app.services.llm_provider import invoke_with_fallback
+from app.core.config import Settings, get_settings
+from app.services.llm_provider import cached_chain, invoke_with_fallback
+from app.services.rate_limit import InMemoryBucketStore
+
+
+logger = logging.getLogger(__name__)
 
 
 SYSTEM_PROMPT = """당신은 이커머스 전문 CS 상담원입니다.
@@ -24,6 +32,18 @@ SYSTEM_PROMPT = """당신은 이커머스 전문 CS 상담원입니다.
 - 숫자(예: 7일, 50,000원, 6,000원, 12개월)는 의미를 유지
 """
 
+PARAPHRASE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            "원본 질문: {seed_question}\n"
+            "반드시 paraphrases 배열 길이를 {count}로 맞춰 주세요.\n"
+            "JSON 객체로만 응답하세요.",
+        ),
+    ]
+)
+
 REQUIRED_COLUMNS = {"question", "answer", "category", "priority", "last_updated"}
 CACHE_COLUMNS = [
     "question",
@@ -103,20 +123,10 @@ def _generate_raw_paraphrases(
     count: int,
 ) -> str:
     settings = get_settings()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            (
-                "human",
-                "원본 질문: {seed_question}\n"
-                "반드시 paraphrases 배열 길이를 {count}로 맞춰 주세요.\n"
-                "JSON 객체로만 응답하세요.",
-            ),
-        ]
-    )
 
     def _invoke(llm, _provider):
-        result = (prompt | llm).invoke({"seed_question": seed_question, "count": count})
+        chain = cached_chain("faq_paraphraser", llm, lambda model: PARAPHRASE_PROMPT | model)
+        result = chain.invoke({"seed_question": seed_question, "count": count})
         return str(result.content or "")
 
     return invoke_with_fallback(
@@ -130,11 +140,14 @@ def generate_paraphrases(
     *,
     seed_question: str,
     count: int = 5,
+    throttle: Callable[[], Any] | None = None,
 ) -> list[str]:
     attempts = 0
     accepted: list[str] = []
     while attempts < 2:
         attempts += 1
+        if throttle is not None:
+            throttle()
         content = _generate_raw_paraphrases(seed_question=seed_question, count=count)
         candidates = parse_paraphrases_from_json(content)
         accepted = deduplicate_paraphrases(seed_question, candidates, count=count)
@@ -149,6 +162,10 @@ def _validate_input_frame(frame: pd.DataFrame) -> None:
         raise ValueError(f"qa.csv missing required columns: {', '.join(sorted(missing))}")
 
 
+def checkpoint_path(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.checkpoint.jsonl")
+
+
 def _load_cache(output_path: Path) -> dict[str, list[dict[str, Any]]]:
     if not output_path.exists():
         return {}
@@ -165,55 +182,153 @@ def _load_cache(output_path: Path) -> dict[str, list[dict[str, Any]]]:
     return grouped
 
 
+def _load_checkpoint(path: Path) -> dict[str, list[dict[str, Any]]]:
+    """
+    Seeds finished by an earlier run, one JSON line per seed. A crash mid-append leaves a partial
+    last line; it is cut off here so that seed is regenerated and later appends start on a clean line.
+    """
+    if not path.exists():
+        return {}
+    raw = path.read_bytes()
+    complete_end = raw.rfind(b"\n") + 1
+    if complete_end < len(raw):
+        with path.open("r+b") as handle:
+            handle.truncate(complete_end)
+    completed: dict[str, list[dict[str, Any]]] = {}
+    for line in raw[:complete_end].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+            completed[str(record["seed_question_hash"])] = list(record["rows"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("ignoring unreadable paraphrase checkpoint line in %s", path)
+    return completed
+
+
+class _CheckpointWriter:
+    """Appends each finished seed as one JSON line so an interrupted run resumes from it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, question_hash: str, rows: list[dict[str, Any]]) -> None:
+        line = json.dumps({"seed_question_hash": question_hash, "rows": rows}, ensure_ascii=False) + "\n"
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+
+def _provider_throttle(settings: Settings, requests_per_minute: int, burst: int) -> Callable[[], float] | None:
+    """Token bucket shared by all workers so the pool stays under the provider's per-minute quota."""
+    if requests_per_minute <= 0:
+        return None
+    bucket = InMemoryBucketStore(max_keys=1)
+    rate = requests_per_minute / 60.0
+    capacity = max(1, min(burst, requests_per_minute))
+    return lambda: bucket.acquire(settings.llm_primary_provider, rate=rate, capacity=capacity)
+
+
 def build_paraphrase_cache(
     *,
     input_path: Path,
     output_path: Path,
     per_question: int = 5,
     refresh: bool = False,
+    workers: int | None = None,
+    requests_per_minute: int | None = None,
 ) -> int:
+    """
+    Generate paraphrases for every seed in `input_path` on a bounded worker pool.
+    Each finished seed is appended to a checkpoint next to `output_path`; a rerun skips seeds
+    already in the checkpoint (or, without `refresh`, in the existing output). The output is
+    replaced atomically once every seed is done, and the checkpoint is removed.
+    """
     settings = get_settings()
     if not settings.gemini_api_key and not settings.openai_api_key:
         raise ValueError("At least one LLM key is required (GEMINI_API_KEY or OPENAI_API_KEY).")
+    workers = max(1, workers if workers is not None else settings.paraphrase_workers)
+    if requests_per_minute is None:
+        requests_per_minute = settings.paraphrase_requests_per_minute
 
     frame = pd.read_csv(input_path)
     _validate_input_frame(frame)
+    checkpoint = checkpoint_path(output_path)
+    completed = {
+        seed: rows for seed, rows in _load_checkpoint(checkpoint).items() if len(rows) >= per_question
+    }
     existing = _load_cache(output_path) if not refresh else {}
-    rows: list[dict[str, Any]] = []
 
+    order: list[str] = []
+    pending: dict[str, tuple[str, Any]] = {}
     for _, row in frame.iterrows():
         question = str(row["question"]).strip()
         if not question:
             continue
         question_hash = seed_hash(question)
-        cached_rows = existing.get(question_hash, [])
-        if not refresh and len(cached_rows) >= per_question:
-            sorted_cached = sorted(cached_rows, key=lambda item: int(item.get("paraphrase_rank", 999)))
-            rows.extend(sorted_cached[:per_question])
+        order.append(question_hash)
+        if question_hash in completed or question_hash in pending:
             continue
-
-        generated = generate_paraphrases(
-            seed_question=question,
-            count=per_question,
+        if len(existing.get(question_hash, [])) >= per_question:
+            completed[question_hash] = existing[question_hash]
+            continue
+        pending[question_hash] = (question, row)
+
+    throttle = _provider_throttle(settings, requests_per_minute, burst=workers)
+    writer = _CheckpointWriter(checkpoint)
+
+    def _generate(question_hash: str, question: str, row: Any) -> list[dict[str, Any]]:
+        generated = generate_paraphrases(seed_question=question, count=per_question, throttle=throttle)
+        rows = [
+            {
+                "question": paraphrase,
+                "answer": str(row["answer"]).strip(),
+                "category": str(row["category"]).strip(),
+                "priority": str(row["priority"]).strip(),
+                "last_updated": str(row["last_updated"]).strip(),
+                "seed_question": question,
+                "seed_question_hash": question_hash,
+                "paraphrase_rank": rank,
+                "is_paraphrase": True,
+                "generation_model": f"{settings.llm_primary_provider}-paraphraser",
+            }
+            for rank, paraphrase in enumerate(generated, start=1)
+        ]
+        writer.append(question_hash, rows)
+        return rows
+
+    failures: dict[str, str] = {}
+    if pending:
+        logger.info("generating paraphrases seeds=%d skipped=%d workers=%d", len(pending), len(completed), workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="paraphraser") as executor:
+            futures = {
+                executor.submit(_generate, question_hash, question, row): question_hash
+                for question_hash, (question, row) in pending.items()
+            }
+            for future in as_completed(futures):
+                question_hash = futures[future]
+                try:
+                    completed[question_hash] = future.result()
+                except Exception as exc:
+                    failures[pending[question_hash][0]] = str(exc)
+                    logger.warning("paraphrase generation failed for %r: %s", pending[question_hash][0], exc)
+                else:
+                    logger.info("paraphrases done %d/%d", len(completed), len(set(order)))
+    if failures:
+        raise RuntimeError(
+            f"Failed to generate paraphrases for {len(failures)} seed(s); finished seeds are kept in "
+            f"{checkpoint} and are skipped on rerun: {sorted(failures)}"
         )
-        for rank, paraphrase in enumerate(generated, start=1):
-            rows.append(
-                {
-                    "question": paraphrase,
-                    "answer": str(row["answer"]).strip(),
-                    "category": str(row["category"]).strip(),
-                    "priority": str(row["priority"]).strip(),
-                    "last_updated": str(row["last_updated"]).strip(),
-                    "seed_question": question,
-                    "seed_question_hash": question_hash,
-                    "paraphrase_rank": rank,
-                    "is_paraphrase": True,
-                    "generation_model": f"{settings.llm_primary_provider}-paraphraser",
-                }
-            )
 
+    rows: list[dict[str, Any]] = []
+    for question_hash in dict.fromkeys(order):
+        rows.extend(completed[question_hash][:per_question])
     out = pd.DataFrame(rows, columns=CACHE_COLUMNS)
-    out.to_csv(output_path, index=False)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    out.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    checkpoint.unlink(missing_ok=True)
     return len(out)
 
 
@@ -223,6 +338,13 @@ def _build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--output", default="data/gold/faq/qa_paraphrases.csv", help="Paraphrase cache CSV path.")
     parser.add_argument("--per-question", type=int, default=5, help="Number of paraphrases per seed question.")
     parser.add_argument("--refresh", action="store_true", help="Regenerate cache even when output already exists.")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent seeds (default PARAPHRASE_WORKERS).")
+    parser.add_argument(
+        "--requests-per-minute",
+        type=int,
+        default=None,
+        help="LLM call cap shared by all workers, 0 = unlimited (default PARAPHRASE_REQUESTS_PER_MINUTE).",
+    )
     return parser
 
 
@@ -241,6 +363,8 @@ def main() -> None:
         output_path=output_path,
         per_question=args.per_question,
         refresh=args.refresh,
+        workers=args.workers,
+        requests_per_minute=args.requests_per_minute,
     )
     print(f"Paraphrase cache ready. rows={generated_count} path={output_path}")
 
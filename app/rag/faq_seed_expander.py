@@ -8,7 +8,7 @@ import pandas as pd
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.core.config import get_settings
-from app.services.llm_provider import invoke_with_fallback
+from app.services.llm_provider import cached_chain, invoke_with_fallback
 
 
 REQUIRED_COLUMNS = ["question", "answer", "category", "priority", "last_updated"]
@@ -26,6 +26,19 @@ SYSTEM_PROMPT = """당신은 한국 이커머스 CS FAQ 데이터셋 작성자
 5) JSON만 출력: {"questions":["...","..."]}
 """
 
+SEED_EXPANSION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            "seed question: {seed_question}\n"
+            "seed answer: {seed_answer}\n"
+            "필요 개수: {count}\n"
+            "JSON으로만 응답하세요.",
+        ),
+    ]
+)
+
 
 def normalize_question(text: str) -> str:
     return re.sub(r"\s+", " ", text.strip().lower())
@@ -87,21 +100,10 @@ def synthetic_question(seed_question: str, serial: int) -> str:
 
 def generate_questions_for_seed(seed_question: str, seed_answer: str, count: int = 6) -> list[str]:
     settings = get_settings()
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT),
-            (
-                "human",
-                "seed question: {seed_question}\n"
-                "seed answer: {seed_answer}\n"
-                "필요 개수: {count}\n"
-                "JSON으로만 응답하세요.",
-            ),
-        ]
-    )
 
     def _invoke(llm, _provider):
-        result = (prompt | llm).invoke(
+        chain = cached_chain("faq_seed_expander", llm, lambda model: SEED_EXPANSION_PROMPT | model)
+        result = chain.invoke(
             {"seed_question": seed_question, "seed_answer": seed_answer, "count": count}
         )
         return str(result.content or "")
@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Protocol
+
+from app.core.config import Settings, get_settings
+from app.rag.answer_cache import answer_cache_path
+from app.rag.sparse_index import sparse_index_path
+
+
+_POINTER_WRITE_LOCK = threading.Lock()
+
+
+@dataclass
+class IndexVersionPointer:
+    active: str | None = None
+    # Promoted versions still available for rollback, newest first.
+    history: list[str] = field(default_factory=list)
+    # Versions trimmed from history: their namespaces and files are garbage and may already be gone.
+    retired: list[str] = field(default_factory=list)
+    updated_at: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "active": self.active,
+            "history": list(self.history),
+            "retired": list(self.retired),
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any] | None) -> "IndexVersionPointer":
+        if not payload:
+            return cls()
+        active = str(payload.get("active") or "").strip() or None
+        history = [str(item).strip() for item in payload.get("history") or [] if str(item).strip()]
+        retired = [str(item).strip() for item in payload.get("retired") or [] if str(item).strip()]
+        return cls(active=active, history=history, retired=retired, updated_at=str(payload.get("updated_at") or ""))
+
+
+class IndexVersionStore(Protocol):
+    def read(self) -> IndexVersionPointer: ...
+
+    def write(self, pointer: IndexVersionPointer) -> None: ...
+
+
+class FileIndexVersionStore:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def read(self) -> IndexVersionPointer:
+        if not self.path.exists():
+            return IndexVersionPointer()
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return IndexVersionPointer()
+        return IndexVersionPointer.from_dict(payload if isinstance(payload, dict) else None)
+
+    def write(self, pointer: IndexVersionPointer) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(pointer.to_dict(), ensure_ascii=False), encoding="utf-8")
+        # os.replace is atomic on POSIX/NTFS: readers see either the old or the new pointer.
+        os.replace(tmp_path, self.path)
+
+
+class SupabaseIndexVersionStore:
+    def __init__(self, repo, tenant_id: str = "default"):
+        self.repo = repo
+        self.tenant_id = tenant_id
+
+    def read(self) -> IndexVersionPointer:
+        return IndexVersionPointer.from_dict(self.repo.get_index_version_pointer(self.tenant_id))
+
+    def write(self, pointer: IndexVersionPointer) -> None:
+        self.repo.save_index_version_pointer(
+            tenant_id=self.tenant_id,
+            active_version=pointer.active,
+            history=pointer.history,
+            retired=pointer.retired,
+        )
+
+
+def build_version_store(settings: Settings) -> IndexVersionStore:
+    if settings.index_version_store == "supabase":
+        from app.repositories.supabase_repo import get_supabase_repo
+
+        return SupabaseIndexVersionStore(get_supabase_repo())
+    return FileIndexVersionStore(Path(settings.index_version_pointer_path))
+
+
+def namespace_for_version(settings: Settings, version_tag: str | None) -> str | None:
+    if not version_tag:
+        return None
+    return f"{settings.pinecone_namespace_prefix}{version_tag}"
+
+
+def promote_version(store: IndexVersionStore, version_tag: str, keep: int | None = None) -> IndexVersionPointer:
+    """
+    Make `version_tag` active. With `keep`, history is trimmed to that many versions and the rest
+    move to `retired`, so a later rollback can never land on a version GC has deleted.
+    """
+    version_tag = version_tag.strip()
+    if not version_tag:
+        raise ValueError("version_tag is required for promotion.")
+    with _POINTER_WRITE_LOCK:
+        current = store.read()
+        if version_tag in current.retired:
+            raise ValueError(f"version_tag {version_tag!r} is retired; re-ingest it before promoting.")
+        history = [version_tag] + [item for item in current.history if item != version_tag]
+        retired = list(current.retired)
+        if keep is not None:
+            history, trimmed = history[: max(1, keep)], history[max(1, keep) :]
+            retired.extend(tag for tag in trimmed if tag not in retired)
+        pointer = IndexVersionPointer(
+            active=version_tag,
+            history=history,
+            retired=retired,
+            updated_at=datetime.now(tz=timezone.utc).isoformat(),
+        )
+        store.write(pointer)
+    return pointer
+
+
+def rollback_version(store: IndexVersionStore) -> IndexVersionPointer:
+    with _POINTER_WRITE_LOCK:
+        current = store.read()
+        history = [tag for tag in current.history[1:] if tag not in current.retired]
+        if not history:
+            raise ValueError("No retained index version to roll back to.")
+        pointer = IndexVersionPointer(
+            active=history[0],
+            history=history,
+            retired=list(current.retired),
+            updated_at=datetime.now(tz=timezone.utc).isoformat(),
+        )
+        store.write(pointer)
+    return pointer
+
+
+def unretire_version(store: IndexVersionStore, version_tag: str) -> bool:
+    """Take a tag being re-ingested off the retired list so GC stops targeting its new namespace."""
+    with _POINTER_WRITE_LOCK:
+        current = store.read()
+        if version_tag not in current.retired:
+            return False
+        current.retired = [tag for tag in current.retired if tag != version_tag]
+        current.updated_at = datetime.now(tz=timezone.utc).isoformat()
+        store.write(current)
+    return True
+
+
+def list_namespaces(index) -> list[str]:
+    stats = index.describe_index_stats()
+    namespaces = stats.get("namespaces") if isinstance(stats, dict) else getattr(stats, "namespaces", None)
+    return sorted((namespaces or {}).keys())
+
+
+def retired_versions(settings: Settings, pointer: IndexVersionPointer) -> list[str]:
+    """Versions trimmed from the rollback window; never the active one."""
+    return [tag for tag in pointer.retired if tag != pointer.active and tag not in pointer.history]
+
+
+def collect_garbage(*, index, settings: Settings, pointer: IndexVersionPointer) -> list[str]:
+    """
+    Delete namespaces and local files of retired versions only. Versions that were never promoted
+    (staged with --no-promote, or still being written by another ingest) are left alone.
+    """
+    existing = set(list_namespaces(index))
+    deleted: list[str] = []
+    for version_tag in retired_versions(settings, pointer):
+        namespace = namespace_for_version(settings, version_tag)
+        if namespace in existing:
+            index.delete(delete_all=True, namespace=namespace)
+            deleted.append(namespace)
+        for path in (sparse_index_path(settings, version_tag), answer_cache_path(settings, version_tag)):
+            if path.exists():
+                path.unlink()
+    return deleted
+
+
+def _open_index(settings: Settings):
+    from pinecone import Pinecone
+
+    if not settings.pinecone_api_key:
+        raise ValueError("PINECONE_API_KEY is required.")
+    pc = Pinecone(api_key=settings.pinecone_api_key)
+    if settings.pinecone_index_host:
+        return pc.Index(host=settings.pinecone_index_host)
+    return pc.Index(settings.pinecone_index)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Manage blue/green RAG index versions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show the active version pointer.")
+    promote = sub.add_parser("promote", help="Atomically switch the active version.")
+    promote.add_argument("version_tag")
+    sub.add_parser("rollback", help="Switch back to the previously active version.")
+    sub.add_parser("gc", help="Delete retired versions outside the rollback window.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    settings = get_settings()
+    store = build_version_store(settings)
+
+    if args.command == "promote":
+        pointer = promote_version(store, args.version_tag, keep=settings.index_version_keep)
+    elif args.command == "rollback":
+        pointer = rollback_version(store)
+    else:
+        pointer = store.read()
+
+    if args.command == "gc":
+        deleted = collect_garbage(index=_open_index(settings), settings=settings, pointer=pointer)
+        print(f"Garbage collected namespaces={deleted}")
+    print(json.dumps(pointer.to_dict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import argparse
 import hashlib
+import logging
 import os
+import re
 import time
 from datetime import datetime, timezone
 from pathlib import Path
@@ -10,6 +12,16 @@ import pandas as pd
 from langchain_core.documents import Document
 
 from app.core.config import get_settings
+from app.rag.answer_cache import answer_cache_path, build_answer_cache
+from app.rag.index_versions import (
+    list_namespaces,
+    build_version_store,
+    collect_garbage,
+    namespace_for_version,
+    promote_version,
+    unretire_version,
+)
+from app.rag.sparse_index import SparseIndex, sparse_index_path
 from app.services.embedding_provider import build_embeddings, resolve_embedding_dimension
 
 
@@ -20,6 +32,14 @@ REQUIRED_QA_PARAPHRASE_COLUMNS = REQUIRED_QA_COLUMNS | {
     "paraphrase_rank",
     "is_paraphrase",
 }
+POLICY_CATEGORY_BY_STEM = {
+    "refund_policy": "policy",
+    "shipping_policy": "shipping",
+    "membership_policy": "membership",
+}
+PRODUCT_SKU_PATTERN = re.compile(r"^product_([A-Za-z0-9-]+)$")
+
+logger = logging.getLogger(__name__)
 
 
 def _sha1(value: str) -> str:
@@ -175,11 +195,24 @@ def load_qa_paraphrases_csv(path: Path, version_tag: str) -> list[Document]:
     return docs
 
 
+def _markdown_filter_metadata(path: Path, doc_type: str) -> dict[str, str]:
+    if doc_type == "policy":
+        return {"category": POLICY_CATEGORY_BY_STEM.get(path.stem, path.stem.removesuffix("_policy"))}
+    if doc_type == "product":
+        metadata = {"category": "product"}
+        match = PRODUCT_SKU_PATTERN.match(path.stem)
+        if match:
+            metadata["sku"] = match.group(1).upper()
+        return metadata
+    return {}
+
+
 def load_markdown_docs(base_dir: Path, doc_type: str, version_tag: str) -> list[Document]:
     docs: list[Document] = []
     now_iso = datetime.now(tz=timezone.utc).isoformat()
     for path in sorted(base_dir.rglob("*.md")):
         raw = path.read_text(encoding="utf-8")
+        filter_metadata = _markdown_filter_metadata(path, doc_type)
         for section_path, content in parse_markdown_sections(raw):
             docs.append(
                 Document(
@@ -190,6 +223,7 @@ def load_markdown_docs(base_dir: Path, doc_type: str, version_tag: str) -> list[
                         "section_path": section_path,
                         "version_tag": version_tag,
                         "updated_at": now_iso,
+                        **filter_metadata,
                     },
                 )
             )
@@ -242,8 +276,7 @@ def _build_index_handle(pc, settings):
     return pc.Index(settings.pinecone_index)
 
 
-def _build_vector_store(*, settings, embeddings, dimension: int):
-    from langchain_pinecone import PineconeVectorStore
+def _build_index(*, settings, dimension: int):
     from pinecone import Pinecone, ServerlessSpec
 
     pc = Pinecone(api_key=settings.pinecone_api_key)
@@ -251,12 +284,12 @@ def _build_vector_store(*, settings, embeddings, dimension: int):
         # When host is provided, never fall back to control-plane.
         index = _with_retry(lambda: _build_index_handle(pc, settings), attempts=8)
         _with_retry(index.describe_index_stats, attempts=8, initial_delay=0.8)
-        return PineconeVectorStore(index=index, embedding=embeddings)
+        return index
 
     index = _with_retry(lambda: _build_index_handle(pc, settings), attempts=4)
     try:
         _with_retry(index.describe_index_stats, attempts=3)
-        return PineconeVectorStore(index=index, embedding=embeddings)
+        return index
     except Exception:
         pass
 
@@ -273,7 +306,13 @@ def _build_vector_store(*, settings, embeddings, dimension: int):
     _with_retry(_ensure_index_with_control_plane, attempts=3)
     index = _with_retry(lambda: _build_index_handle(pc, settings), attempts=4)
     _with_retry(index.describe_index_stats, attempts=3)
-    return PineconeVectorStore(index=index, embedding=embeddings)
+    return index
+
+
+def _build_vector_store(*, index, embeddings, namespace: str | None):
+    from langchain_pinecone import PineconeVectorStore
+
+    return PineconeVectorStore(index=index, embedding=embeddings, namespace=namespace)
 
 
 def _chunk_documents(documents: Iterable[Document]) -> list[Document]:
@@ -286,10 +325,21 @@ def _chunk_documents(documents: Iterable[Document]) -> list[Document]:
     return splitter.split_documents(list(documents))
 
 
-def ingest_gold_data(data_root: Path, version_tag: str) -> int:
+def ingest_gold_data(
+    data_root: Path,
+    version_tag: str,
+    promote: bool = True,
+    precompute_answers: bool = False,
+) -> int:
     settings = get_settings()
     if not settings.pinecone_api_key:
         raise ValueError("PINECONE_API_KEY is required for ingestion.")
+    version_store = build_version_store(settings)
+    if version_store.read().active == version_tag:
+        # Writing into the live namespace would change answers mid-ingest; stage a new tag instead.
+        raise ValueError(f"version_tag {version_tag!r} is the active index version; ingest into a new tag.")
+    # Re-staging a retired tag: GC must stop targeting it, and its old chunks are cleared below.
+    restaged = unretire_version(version_store, version_tag)
 
     documents = collect_gold_documents(data_root=data_root, version_tag=version_tag)
     if not documents:
@@ -300,7 +350,12 @@ def ingest_gold_data(data_root: Path, version_tag: str) -> int:
 
     embeddings = build_embeddings(settings)
     dimension = resolve_embedding_dimension(settings, embeddings)
-    vector_store = _build_vector_store(settings=settings, embeddings=embeddings, dimension=dimension)
+    index = _build_index(settings=settings, dimension=dimension)
+    # Each version_tag gets its own namespace so live queries never see a half-written index.
+    namespace = namespace_for_version(settings, version_tag)
+    vector_store = _build_vector_store(index=index, embeddings=embeddings, namespace=namespace)
+    if restaged and namespace in list_namespaces(index):
+        index.delete(delete_all=True, namespace=namespace)
 
     try:
         _with_retry(
@@ -314,6 +369,20 @@ def ingest_gold_data(data_root: Path, version_tag: str) -> int:
                 "Check provider billing/credits and rerun ingest."
             ) from exc
         raise
+
+    # The BM25 side of hybrid retrieval is built from the exact same chunks as the dense index.
+    SparseIndex(chunks).save(sparse_index_path(settings, version_tag))
+
+    if precompute_answers:
+        # Built against the new version before it goes live, so promotion switches answers and index together.
+        build_answer_cache(settings, data_root, version_tag).save(answer_cache_path(settings, version_tag))
+
+    if promote:
+        pointer = promote_version(version_store, version_tag, keep=settings.index_version_keep)
+        try:
+            collect_garbage(index=index, settings=settings, pointer=pointer)
+        except Exception as exc:  # pragma: no cover - retired namespaces are retried on the next ingest
+            logger.warning("index version garbage collection failed: %s", exc)
     return len(chunks)
 
 
@@ -329,6 +398,16 @@ def _build_parser() -> argparse.ArgumentParser:
         default=datetime.now(tz=timezone.utc).strftime("%Y%m%d"),
         help="Version tag stored in metadata for traceability.",
     )
+    parser.add_argument(
+        "--no-promote",
+        action="store_true",
+        help="Index into the version namespace without switching live traffic to it.",
+    )
+    parser.add_argument(
+        "--precompute-answers",
+        action="store_true",
+        help="Run the support flow for every FAQ seed/paraphrase and store the answers for this version.",
+    )
     return parser
 
 
@@ -339,8 +418,13 @@ def main() -> None:
     if not data_root.exists():
         raise FileNotFoundError(f"Data root not found: {data_root}")
 
-    upserted = ingest_gold_data(data_root=data_root, version_tag=args.version_tag)
-    print(f"Ingest complete. upserted_chunks={upserted}")
+    upserted = ingest_gold_data(
+        data_root=data_root,
+        version_tag=args.version_tag,
+        promote=not args.no_promote,
+        precompute_answers=args.precompute_answers,
+    )
+    print(f"Ingest complete. upserted_chunks={upserted} promoted={not args.no_promote}")
 
 
 if __name__ == "__main__":
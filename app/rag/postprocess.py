@@ -0,0 +1,76 @@
+from typing import Protocol, TypeVar
+
+from langchain_core.documents import Document
+
+from app.rag.sparse_index import tokenize
+
+
+class _Scored(Protocol):
+    document: Document
+    score: float
+
+
+S = TypeVar("S", bound=_Scored)
+
+
+def _collapse_key(doc: Document) -> str:
+    seed_hash = str(doc.metadata.get("seed_question_hash") or "").strip()
+    if seed_hash:
+        return f"seed:{seed_hash}"
+    return f"{doc.metadata.get('source_file', '')}|{doc.metadata.get('section_path', '')}|{doc.page_content}"
+
+
+def collapse_paraphrases(items: list[S]) -> list[S]:
+    """
+    Keep one hit per seed question (FAQ seed + its paraphrases share seed_question_hash).
+    The group keeps its best-ranked position and the highest-scoring member.
+    """
+    order: list[str] = []
+    best: dict[str, S] = {}
+    for item in items:
+        key = _collapse_key(item.document)
+        current = best.get(key)
+        if current is None:
+            order.append(key)
+            best[key] = item
+        elif item.score > current.score:
+            best[key] = item
+    return [best[key] for key in order]
+
+
+def _jaccard(left: set[str], right: set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def mmr_select(items: list[S], k: int, lambda_mult: float = 0.7) -> list[S]:
+    """
+    Maximal marginal relevance over the incoming ranking.
+    Relevance is rank-based so dense, sparse and fused rankings are treated alike;
+    redundancy is lexical overlap, which needs no extra embedding calls.
+    """
+    if k <= 0 or not items:
+        return []
+    if len(items) <= k:
+        return list(items)
+
+    token_sets = [set(tokenize(item.document.page_content)) for item in items]
+    total = len(items)
+    relevance = [1.0 - idx / total for idx in range(total)]
+    selected: list[int] = []
+    remaining = list(range(total))
+    while remaining and len(selected) < k:
+
+        def _mmr(idx: int) -> float:
+            redundancy = max((_jaccard(token_sets[idx], token_sets[j]) for j in selected), default=0.0)
+            return lambda_mult * relevance[idx] - (1 - lambda_mult) * redundancy
+
+        chosen = max(remaining, key=_mmr)
+        selected.append(chosen)
+        remaining.remove(chosen)
+    return [items[idx] for idx in selected]
+
+
+def diversify(items: list[S], k: int, lambda_mult: float = 0.7) -> list[S]:
+    return mmr_select(collapse_paraphrases(items), k=k, lambda_mult=lambda_mult)
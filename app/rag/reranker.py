@@ -0,0 +1,124 @@
+import logging
+import time
+from functools import lru_cache
+from typing import Protocol, TypeVar
+
+from langchain_core.documents import Document
+
+from app.core.config import Settings
+from app.rag.sparse_index import tokenize
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Scored(Protocol):
+    document: Document
+    score: float
+
+
+S = TypeVar("S", bound=_Scored)
+
+
+class Reranker(Protocol):
+    name: str
+
+    def score(self, query: str, passages: list[str]) -> list[float]: ...
+
+
+class LexicalOverlapReranker:
+    """Share of query n-grams present in the passage; zero dependencies and sub-millisecond."""
+
+    name = "lexical"
+
+    def score(self, query: str, passages: list[str]) -> list[float]:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0 for _ in passages]
+        scores: list[float] = []
+        for passage in passages:
+            passage_terms = set(tokenize(passage))
+            scores.append(len(query_terms & passage_terms) / len(query_terms))
+        return scores
+
+
+class OnnxCrossEncoderReranker:
+    """Small cross-encoder (e.g. a MiniLM/bge reranker exported to ONNX) scored on CPU."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_length: int = 256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self._input_names = {item.name for item in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+
+    def score(self, query: str, passages: list[str]) -> list[float]:
+        import numpy as np
+
+        if not passages:
+            return []
+        encodings = self._tokenizer.encode_batch([(query, passage) for passage in passages])
+        features = {
+            "input_ids": np.array([item.ids for item in encodings], dtype=np.int64),
+            "attention_mask": np.array([item.attention_mask for item in encodings], dtype=np.int64),
+            "token_type_ids": np.array([item.type_ids for item in encodings], dtype=np.int64),
+        }
+        feed = {name: value for name, value in features.items() if name in self._input_names}
+        logits = self._session.run(None, feed)[0]
+        # Single-logit heads score relevance directly; two-class heads put "relevant" last.
+        return [float(row[-1]) for row in logits.reshape(len(passages), -1)]
+
+
+@lru_cache(maxsize=4)
+def _load_onnx_reranker(model_path: str, tokenizer_path: str, max_length: int) -> OnnxCrossEncoderReranker:
+    return OnnxCrossEncoderReranker(model_path, tokenizer_path, max_length=max_length)
+
+
+def get_reranker(settings: Settings) -> Reranker | None:
+    if settings.reranker == "none":
+        return None
+    if settings.reranker == "onnx":
+        try:
+            return _load_onnx_reranker(
+                settings.reranker_onnx_model_path,
+                settings.reranker_onnx_tokenizer_path,
+                settings.reranker_max_length,
+            )
+        except Exception as exc:
+            logger.warning("ONNX reranker unavailable, falling back to lexical: %s", exc)
+    return LexicalOverlapReranker()
+
+
+def rerank(
+    question: str,
+    items: list[S],
+    *,
+    reranker: Reranker,
+    top_n: int,
+    batch_size: int = 16,
+    budget_ms: float = 150.0,
+) -> list[S]:
+    """
+    Score items in batches until the latency budget is spent.
+    Scored items are ordered by reranker score; anything left unscored keeps retrieval order after them.
+    """
+    started = time.perf_counter()
+    scored: list[tuple[float, int]] = []
+    batch_size = max(1, batch_size)
+    for start in range(0, len(items), batch_size):
+        if scored and (time.perf_counter() - started) * 1000 >= budget_ms:
+            break
+        batch = items[start : start + batch_size]
+        batch_scores = reranker.score(question, [item.document.page_content for item in batch])
+        scored.extend((score, start + offset) for offset, score in enumerate(batch_scores))
+
+    # Stable sort keeps retrieval order between equal scores.
+    ranked = [idx for _, idx in sorted(scored, key=lambda pair: -pair[0])]
+    seen = set(ranked)
+    ranked.extend(idx for idx in range(len(items)) if idx not in seen)
+    return [items[idx] for idx in ranked[: max(1, top_n)]]
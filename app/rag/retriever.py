@@ -1,22 +1,114 @@
-from dataclasses import dataclass
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Literal
+from typing import Iterator, Literal
 
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.core.config import Settings, get_settings
+from app.core.metrics import record_cache
+from app.core.tracing import span
+from app.rag.context_builder import build_context, estimate_tokens
+from app.rag.index_versions import build_version_store, namespace_for_version
+from app.rag.postprocess import diversify
+from app.rag.reranker import get_reranker, rerank
+from app.rag.sparse_index import SparseIndex, matches_filter, reciprocal_rank_fusion, sparse_index_path
 from app.services.embedding_provider import build_embeddings
-from app.services.llm_provider import invoke_with_fallback
+from app.services.llm_provider import cached_chain, invoke_with_fallback
+from app.services.tenant_config import TenantScopedSettings
 
 
+logger = logging.getLogger(__name__)
+
 IntentType = Literal["tracking", "policy", "fallback"]
+SKU_PATTERN = re.compile(r"(?<![A-Za-z0-9])([A-Za-z]{2,}\d{3,})(?![A-Za-z0-9])")
+POLICY_DOC_TYPES = ["policy", "faq"]
+GENERATION_SYSTEM_PROMPT = (
+    "너는 한국어 쇼핑몰 CS AI다. 반드시 제공된 context만 근거로 답변한다. "
+    "근거가 불충분하면 반드시 '확인 불가'라고 답하고 필요한 추가 정보를 요청한다. "
+    "불필요한 추측을 하지 말고 짧고 정확하게 답한다."
+)
+GENERATION_HUMAN_PROMPT = (
+    "질문: {question}\n\n"
+    "context:\n{context}\n\n"
+    "답변 형식: 핵심 답변 2~4문장 + 마지막 문장으로 "
+)
+GENERATION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", GENERATION_SYSTEM_PROMPT),
+        ("human", GENERATION_HUMAN_PROMPT + "'{closing}'"),
+    ]
+)
+
+
+_PINNED_VERSION: contextvars.ContextVar[str | None] = contextvars.ContextVar("shop_ai_pinned_version", default=None)
+QUERY_EMBEDDING_MEMO_SIZE = 256
+# The active version plus one staged version being precomputed (or the one just rolled back from).
+SPARSE_INDEX_CACHE_VERSIONS = 2
+_MISSING = object()
+
+
+@contextmanager
+def pinned_index_version(version_tag: str) -> Iterator[None]:
+    """Answer from `version_tag` instead of the promoted version (e.g. precomputing before promotion)."""
+    token = _PINNED_VERSION.set(version_tag)
+    try:
+        yield
+    finally:
+        _PINNED_VERSION.reset(token)
+
+
+class MemoizedQueryEmbeddings(Embeddings):
+    """Keeps the last few query vectors so the answer-cache lookup and dense search embed a question once."""
+
+    def __init__(self, inner: Embeddings, maxsize: int = QUERY_EMBEDDING_MEMO_SIZE):
+        self._inner = inner
+        self._maxsize = maxsize
+        self._vectors: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_query(self, text: str) -> list[float]:
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+        record_cache("query_embedding", vector is not None)
+        if vector is None:
+            vector = self._inner.embed_query(text)
+            with self._lock:
+                self._vectors[text] = vector
+                while len(self._vectors) > self._maxsize:
+                    self._vectors.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._inner.embed_documents(texts)
 
 
 @dataclass
 class ScoredDocument:
     document: Document
     score: float
+    dense_score: float | None = None
+    sparse_score: float | None = None
+
+
+@dataclass
+class RetrievalPrefetch:
+    """Unfiltered candidates fetched before the intent (and therefore the filter) is known."""
+
+    question: str
+    version: str | None
+    candidates: list[ScoredDocument]
+    latency_ms: int
 
 
 @dataclass
@@ -24,6 +116,8 @@ class RAGAnswer:
     answer: str
     sources: list[dict]
     needs_human: bool
+    answer_mode: str = "generated"
+    trace: list[dict] = field(default_factory=list)
 
 
 def _title_from_path(path: str) -> str:
@@ -49,72 +143,298 @@ def _format_source(doc: Document, score: float) -> dict:
     }
 
 
+def extract_sku(question: str) -> str | None:
+    match = SKU_PATTERN.search(question)
+    return match.group(1).upper() if match else None
+
+
+def build_retrieval_filter(question: str, intent: IntentType, category: str | None = None) -> dict | None:
+    """
+    Narrow the candidate set by intent and entities.
+    Policy questions search policy/faq only, and a SKU in the question pins product chunks
+    to that product's document; a policy question about a SKU keeps both.
+    """
+    clauses: list[dict] = []
+    if intent == "policy":
+        policy_clause: dict = {"doc_type": {"$in": POLICY_DOC_TYPES}}
+        if category:
+            policy_clause["category"] = {"$eq": category}
+        clauses.append(policy_clause)
+    elif category:
+        clauses.append({"category": {"$eq": category}})
+
+    sku = extract_sku(question)
+    if sku:
+        clauses.append({"doc_type": {"$eq": "product"}, "sku": {"$eq": sku}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$or": clauses}
+
+
+def extract_faq_answer(doc: Document) -> str | None:
+    """Return the curated `A:` part of an FAQ chunk built by load_qa_csv."""
+    if doc.metadata.get("doc_type") != "faq":
+        return None
+    _, separator, answer = doc.page_content.partition("\nA:")
+    if not separator:
+        return None
+    return answer.strip() or None
+
+
+def _document_key(doc: Document) -> str:
+    return f"{doc.metadata.get('source_file', '')}|{doc.metadata.get('section_path', '')}|{doc.page_content}"
+
+
 class RAGService:
-    def __init__(self, settings: Settings):
-        from langchain_pinecone import PineconeVectorStore
-        from pinecone import Pinecone
+    # Follows tenant_scope() so per-tenant thresholds/models/namespace apply per request.
+    settings = TenantScopedSettings()
 
+    def __init__(self, settings: Settings, *, vector_store=None):
+        """`vector_store` replaces the Pinecone store (dense search only: no ping/warm round trips)."""
         self.settings = settings
-        if not settings.pinecone_api_key:
-            raise ValueError("PINECONE_API_KEY is required.")
-        self._pc = Pinecone(api_key=settings.pinecone_api_key)
-        self._embeddings = build_embeddings(settings)
-        if settings.pinecone_index_host:
-            index = self._pc.Index(host=settings.pinecone_index_host)
-        else:
-            index = self._pc.Index(settings.pinecone_index)
-        self._vector_store = PineconeVectorStore(
-            index=index,
-            embedding=self._embeddings,
+        self._index = None
+        self._vector_store = vector_store
+        self._embeddings = None
+        if settings.retriever_backend != "local" and vector_store is None:
+            from langchain_pinecone import PineconeVectorStore
+            from pinecone import Pinecone
+
+            if not settings.pinecone_api_key:
+                raise ValueError("PINECONE_API_KEY is required.")
+            self._pc = Pinecone(api_key=settings.pinecone_api_key)
+            self._embeddings = MemoizedQueryEmbeddings(build_embeddings(settings))
+            if settings.pinecone_index_host:
+                index = self._pc.Index(host=settings.pinecone_index_host)
+            else:
+                index = self._pc.Index(settings.pinecone_index)
+            self._index = index
+            self._vector_store = PineconeVectorStore(
+                index=index,
+                embedding=self._embeddings,
+            )
+        self._version_store = build_version_store(settings)
+        self._version_lock = threading.Lock()
+        self._active_version: str | None = None
+        self._active_version_checked_at = 0.0
+        self._sparse_lock = threading.Lock()
+        # Keyed by version: an answer-cache build pinned to a staged version must not evict (or
+        # swap under) the index live traffic reads. A missing file is cached as None.
+        self._sparse_indexes: OrderedDict[str, SparseIndex | None] = OrderedDict()
+        self._reranker = get_reranker(settings)
+
+    def active_version(self) -> str | None:
+        """Return the promoted version_tag, re-reading the pointer at most once per refresh interval."""
+        pinned = _PINNED_VERSION.get()
+        if pinned:
+            return pinned
+        now = time.monotonic()
+        if now - self._active_version_checked_at < self.settings.index_version_refresh_seconds:
+            return self._active_version
+        with self._version_lock:
+            if now - self._active_version_checked_at < self.settings.index_version_refresh_seconds:
+                return self._active_version
+            try:
+                self._active_version = self._version_store.read().active
+            except Exception:
+                # Keep serving the last known version when the pointer backend is unreachable.
+                pass
+            self._active_version_checked_at = now
+        return self._active_version
+
+    def refresh_active_version(self) -> str | None:
+        self._active_version_checked_at = 0.0
+        return self.active_version()
+
+    def warm(self) -> None:
+        """Resolve the active version, load its sparse index and open the embedding/Pinecone connections."""
+        version = self.refresh_active_version()
+        if self.settings.retriever_backend != "pinecone":
+            self._get_sparse_index(version)
+        if self._embeddings is not None:
+            self._embeddings.embed_query("warmup")
+        if self._index is not None:
+            self._index.describe_index_stats()
+
+    def embed_query(self, text: str) -> list[float] | None:
+        """Query vector from the dense-search embedder (memoized), or None for the local backend."""
+        if self._embeddings is None:
+            return None
+        return self._embeddings.embed_query(text)
+
+    def ping(self) -> None:
+        """Round trip on the existing Pinecone index connection, used by the readiness prober."""
+        if self._index is None:
+            raise ValueError(f"Pinecone not used (RETRIEVER_BACKEND={self.settings.retriever_backend})")
+        self._index.describe_index_stats()
+
+    def _get_sparse_index(self, version: str | None) -> SparseIndex | None:
+        if not version:
+            return None
+        cached = self._sparse_indexes.get(version, _MISSING)
+        if cached is not _MISSING:
+            record_cache("sparse_index", True)
+            return cached
+        record_cache("sparse_index", False)
+        with self._sparse_lock:
+            sparse_index = self._sparse_indexes.get(version, _MISSING)
+            if sparse_index is _MISSING:
+                path = sparse_index_path(self.settings, version)
+                try:
+                    sparse_index = SparseIndex.load(path) if path.exists() else None
+                except (OSError, ValueError):
+                    sparse_index = None
+                self._sparse_indexes[version] = sparse_index
+                while len(self._sparse_indexes) > SPARSE_INDEX_CACHE_VERSIONS:
+                    self._sparse_indexes.popitem(last=False)
+        return sparse_index
+
+    def _dense_search(
+        self,
+        question: str,
+        k: int,
+        version: str | None,
+        metadata_filter: dict | None = None,
+    ) -> list[ScoredDocument]:
+        if self._vector_store is None:
+            return []
+        # No promoted version yet means the legacy default namespace is still live.
+        namespace = namespace_for_version(self.settings, version)
+        matches = self._vector_store.similarity_search_with_relevance_scores(
+            question,
+            k=k,
+            namespace=namespace,
+            filter=metadata_filter,
         )
+        return [ScoredDocument(document=doc, score=score, dense_score=score) for doc, score in matches]
 
-    def retrieve(self, question: str, k: int | None = None) -> list[ScoredDocument]:
-        top_k = k or self.settings.retriever_k
-        matches = self._vector_store.similarity_search_with_relevance_scores(question, k=top_k)
-        return [ScoredDocument(document=doc, score=score) for doc, score in matches]
+    def _fuse(self, dense: list[ScoredDocument], sparse: list[ScoredDocument], k: int) -> list[ScoredDocument]:
+        merged: dict[str, ScoredDocument] = {}
+        for item in dense + sparse:
+            key = _document_key(item.document)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = ScoredDocument(
+                    document=item.document,
+                    score=item.score,
+                    dense_score=item.dense_score,
+                    sparse_score=item.sparse_score,
+                )
+                continue
+            current.dense_score = current.dense_score if item.dense_score is None else item.dense_score
+            current.sparse_score = current.sparse_score if item.sparse_score is None else item.sparse_score
+            # Dense relevance and BM25 term coverage are different scales; the dense one wins when present.
+            current.score = current.dense_score if current.dense_score is not None else current.score
 
-    def _generate(self, question: str, context_docs: list[ScoredDocument], strong_model: bool = False) -> str:
-        context = "\n\n".join(
+        fused = reciprocal_rank_fusion(
             [
-                f"[source={idx + 1} score={doc.score:.3f}] {doc.document.page_content}"
-                for idx, doc in enumerate(context_docs)
-            ]
+                [_document_key(item.document) for item in dense],
+                [_document_key(item.document) for item in sparse],
+            ],
+            k=self.settings.retriever_rrf_k,
         )
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "너는 한국어 쇼핑몰 CS AI다. 반드시 제공된 context만 근거로 답변한다. "
-                    "근거가 불충분하면 반드시 '확인 불가'라고 답하고 필요한 추가 정보를 요청한다. "
-                    "불필요한 추측을 하지 말고 짧고 정확하게 답한다.",
-                ),
-                (
-                    "human",
-                    "질문: {question}\n\n"
-                    "context:\n{context}\n\n"
-                    "답변 형식: 핵심 답변 2~4문장 + 마지막 문장으로 "
-                    f"'{self.settings.default_answer_closing}'",
-                ),
-            ]
+        ranked_keys = sorted(fused, key=lambda key: fused[key], reverse=True)[:k]
+        return [merged[key] for key in ranked_keys]
+
+    def _candidates(
+        self,
+        question: str,
+        fetch_k: int,
+        version: str | None,
+        metadata_filter: dict | None = None,
+    ) -> list[ScoredDocument]:
+        backend = self.settings.retriever_backend
+        with span("rag.retrieve", backend=backend, version=version, k=fetch_k, filtered=bool(metadata_filter)):
+            dense: list[ScoredDocument] = []
+            if backend != "local":
+                # Covers query embedding and the Pinecone round-trip.
+                with span("rag.dense_search"):
+                    dense = self._dense_search(question, fetch_k, version, metadata_filter)
+            sparse_index = self._get_sparse_index(version) if backend != "pinecone" else None
+            if sparse_index is None:
+                return dense
+            with span("rag.sparse_search"):
+                sparse = [
+                    ScoredDocument(document=doc, score=score, sparse_score=score)
+                    for doc, score in sparse_index.search(question, fetch_k, metadata_filter=metadata_filter)
+                ]
+            return sparse if backend == "local" else self._fuse(dense, sparse, fetch_k)
+
+    def retrieve(
+        self,
+        question: str,
+        k: int | None = None,
+        metadata_filter: dict | None = None,
+    ) -> list[ScoredDocument]:
+        top_k = k or self.settings.retriever_k
+        # Over-fetch so collapsing paraphrases of the same seed still leaves k distinct hits.
+        fetch_k = top_k * max(1, self.settings.retriever_overfetch_factor)
+        candidates = self._candidates(question, fetch_k, self.active_version(), metadata_filter)
+        return diversify(candidates, k=top_k, lambda_mult=self.settings.retriever_mmr_lambda)
+
+    def prefetch(self, question: str) -> RetrievalPrefetch:
+        """
+        Speculative retrieval run while the question is still being classified.
+        Fetches wider than retrieve() because the intent filter is applied afterwards, locally.
+        """
+        started = time.perf_counter()
+        fetch_k = (
+            self.settings.retriever_k
+            * max(1, self.settings.retriever_overfetch_factor)
+            * max(1, self.settings.speculative_retrieval_fetch_factor)
+        )
+        version = self.active_version()
+        with span("rag.prefetch"):
+            candidates = self._candidates(question, fetch_k, version)
+        return RetrievalPrefetch(
+            question=question,
+            version=version,
+            candidates=candidates,
+            latency_ms=int((time.perf_counter() - started) * 1000),
         )
+
+    def _retrieve_from_prefetch(
+        self,
+        prefetched: RetrievalPrefetch,
+        metadata_filter: dict | None,
+    ) -> list[ScoredDocument]:
+        top_k = self.settings.retriever_k
+        lambda_mult = self.settings.retriever_mmr_lambda
+        candidates = [
+            item for item in prefetched.candidates if matches_filter(item.document.metadata, metadata_filter)
+        ]
+        if metadata_filter and not candidates:
+            # The filtered set may sit entirely outside the unfiltered window; ask the index before widening.
+            filtered = self.retrieve(question=prefetched.question, metadata_filter=metadata_filter)
+            if filtered:
+                return filtered
+            candidates = prefetched.candidates
+        return diversify(candidates, k=top_k, lambda_mult=lambda_mult)
+
+    def _generate(self, question: str, context: str, strong_model: bool = False) -> str:
         purpose = "generation_upgrade" if strong_model else "generation"
 
         def _invoke(llm, _provider):
-            chain = prompt | llm
-            response = chain.invoke({"question": question, "context": context})
+            chain = cached_chain("rag_generation", llm, lambda model: GENERATION_PROMPT | model)
+            response = chain.invoke(
+                {
+                    "question": question,
+                    "context": context,
+                    "closing": self.settings.default_answer_closing,
+                }
+            )
             content = (response.content or "").strip()
             if not content:
                 raise RuntimeError("empty-generation")
             return content
 
-        try:
-            content = invoke_with_fallback(
-                settings=self.settings,
-                purpose=purpose,
-                invoker=_invoke,
-            )
-        except Exception:
-            return f"확인 불가입니다. 질문에 필요한 근거가 부족합니다. {self.settings.default_answer_closing}"
+        content = invoke_with_fallback(
+            settings=self.settings,
+            purpose=purpose,
+            invoker=_invoke,
+        )
         return self._append_closing(content)
 
     def _append_closing(self, answer: str) -> str:
@@ -123,9 +443,32 @@ class RAGService:
             return answer
         return f"{answer} {self.settings.default_answer_closing}"
 
-    def answer(self, question: str, intent: IntentType, upgrade_generation: bool = False) -> RAGAnswer:
-        scored_docs = self.retrieve(question=question)
-        filtered = [item for item in scored_docs if item.score >= self.settings.source_score_threshold]
+    def answer(
+        self,
+        question: str,
+        intent: IntentType,
+        upgrade_generation: bool = False,
+        prefetched: RetrievalPrefetch | None = None,
+        retrieval_question: str | None = None,
+    ) -> RAGAnswer:
+        """
+        `retrieval_question` (e.g. a follow-up rewritten with the previous turn) replaces
+        `question` for search and reranking only; the answer is generated for `question`.
+        """
+        search_question = retrieval_question or question
+        metadata_filter = build_retrieval_filter(search_question, intent)
+        if prefetched is not None and (
+            prefetched.question != search_question or prefetched.version != self.active_version()
+        ):
+            prefetched = None
+        if prefetched is not None:
+            scored_docs = self._retrieve_from_prefetch(prefetched, metadata_filter)
+        else:
+            scored_docs = self.retrieve(question=search_question, metadata_filter=metadata_filter)
+            if metadata_filter and not scored_docs:
+                # Chunks ingested before filter metadata existed can only be found unfiltered.
+                scored_docs = self.retrieve(question=search_question)
+        filtered = [item for item in scored_docs if self._is_source(item)]
         sources = [_format_source(item.document, item.score) for item in filtered]
 
         if intent == "policy" and not filtered:
@@ -137,6 +480,7 @@ class RAGService:
                 ),
                 sources=[],
                 needs_human=True,
+                answer_mode="no_source",
             )
 
         if not filtered:
@@ -148,10 +492,88 @@ class RAGService:
                 ),
                 sources=[],
                 needs_human=True,
+                answer_mode="no_source",
+            )
+
+        direct_answer = self._faq_direct_answer(question, filtered[0])
+        if direct_answer:
+            logger.info("rag answer_mode=faq_direct score=%.3f", filtered[0].score)
+            return RAGAnswer(
+                answer=self._append_closing(direct_answer),
+                sources=sources[:1],
+                needs_human=False,
+                answer_mode="faq_direct",
             )
 
-        generated = self._generate(question=question, context_docs=filtered, strong_model=upgrade_generation)
-        return RAGAnswer(answer=generated, sources=sources, needs_human=False)
+        reranked = self._rerank(search_question, filtered)
+        budget = (
+            self.settings.generation_upgrade_context_token_budget
+            if upgrade_generation
+            else self.settings.generation_context_token_budget
+        )
+        built = build_context(reranked, budget_tokens=budget)
+        sources = [_format_source(item.document, item.score) for item in built.docs]
+        prompt_tokens = (
+            estimate_tokens(GENERATION_SYSTEM_PROMPT + GENERATION_HUMAN_PROMPT + self.settings.default_answer_closing)
+            + estimate_tokens(question)
+            + built.token_count
+        )
+
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            generated = self._generate(question=question, context=built.text, strong_model=upgrade_generation)
+        except Exception:
+            status = "error"
+            generated = f"확인 불가입니다. 질문에 필요한 근거가 부족합니다. {self.settings.default_answer_closing}"
+        trace = {
+            "tool": "generation_upgrade" if upgrade_generation else "generation",
+            "status": status,
+            "latency_ms": int((time.perf_counter() - started) * 1000),
+            "prompt_tokens": prompt_tokens,
+        }
+        return RAGAnswer(answer=generated, sources=sources, needs_human=False, trace=[trace])
+
+    def _rerank(self, question: str, items: list[ScoredDocument]) -> list[ScoredDocument]:
+        if self._reranker is None:
+            return items
+        try:
+            with span("rag.rerank", reranker=self._reranker.name, candidates=len(items)):
+                return rerank(
+                    question,
+                    items,
+                    reranker=self._reranker,
+                    top_n=self.settings.reranker_top_n,
+                    batch_size=self.settings.reranker_batch_size,
+                    budget_ms=self.settings.reranker_latency_budget_ms,
+                )
+        except Exception:
+            logger.exception("reranker failed; using retrieval order")
+            return items[: self.settings.reranker_top_n]
+
+    def _is_source(self, item: ScoredDocument) -> bool:
+        if item.dense_score is not None:
+            return item.dense_score >= self.settings.source_score_threshold
+        # Sparse-only hit: the score is query-term coverage, which needs its own (stricter) bar.
+        return item.score >= self.settings.sparse_score_threshold
+
+    def _faq_direct_answer(self, question: str, top: ScoredDocument) -> str | None:
+        settings = self.settings
+        if not settings.faq_direct_answer_enabled:
+            return None
+        if top.dense_score is not None:
+            confidence = top.dense_score
+        else:
+            # A sparse-only hit scores query-term coverage, which saturates whenever a short query's
+            # few words all appear in one chunk; only long enough questions may skip generation on it.
+            # Counted in whitespace words, not tokenize() terms (Hangul words split into bigrams).
+            min_words = settings.faq_direct_sparse_min_words
+            if min_words <= 0 or len(question.split()) < min_words:
+                return None
+            confidence = top.score
+        if confidence < settings.faq_direct_score_threshold:
+            return None
+        return extract_faq_answer(top.document)
 
 
 @lru_cache(maxsize=1)
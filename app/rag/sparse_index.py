@@ -0,0 +1,163 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable
+
+from langchain_core.documents import Document
+
+from app.core.config import Settings
+
+
+_DIGIT_GROUP_PATTERN = re.compile(r"(?<=\d),(?=\d{3})")
+_WORD_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+_RUN_PATTERN = re.compile(r"[가-힣]+|[0-9a-z]+")
+_NUMBER_UNIT_PATTERN = re.compile(r"\d+[가-힣]")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Korean-friendly sparse tokenizer.
+    Hangul words are split into character bigrams so particles don't break matches,
+    while exact tokens such as SKU codes (best003), amounts (50000원) and periods (7일)
+    are kept whole.
+    """
+    normalized = _DIGIT_GROUP_PATTERN.sub("", (text or "").lower())
+    tokens: list[str] = []
+    for word in _WORD_PATTERN.findall(normalized):
+        for run in _RUN_PATTERN.findall(word):
+            if len(run) > 1 and "가" <= run[0] <= "힣":
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            else:
+                tokens.append(run)
+        tokens.extend(_NUMBER_UNIT_PATTERN.findall(word))
+    return tokens
+
+
+def matches_filter(metadata: dict[str, Any], metadata_filter: dict[str, Any] | None) -> bool:
+    """Evaluate the subset of Pinecone metadata filter syntax used by the retriever."""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, item) for item in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, item) for item in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+    return True
+
+
+class SparseIndex:
+    """In-process BM25 index over chunk page_content."""
+
+    def __init__(self, documents: Iterable[Document], *, k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(tokenize(doc.page_content)) for doc in self.documents]
+        self._doc_lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = (sum(self._doc_lengths) / len(self._doc_lengths)) if self._doc_lengths else 0.0
+        doc_freqs: Counter[str] = Counter()
+        for freqs in self._term_freqs:
+            doc_freqs.update(freqs.keys())
+        total = len(self.documents)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+        self._postings: dict[str, list[int]] = {}
+        for doc_idx, freqs in enumerate(self._term_freqs):
+            for term in freqs:
+                self._postings.setdefault(term, []).append(doc_idx)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        metadata_filter: dict[str, Any] | None = None,
+    ) -> list[tuple[Document, float]]:
+        """
+        Return top-k documents ordered by BM25.
+        The returned score is the idf-weighted share of query terms found in the document (0~1).
+        It is not on the dense relevance scale: it saturates at 1.0 for short queries, so sparse-only
+        hits are gated by SPARSE_SCORE_THRESHOLD rather than SOURCE_SCORE_THRESHOLD.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.documents:
+            return []
+        query_weight = sum(self._idf.get(term, 0.0) for term in query_terms)
+        if query_weight <= 0:
+            return []
+
+        bm25: dict[int, float] = {}
+        matched: dict[int, float] = {}
+        for term in query_terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_idx in self._postings.get(term, []):
+                if metadata_filter and not matches_filter(self.documents[doc_idx].metadata, metadata_filter):
+                    continue
+                tf = self._term_freqs[doc_idx][term]
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_idx] / (self._avg_length or 1.0))
+                bm25[doc_idx] = bm25.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_idx] = matched.get(doc_idx, 0.0) + idf
+
+        ranked = sorted(bm25, key=lambda idx: bm25[idx], reverse=True)[:k]
+        return [(self.documents[idx], matched[idx] / query_weight) for idx in ranked]
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in self.documents
+            ]
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "SparseIndex":
+        documents = [
+            Document(page_content=str(item.get("page_content", "")), metadata=dict(item.get("metadata") or {}))
+            for item in payload.get("documents", [])
+        ]
+        return cls(documents)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_payload(), ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "SparseIndex":
+        return cls.from_payload(json.loads(path.read_text(encoding="utf-8")))
+
+
+def sparse_index_path(settings: Settings, version_tag: str) -> Path:
+    return Path(settings.sparse_index_dir) / f"sparse_{version_tag}.json"
+
+
+def reciprocal_rank_fusion(ranked_lists: list[list[str]], *, k: int = 60) -> dict[str, float]:
+    """Fuse several rankings of document keys; higher is better."""
+    fused: dict[str, float] = {}
+    for ranking in ranked_lists:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
@@ -1,16 +1,29 @@
+import asyncio
 import base64
+import time
 from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from cryptography.fernet import Fernet, InvalidToken
 
-try:
-    from supabase import create_client
-except Exception:  # pragma: no cover - import compatibility fallback
-    create_client = None
-
 from app.core.config import Settings, get_settings
+from app.core.metrics import observe_upstream
+
+if TYPE_CHECKING:
+    import httpx
+
+
+def _build_cipher(settings: Settings) -> Fernet | None:
+    if not settings.token_encryption_key:
+        return None
+    raw = settings.token_encryption_key.encode("utf-8")
+    # Accept either pre-encoded Fernet key or plain passphrase-like value.
+    if len(raw) == 44 and raw.endswith(b"="):
+        key = raw
+    else:
+        key = base64.urlsafe_b64encode(raw.ljust(32, b"0")[:32])
+    return Fernet(key)
 
 
 class SupabaseRepository:
@@ -21,22 +34,27 @@ class SupabaseRepository:
         self._init_optional_clients()
 
     def _init_optional_clients(self) -> None:
-        if create_client and self.settings.supabase_url and self.settings.supabase_service_role_key:
-            self._client = create_client(self.settings.supabase_url, self.settings.supabase_service_role_key)
-
-        if self.settings.token_encryption_key:
-            raw = self.settings.token_encryption_key.encode("utf-8")
-            # Accept either pre-encoded Fernet key or plain passphrase-like value.
-            if len(raw) == 44 and raw.endswith(b"="):
-                key = raw
-            else:
-                key = base64.urlsafe_b64encode(raw.ljust(32, b"0")[:32])
-            self._cipher = Fernet(key)
+        if self.settings.supabase_url and self.settings.supabase_service_role_key:
+            # Imported on first use: the SDK (postgrest, realtime, storage) dominates API import time.
+            try:
+                from supabase import create_client
+            except Exception:  # pragma: no cover - import compatibility fallback
+                create_client = None
+            if create_client:
+                self._client = create_client(self.settings.supabase_url, self.settings.supabase_service_role_key)
+
+        self._cipher = _build_cipher(self.settings)
 
     @property
     def enabled(self) -> bool:
         return self._client is not None
 
+    def ping(self) -> None:
+        """Lightweight round trip on the long-lived client, used by the readiness prober."""
+        if not self._client:
+            raise ValueError("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY missing")
+        self._client.table("tenant_settings").select("tenant_id").limit(1).execute()
+
     def _encrypt(self, value: str) -> str:
         if not self._cipher:
             raise ValueError("TOKEN_ENCRYPTION_KEY is required to store refresh tokens.")
@@ -120,6 +138,119 @@ class SupabaseRepository:
             }
         ).execute()
 
+    def get_index_version_pointer(self, tenant_id: str = "default") -> dict[str, Any] | None:
+        if not self._client:
+            return None
+        response = (
+            self._client.table("rag_index_versions")
+            .select("active_version,history,retired,updated_at")
+            .eq("tenant_id", tenant_id)
+            .limit(1)
+            .execute()
+        )
+        rows = response.data or []
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            "active": row.get("active_version"),
+            "history": row.get("history") or [],
+            "retired": row.get("retired") or [],
+            "updated_at": row.get("updated_at") or "",
+        }
+
+    def save_index_version_pointer(
+        self,
+        *,
+        tenant_id: str = "default",
+        active_version: str | None,
+        history: list[str],
+        retired: list[str] | None = None,
+    ) -> None:
+        if not self._client:
+            raise ValueError("Supabase is required to store the active index version.")
+        payload = {
+            "tenant_id": tenant_id,
+            "active_version": active_version,
+            "history": history,
+            "retired": retired or [],
+            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        # Single-row upsert keeps promotion/rollback atomic for concurrent readers.
+        self._client.table("rag_index_versions").upsert(payload, on_conflict="tenant_id").execute()
+
+    def insert_llm_usage(self, rows: list[dict[str, Any]]) -> None:
+        if not self._client or not rows:
+            return
+        self._client.table("llm_usage").insert(rows).execute()
+
+    def list_llm_usage(
+        self,
+        *,
+        tenant_id: str | None = None,
+        since: datetime | None = None,
+        page_size: int = 1000,
+    ) -> list[dict[str, Any]]:
+        """All usage windows since `since`, fetched page by page (PostgREST caps one response at max-rows)."""
+        if not self._client:
+            return []
+        rows: list[dict[str, Any]] = []
+        while True:
+            query = self._client.table("llm_usage").select("*")
+            if tenant_id:
+                query = query.eq("tenant_id", tenant_id)
+            if since:
+                query = query.gte("window_start", since.isoformat())
+            # Ordered by the primary key so pages neither overlap nor skip rows inserted meanwhile.
+            response = query.order("id").range(len(rows), len(rows) + page_size - 1).execute()
+            page = list(response.data or [])
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def get_tenant_config(self, tenant_id: str) -> dict[str, Any] | None:
+        if not self._client:
+            return None
+        response = (
+            self._client.table("tenant_settings").select("config").eq("tenant_id", tenant_id).limit(1).execute()
+        )
+        rows = response.data or []
+        return (rows[0].get("config") or {}) if rows else None
+
+    def get_session_memory(self, *, tenant_id: str, session_id: str) -> dict[str, Any] | None:
+        if not self._client:
+            return None
+        response = (
+            self._client.table("session_memory")
+            .select("memory")
+            .eq("tenant_id", tenant_id)
+            .eq("session_id", session_id)
+            .gt("expires_at", datetime.now(tz=timezone.utc).isoformat())
+            .limit(1)
+            .execute()
+        )
+        rows = response.data or []
+        return rows[0].get("memory") if rows else None
+
+    def save_session_memory(
+        self,
+        *,
+        tenant_id: str,
+        session_id: str,
+        memory: dict[str, Any],
+        expires_at: datetime,
+    ) -> None:
+        if not self._client:
+            return
+        payload = {
+            "tenant_id": tenant_id,
+            "session_id": session_id,
+            "memory": memory,
+            "expires_at": expires_at.isoformat(),
+            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        self._client.table("session_memory").upsert(payload, on_conflict="tenant_id,session_id").execute()
+
     def save_lead_signup(self, *, email: str, source: str, metadata: dict[str, Any] | None = None) -> bool:
         if not self._client:
             return False
@@ -175,6 +306,226 @@ class SupabaseRepository:
         self._client.table("oauth_tokens").upsert(payload, on_conflict="tenant_id,provider").execute()
 
 
+class AsyncSupabaseRepository:
+    """
+    Awaitable counterpart of SupabaseRepository for async route handlers.
+    Talks to PostgREST directly over one pooled httpx.AsyncClient (HTTP/2 when `h2` is installed),
+    so concurrent writes share connections instead of each holding a threadpool worker.
+    """
+
+    def __init__(self, settings: Settings, transport: "httpx.AsyncBaseTransport | None" = None):
+        self.settings = settings
+        self._transport = transport
+        self._client: "httpx.AsyncClient | None" = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self._cipher = _build_cipher(settings)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.supabase_url and self.settings.supabase_service_role_key)
+
+    def _encrypt(self, value: str) -> str:
+        if not self._cipher:
+            raise ValueError("TOKEN_ENCRYPTION_KEY is required to store refresh tokens.")
+        return self._cipher.encrypt(value.encode("utf-8")).decode("utf-8")
+
+    def _decrypt(self, value: str) -> str:
+        if not self._cipher:
+            raise ValueError("TOKEN_ENCRYPTION_KEY is required to read refresh tokens.")
+        try:
+            return self._cipher.decrypt(value.encode("utf-8")).decode("utf-8")
+        except InvalidToken as exc:
+            raise ValueError("Failed to decrypt refresh token.") from exc
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        # httpx pools are bound to the loop that opened them; rebuild if a new loop (e.g. tests) calls in.
+        if self._client is None or self._client_loop is not loop:
+            import httpx
+
+            try:
+                import h2  # noqa: F401
+
+                http2 = True
+            except ImportError:  # pragma: no cover - optional extra
+                http2 = False
+            key = self.settings.supabase_service_role_key
+            self._client = httpx.AsyncClient(
+                base_url=f"{self.settings.supabase_url.rstrip('/')}/rest/v1",
+                headers={"apikey": key, "Authorization": f"Bearer {key}"},
+                http2=http2,
+                timeout=self.settings.supabase_http_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.settings.supabase_http_max_connections,
+                    max_keepalive_connections=self.settings.supabase_http_max_connections,
+                ),
+                transport=self._transport,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client, self._client_loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        table: str,
+        *,
+        params: dict[str, str] | None = None,
+        json: Any = None,
+        prefer: str | None = None,
+    ) -> Any:
+        started = time.perf_counter()
+        status_code: int | None = None
+        try:
+            response = await self._get_client().request(
+                method,
+                f"/{table}",
+                params=params,
+                json=json,
+                headers={"Prefer": prefer} if prefer else None,
+            )
+            status_code = response.status_code
+            response.raise_for_status()
+        finally:
+            observe_upstream("supabase", f"{method.lower()}:{table}", started, status_code)
+        return response.json() if response.content else None
+
+    async def _insert(self, table: str, rows: Any, *, on_conflict: str | None = None) -> None:
+        prefer = "return=minimal"
+        params = None
+        if on_conflict:
+            prefer += ",resolution=merge-duplicates"
+            params = {"on_conflict": on_conflict}
+        await self._request("POST", table, params=params, json=rows, prefer=prefer)
+
+    async def _select_one(self, table: str, columns: str, **filters: str) -> dict[str, Any] | None:
+        params = {"select": columns, "limit": "1"}
+        params.update({name: f"eq.{value}" for name, value in filters.items()})
+        rows = await self._request("GET", table, params=params)
+        return rows[0] if rows else None
+
+    async def ping(self) -> None:
+        if not self.enabled:
+            raise ValueError("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY missing")
+        await self._request("GET", "tenant_settings", params={"select": "tenant_id", "limit": "1"})
+
+    async def log_chat_interaction(
+        self,
+        tenant_id: str,
+        session_id: str,
+        user_message: str,
+        response_payload: dict[str, Any],
+        why_fallback: str | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        await self._insert(
+            "conversation_logs",
+            {
+                "tenant_id": tenant_id,
+                "session_id": session_id,
+                "user_message": user_message,
+                "response_payload": response_payload,
+                "why_fallback": why_fallback,
+                "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            },
+        )
+
+    async def log_tool_call(
+        self,
+        tenant_id: str,
+        session_id: str,
+        tool: str,
+        status: str,
+        latency_ms: int,
+        detail: dict[str, Any] | None = None,
+        why_fallback: str | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        await self._insert(
+            "tool_call_logs",
+            {
+                "tenant_id": tenant_id,
+                "session_id": session_id,
+                "tool": tool,
+                "status": status,
+                "latency_ms": latency_ms,
+                "detail": detail or {},
+                "why_fallback": why_fallback,
+                "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            },
+        )
+
+    async def save_lead_signup(self, *, email: str, source: str, metadata: dict[str, Any] | None = None) -> bool:
+        if not self.enabled:
+            return False
+        payload = {
+            "email": email,
+            "source": source,
+            "metadata": metadata or {},
+            "created_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        try:
+            await self._insert("lead_signups", payload)
+            return True
+        except Exception:
+            return False
+
+    async def get_cafe24_refresh_token(self, tenant_id: str) -> str | None:
+        if not self.enabled:
+            return None
+        row = await self._select_one(
+            "oauth_tokens",
+            "refresh_token_encrypted",
+            tenant_id=tenant_id,
+            provider="cafe24",
+        )
+        encrypted = (row or {}).get("refresh_token_encrypted")
+        if not encrypted:
+            return None
+        return self._decrypt(str(encrypted))
+
+    async def save_cafe24_tokens(
+        self,
+        tenant_id: str,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime,
+    ) -> None:
+        if not self.enabled:
+            return
+        payload = {
+            "tenant_id": tenant_id,
+            "provider": "cafe24",
+            "access_token": access_token,
+            "refresh_token_encrypted": self._encrypt(refresh_token),
+            "expires_at": expires_at.isoformat(),
+            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        await self._insert("oauth_tokens", payload, on_conflict="tenant_id,provider")
+
+    async def take_rate_limit_token(self, *, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens from a shared bucket; returns 0 when allowed, else seconds until it refills."""
+        if not self.enabled:
+            raise ValueError("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY missing")
+        result = await self._request(
+            "POST",
+            "rpc/take_rate_limit_token",
+            json={"p_key": key, "p_rate": rate, "p_capacity": capacity, "p_cost": cost},
+        )
+        return float(result or 0.0)
+
+
 @lru_cache(maxsize=1)
 def get_supabase_repo() -> SupabaseRepository:
     return SupabaseRepository(get_settings())
+
+
+@lru_cache(maxsize=1)
+def get_async_supabase_repo() -> AsyncSupabaseRepository:
+    return AsyncSupabaseRepository(get_settings())
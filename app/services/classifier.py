@@ -6,7 +6,8 @@ from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.core.config import Settings, get_settings
-from app.services.llm_provider import invoke_with_fallback
+from app.services.llm_provider import cached_chain, invoke_with_fallback
+from app.services.tenant_config import TenantScopedSettings
 
 
 IntentType = Literal["tracking", "policy", "fallback"]
@@ -32,6 +33,14 @@ def _normalize_for_match(text: str) -> str:
     return text.strip().lower().replace(" ", "")
 
 
+def looks_like_tracking(question: str) -> bool:
+    """Pre-classification guess at a tracking question; a false positive only costs a shared answer."""
+    if TRACKING_NUMBER_PATTERN.search(question):
+        return True
+    q = _normalize_for_match(question).replace("배송비", "")
+    return any(word in q for word in TRACKING_HINT_WORDS)
+
+
 def _heuristic_confidence(question: str, intent: IntentType) -> float:
     q = _normalize_for_match(question)
     if intent == "tracking":
@@ -49,28 +58,38 @@ def _heuristic_confidence(question: str, intent: IntentType) -> float:
     return 0.55
 
 
+CLASSIFIER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "너는 한국어 이커머스 CS 분류기다. intent는 tracking, policy, fallback 중 하나만 선택한다. "
+            "tracking: 배송위치, 운송장, 택배조회. policy: 환불/반품/교환/배송비/적립금/운영규정. "
+            "fallback: 그 외. confidence는 0~1로 보수적으로 준다.",
+        ),
+        (
+            "human",
+            "질문: {question}\n"
+            "JSON으로만 응답한다. entities.tracking_number와 entities.courier_code를 추출한다.",
+        ),
+    ]
+)
+
+
 class IntentClassifier:
+    # Follows tenant_scope() so per-tenant model choices apply per request.
+    settings = TenantScopedSettings()
+
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "너는 한국어 이커머스 CS 분류기다. intent는 tracking, policy, fallback 중 하나만 선택한다. "
-                    "tracking: 배송위치, 운송장, 택배조회. policy: 환불/반품/교환/배송비/적립금/운영규정. "
-                    "fallback: 그 외. confidence는 0~1로 보수적으로 준다.",
-                ),
-                (
-                    "human",
-                    "질문: {question}\n"
-                    "JSON으로만 응답한다. entities.tracking_number와 entities.courier_code를 추출한다.",
-                ),
-            ]
-        )
+        self.prompt = CLASSIFIER_PROMPT
 
     def classify(self, question: str) -> IntentClassification:
         def _invoke(llm, _provider):
-            chain = self.prompt | llm.with_structured_output(IntentClassification)
+            chain = cached_chain(
+                "intent_classifier",
+                llm,
+                lambda model: self.prompt | model.with_structured_output(IntentClassification),
+            )
             response = chain.invoke({"question": question})
             return IntentClassification.model_validate(response)
 
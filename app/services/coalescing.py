@@ -0,0 +1,53 @@
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution on the event loop.
+    The first caller (leader) runs `factory`; callers arriving while it is in flight await
+    the same result or exception. Nothing is cached once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Returns (result, shared); `shared` is True when another caller's execution was reused."""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                # Shielded so one follower disconnecting does not cancel the leader's work.
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader itself was cancelled; run on our own rather than fail.
+                return await factory(), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved: with no followers nobody else awaits it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+
+
+@lru_cache(maxsize=1)
+def get_chat_single_flight() -> SingleFlight:
+    return SingleFlight()
@@ -1,6 +1,7 @@
 from typing import Any
 
 from app.core.config import Settings
+from app.services.usage import MeteredEmbeddings
 
 
 def build_embeddings(settings: Settings):
@@ -16,13 +17,21 @@ def build_embeddings(settings: Settings):
         }
         if settings.embedding_output_dimensionality > 0:
             kwargs["output_dimensionality"] = settings.embedding_output_dimensionality
-        return GoogleGenerativeAIEmbeddings(**kwargs)
+        return MeteredEmbeddings(
+            GoogleGenerativeAIEmbeddings(**kwargs),
+            provider="gemini",
+            model=settings.embedding_model_gemini,
+        )
 
     if not settings.openai_api_key:
         raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings.")
     from langchain_openai import OpenAIEmbeddings
 
-    return OpenAIEmbeddings(model=settings.embedding_model, api_key=settings.openai_api_key)
+    return MeteredEmbeddings(
+        OpenAIEmbeddings(model=settings.embedding_model, api_key=settings.openai_api_key),
+        provider="openai",
+        model=settings.embedding_model,
+    )
 
 
 def resolve_embedding_dimension(settings: Settings, embeddings) -> int:
@@ -1,13 +1,24 @@
+import threading
+import time
 from collections.abc import Callable
 from typing import Any, Literal, TypeVar
 
 from app.core.config import Settings
+from app.core.metrics import LLM_CALL_DURATION, LLM_CALLS, record_cache
+from app.core.tracing import span
+from app.services.usage import UsageCallbackHandler, purpose_scope
 
 
 LLMProvider = Literal["gemini", "openai"]
 LLMPurpose = Literal["classifier", "generation", "generation_upgrade"]
 T = TypeVar("T")
 
+# Chat model clients and composed chains are reused across requests: building them parses
+# templates, validates pydantic models and opens new HTTP clients on every call otherwise.
+_CHAT_MODEL_CACHE: dict[tuple[str, str, str], Any] = {}
+_CHAIN_CACHE: dict[tuple[str, int], tuple[Any, Any]] = {}
+_CACHE_LOCK = threading.Lock()
+
 
 def _select_model_name(settings: Settings, provider: LLMProvider, purpose: LLMPurpose) -> str:
     if provider == "gemini":
@@ -45,15 +56,15 @@ def available_provider_order(settings: Settings) -> list[LLMProvider]:
     return order
 
 
-def _build_chat_model(settings: Settings, provider: LLMProvider, purpose: LLMPurpose):
-    model_name = _select_model_name(settings, provider, purpose)
+def _create_chat_model(provider: LLMProvider, model_name: str, api_key: str):
     if provider == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
 
         return ChatGoogleGenerativeAI(
             model=model_name,
-            google_api_key=settings.gemini_api_key,
+            google_api_key=api_key,
             temperature=0,
+            callbacks=[UsageCallbackHandler(provider, model_name)],
         )
 
     from langchain_openai import ChatOpenAI
@@ -61,10 +72,54 @@ def _build_chat_model(settings: Settings, provider: LLMProvider, purpose: LLMPur
     return ChatOpenAI(
         model=model_name,
         temperature=0,
-        api_key=settings.openai_api_key,
+        api_key=api_key,
+        callbacks=[UsageCallbackHandler(provider, model_name)],
     )
 
 
+def _build_chat_model(settings: Settings, provider: LLMProvider, purpose: LLMPurpose):
+    model_name = _select_model_name(settings, provider, purpose)
+    api_key = settings.gemini_api_key if provider == "gemini" else settings.openai_api_key
+    key = (provider, model_name, api_key)
+    llm = _CHAT_MODEL_CACHE.get(key)
+    record_cache("chat_model", llm is not None)
+    if llm is None:
+        with _CACHE_LOCK:
+            llm = _CHAT_MODEL_CACHE.get(key)
+            if llm is None:
+                llm = _create_chat_model(provider, model_name, api_key)
+                _CHAT_MODEL_CACHE[key] = llm
+    return llm
+
+
+def warm_chat_models(settings: Settings) -> int:
+    """Build every configured provider/purpose client ahead of the first request."""
+    purposes: tuple[LLMPurpose, ...] = ("classifier", "generation", "generation_upgrade")
+    built = 0
+    for provider in available_provider_order(settings):
+        for purpose in purposes:
+            _build_chat_model(settings, provider, purpose)
+            built += 1
+    return built
+
+
+def cached_chain(name: str, llm: Any, factory: Callable[[Any], Any]) -> Any:
+    """
+    Return `factory(llm)` composed once per chain name and chat model.
+    The entry holds a reference to the model, so its id() can't be reused by another object.
+    """
+    key = (name, id(llm))
+    entry = _CHAIN_CACHE.get(key)
+    record_cache("chain", entry is not None and entry[0] is llm)
+    if entry is None or entry[0] is not llm:
+        with _CACHE_LOCK:
+            entry = _CHAIN_CACHE.get(key)
+            if entry is None or entry[0] is not llm:
+                entry = (llm, factory(llm))
+                _CHAIN_CACHE[key] = entry
+    return entry[1]
+
+
 def invoke_with_fallback(
     *,
     settings: Settings,
@@ -72,11 +127,20 @@ def invoke_with_fallback(
     invoker: Callable[[Any, LLMProvider], T],
 ) -> T:
     errors: list[str] = []
-    for provider in available_provider_order(settings):
+    for attempt, provider in enumerate(available_provider_order(settings), start=1):
+        model = _select_model_name(settings, provider, purpose)
+        started = time.perf_counter()
         try:
-            llm = _build_chat_model(settings, provider=provider, purpose=purpose)
-            return invoker(llm, provider)
+            with span("llm.invoke", provider=provider, model=model, purpose=purpose, attempt=attempt):
+                llm = _build_chat_model(settings, provider=provider, purpose=purpose)
+                with purpose_scope(purpose):
+                    result = invoker(llm, provider)
+            LLM_CALLS.labels(provider=provider, purpose=purpose, status="ok").inc()
+            return result
         except Exception as exc:  # pragma: no cover - runtime/provider fallback
+            LLM_CALLS.labels(provider=provider, purpose=purpose, status="error").inc()
             errors.append(f"{provider}:{exc.__class__.__name__}")
+        finally:
+            LLM_CALL_DURATION.labels(provider=provider, purpose=purpose).observe(time.perf_counter() - started)
 
     raise RuntimeError(f"All LLM providers failed for purpose='{purpose}'. errors={errors}")
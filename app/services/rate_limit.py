@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import ADMISSION_INFLIGHT, PUBLIC_REJECTIONS
+
+
+logger = logging.getLogger(__name__)
+
+# Buckets checked per public scope, narrowest first so a request rejected for its session
+# does not also drain the IP/tenant buckets. Values name per-minute Settings fields (0 = off).
+RATE_LIMIT_RULES: dict[str, tuple[tuple[str, str], ...]] = {
+    "chat": (
+        ("session", "rate_limit_chat_session_per_minute"),
+        ("ip", "rate_limit_chat_ip_per_minute"),
+        ("tenant", "rate_limit_chat_tenant_per_minute"),
+    ),
+    "leads": (("ip", "rate_limit_leads_ip_per_minute"),),
+    "demo_feed": (("ip", "rate_limit_demo_feed_ip_per_minute"),),
+}
+
+# In-flight cap per scope; past it requests are shed immediately instead of queueing.
+ADMISSION_LIMITS: dict[str, str] = {
+    "chat": "admission_chat_max_inflight",
+    "demo_feed": "admission_demo_feed_max_inflight",
+}
+
+
+class RateLimitExceeded(RuntimeError):
+    def __init__(self, scope: str, key_kind: str, retry_after: float):
+        super().__init__(f"{scope} rate limit exceeded for {key_kind}")
+        self.scope = scope
+        self.key_kind = key_kind
+        self.retry_after = retry_after
+
+
+class AdmissionRejected(RuntimeError):
+    def __init__(self, scope: str, limit: int):
+        super().__init__(f"{scope} is at its in-flight limit ({limit})")
+        self.scope = scope
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class BucketDecision:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class InMemoryBucketStore:
+    """Token buckets in process memory, LRU-capped so a flood of distinct IPs cannot grow it unbounded."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(1, max_keys)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, *, rate: float, capacity: float, cost: float = 1.0) -> BucketDecision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return BucketDecision(allowed, 0.0 if allowed else (cost - tokens) / rate)
+
+    def acquire(self, key: str, *, rate: float, capacity: float, cost: float = 1.0, sleep=time.sleep) -> float:
+        """Blocking take for batch jobs: waits until a token is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            decision = self.take(key, rate=rate, capacity=capacity, cost=cost)
+            if decision.allowed:
+                return waited
+            sleep(decision.retry_after)
+            waited += decision.retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SupabaseBucketStore:
+    """Buckets shared across replicas via the `take_rate_limit_token` RPC (one atomic upsert per check)."""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    async def take(self, key: str, *, rate: float, capacity: float, cost: float = 1.0) -> BucketDecision:
+        # Keys carry client IPs and session ids; only a digest is stored.
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        retry_after = await self.repo.take_rate_limit_token(key=digest, rate=rate, capacity=capacity, cost=cost)
+        return BucketDecision(retry_after <= 0, max(0.0, retry_after))
+
+
+class RateLimiter:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._local = InMemoryBucketStore(settings.rate_limit_max_keys)
+        self._shared: SupabaseBucketStore | None = None
+        if settings.rate_limit_backend == "supabase":
+            from app.repositories.supabase_repo import get_async_supabase_repo
+
+            self._shared = SupabaseBucketStore(get_async_supabase_repo())
+
+    async def _take(self, key: str, *, rate: float, capacity: float) -> BucketDecision:
+        if self._shared is not None:
+            try:
+                return await self._shared.take(key, rate=rate, capacity=capacity)
+            except Exception as exc:
+                # A shared-store outage degrades to per-replica limits rather than failing requests.
+                logger.warning("shared rate limit check failed, using local buckets: %s", exc)
+        return self._local.take(key, rate=rate, capacity=capacity)
+
+    async def check(self, scope: str, keys: dict[str, str | None]) -> None:
+        """Take one token from each of `scope`'s buckets; raises RateLimitExceeded on the first empty one."""
+        settings = self.settings
+        if not settings.rate_limit_enabled:
+            return
+        for kind, field_name in RATE_LIMIT_RULES.get(scope, ()):
+            per_minute = getattr(settings, field_name)
+            value = keys.get(kind)
+            if per_minute <= 0 or not value:
+                continue
+            decision = await self._take(f"{scope}:{kind}:{value}", rate=per_minute / 60.0, capacity=per_minute)
+            if not decision.allowed:
+                PUBLIC_REJECTIONS.labels(scope=scope, reason=f"rate_{kind}").inc()
+                raise RateLimitExceeded(scope, kind, decision.retry_after)
+
+
+class AdmissionController:
+    """Counts in-flight requests per scope and rejects past the configured cap without waiting."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def inflight(self, scope: str) -> int:
+        return self._inflight.get(scope, 0)
+
+    @contextmanager
+    def admit(self, scope: str, settings: Settings | None = None) -> Iterator[None]:
+        settings = settings or get_settings()
+        field_name = ADMISSION_LIMITS.get(scope)
+        limit = getattr(settings, field_name) if field_name else 0
+        with self._lock:
+            current = self._inflight.get(scope, 0)
+            if limit > 0 and current >= limit:
+                PUBLIC_REJECTIONS.labels(scope=scope, reason="admission").inc()
+                raise AdmissionRejected(scope, limit)
+            self._inflight[scope] = current + 1
+            ADMISSION_INFLIGHT.labels(scope=scope).set(current + 1)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._inflight[scope] -= 1
+                ADMISSION_INFLIGHT.labels(scope=scope).set(self._inflight[scope])
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(get_settings())
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController()
@@ -0,0 +1,231 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Protocol
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import (
+    SESSION_MEMORY_BYTES,
+    SESSION_MEMORY_EVICTIONS,
+    SESSION_MEMORY_RESIDENT_BYTES,
+    record_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_INTENTS = ("tracking", "policy")
+FOLLOW_UP_PREFIXES = ("그럼", "그러면", "그건", "그거", "그것", "이건", "저건", "그리고", "그래서")
+FOLLOW_UP_SUFFIXES = ("은요", "는요", "도요", "이요")
+MAX_TURN_CHARS = 200
+
+
+@dataclass
+class SessionTurn:
+    user: str
+    intent: str
+
+
+@dataclass
+class SessionMemory:
+    """Compact per-session context: the last few user turns plus the last resolved intent and entities."""
+
+    turns: list[SessionTurn] = field(default_factory=list)
+    last_intent: str | None = None
+    last_entities: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any] | None) -> "SessionMemory":
+        if not payload:
+            return cls()
+        return cls(
+            turns=[
+                SessionTurn(user=str(item["user"]), intent=str(item["intent"])) for item in payload.get("turns") or []
+            ],
+            last_intent=payload.get("last_intent"),
+            last_entities={str(key): str(value) for key, value in (payload.get("last_entities") or {}).items()},
+        )
+
+    @property
+    def last_user_message(self) -> str | None:
+        return self.turns[-1].user if self.turns else None
+
+    def size_bytes(self) -> int:
+        return len(json.dumps(self.to_dict(), ensure_ascii=False).encode("utf-8"))
+
+    def remember(
+        self,
+        *,
+        user_message: str,
+        intent: str,
+        entities: dict[str, Any] | None,
+        resolved: bool,
+        max_turns: int,
+        max_bytes: int,
+    ) -> int:
+        """Append a turn and trim to the caps; returns the encoded size in bytes."""
+        self.turns.append(SessionTurn(user=user_message.strip()[:MAX_TURN_CHARS], intent=intent))
+        del self.turns[: max(0, len(self.turns) - max_turns)]
+        if resolved and intent in RESOLVED_INTENTS:
+            self.last_intent = intent
+            kept = {key: str(value) for key, value in (entities or {}).items() if value}
+            # A policy follow-up must not lose the tracking number given earlier in the session.
+            self.last_entities = {**self.last_entities, **kept}
+        size = self.size_bytes()
+        while self.turns and size > max_bytes:
+            self.turns.pop(0)
+            size = self.size_bytes()
+        return size
+
+
+def is_follow_up(message: str) -> bool:
+    compact = message.strip().replace(" ", "").rstrip("?")
+    return compact.startswith(FOLLOW_UP_PREFIXES) or compact.endswith(FOLLOW_UP_SUFFIXES)
+
+
+def contextualize_question(message: str, memory: SessionMemory | None) -> str:
+    """
+    Prefix an elliptical follow-up ("그럼 교환은요?") with the previous question so retrieval has a topic.
+    Only meant for retrieval, and only once the session's intent was carried over to the message.
+    """
+    if memory is None or not memory.last_user_message or not is_follow_up(message):
+        return message
+    return f"{memory.last_user_message} {message.strip()}"
+
+
+class SessionMemoryStore(Protocol):
+    def get(self, tenant_id: str, session_id: str) -> SessionMemory | None: ...
+
+    def put(self, tenant_id: str, session_id: str, memory: SessionMemory) -> None: ...
+
+
+class InMemorySessionStore:
+    """Process-local TTL + LRU store; entries are kept encoded so resident size is exact."""
+
+    def __init__(self, *, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: tuple[str, str], reason: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+        SESSION_MEMORY_EVICTIONS.labels(reason=reason).inc()
+
+    def get(self, tenant_id: str, session_id: str) -> SessionMemory | None:
+        key = (tenant_id, session_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key, "ttl")
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            SESSION_MEMORY_RESIDENT_BYTES.set(self._bytes)
+        if entry is None:
+            return None
+        return SessionMemory.from_dict(json.loads(entry[1]))
+
+    def put(self, tenant_id: str, session_id: str, memory: SessionMemory) -> None:
+        key = (tenant_id, session_id)
+        payload = json.dumps(memory.to_dict(), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key)[1])
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_sessions:
+                self._drop(next(iter(self._entries)), "lru")
+            SESSION_MEMORY_RESIDENT_BYTES.set(self._bytes)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._entries), "bytes": self._bytes}
+
+
+class SupabaseSessionStore:
+    """Shared store so every replica sees the same session; expiry is enforced by `expires_at`."""
+
+    def __init__(self, repo, *, ttl_seconds: float):
+        self.repo = repo
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, tenant_id: str, session_id: str) -> SessionMemory | None:
+        payload = self.repo.get_session_memory(tenant_id=tenant_id, session_id=session_id)
+        return SessionMemory.from_dict(payload) if payload is not None else None
+
+    def put(self, tenant_id: str, session_id: str, memory: SessionMemory) -> None:
+        self.repo.save_session_memory(
+            tenant_id=tenant_id,
+            session_id=session_id,
+            memory=memory.to_dict(),
+            expires_at=datetime.now(tz=timezone.utc) + timedelta(seconds=self.ttl_seconds),
+        )
+
+
+def build_session_store(settings: Settings) -> SessionMemoryStore:
+    if settings.session_memory_backend == "supabase":
+        from app.repositories.supabase_repo import get_supabase_repo
+
+        return SupabaseSessionStore(get_supabase_repo(), ttl_seconds=settings.session_memory_ttl_seconds)
+    return InMemorySessionStore(
+        ttl_seconds=settings.session_memory_ttl_seconds,
+        max_sessions=settings.session_memory_max_sessions,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionMemoryStore:
+    return build_session_store(get_settings())
+
+
+def load_session_memory(settings: Settings, tenant_id: str, session_id: str) -> SessionMemory | None:
+    if not settings.session_memory_enabled or not session_id:
+        return None
+    try:
+        memory = get_session_store().get(tenant_id, session_id)
+    except Exception as exc:
+        # Memory only sharpens follow-ups; a shared-store outage must not fail the turn.
+        logger.warning("session memory read failed: %s", exc)
+        return None
+    record_cache("session_memory", memory is not None)
+    return memory
+
+
+def save_session_turn(
+    settings: Settings,
+    *,
+    tenant_id: str,
+    session_id: str,
+    memory: SessionMemory | None,
+    user_message: str,
+    intent: str,
+    entities: dict[str, Any] | None,
+    resolved: bool,
+) -> None:
+    if not settings.session_memory_enabled or not session_id:
+        return
+    memory = memory or SessionMemory()
+    size = memory.remember(
+        user_message=user_message,
+        intent=intent,
+        entities=entities,
+        resolved=resolved,
+        max_turns=max(1, settings.session_memory_max_turns),
+        max_bytes=settings.session_memory_max_bytes,
+    )
+    SESSION_MEMORY_BYTES.observe(size)
+    try:
+        get_session_store().put(tenant_id, session_id, memory)
+    except Exception as exc:
+        logger.warning("session memory write failed: %s", exc)
@@ -0,0 +1,163 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.core.config import Settings, reload_settings
+from app.rag.retriever import get_rag_service
+from app.repositories.supabase_repo import get_async_supabase_repo, get_supabase_repo
+from app.services.classifier import get_intent_classifier
+from app.services.rate_limit import get_rate_limiter
+from app.services.session_memory import get_session_store
+
+
+logger = logging.getLogger(__name__)
+
+# Read once by threads/executors/middleware created at startup; a new value needs a restart.
+RESTART_REQUIRED_FIELDS = (
+    "app_env",
+    "service_name",
+    "cors_allowed_origins",
+    "sentry_dsn",
+    "tracing_buffer_size",
+    "tracing_otlp_endpoint",
+    "tracing_sentry_spans",
+    "startup_warmup_enabled",
+    "startup_warmup_timeout_seconds",
+    "health_probe_interval_seconds",
+    "usage_flush_interval_seconds",
+    "speculative_retrieval_workers",
+    "crewai_review_workers",
+    "naver_autoreply_worker_enabled",
+    "naver_autoreply_worker_interval_seconds",
+)
+
+_RELOAD_LOCK = threading.Lock()
+
+
+def _matches(field_name: str, patterns: tuple[str, ...]) -> bool:
+    # Entries ending in "_" are prefixes (e.g. "pinecone_"), the rest exact field names.
+    return any(field_name.startswith(item) if item.endswith("_") else field_name == item for item in patterns)
+
+
+def _set_settings(instance: Any, settings: Settings) -> None:
+    instance.settings = settings
+
+
+@dataclass(frozen=True)
+class ReloadableComponent:
+    """
+    A cached singleton that holds a Settings reference.
+    Changes to `rebuild_on` fields (connections, clients) rebuild it; any other change is applied
+    in place so warm connections and caches survive.
+    """
+
+    name: str
+    getter: Callable[[], Any]
+    rebuild_on: tuple[str, ...]
+    apply: Callable[[Any, Settings], None] = _set_settings
+
+
+def _apply_session_store(store: Any, settings: Settings) -> None:
+    store.ttl_seconds = settings.session_memory_ttl_seconds
+    if hasattr(store, "max_sessions"):
+        store.max_sessions = max(1, settings.session_memory_max_sessions)
+
+
+_SUPABASE_CLIENT_FIELDS = ("supabase_url", "supabase_service_role_key", "token_encryption_key")
+
+COMPONENTS: list[ReloadableComponent] = [
+    ReloadableComponent("supabase_repo", get_supabase_repo, _SUPABASE_CLIENT_FIELDS),
+    ReloadableComponent("async_supabase_repo", get_async_supabase_repo, _SUPABASE_CLIENT_FIELDS + ("supabase_http_",)),
+    ReloadableComponent(
+        "rag_service",
+        get_rag_service,
+        (
+            "retriever_backend",
+            "pinecone_",
+            "embedding_",
+            "openai_api_key",
+            "gemini_api_key",
+            "reranker",
+            "reranker_onnx_",
+            "reranker_max_length",
+            "sparse_index_dir",
+            "index_version_store",
+            "index_version_pointer_path",
+        )
+        # The supabase version store holds the repository client.
+        + _SUPABASE_CLIENT_FIELDS,
+    ),
+    # Model names are resolved per call and chat clients are cached by (provider, model, key).
+    ReloadableComponent("intent_classifier", get_intent_classifier, ()),
+    ReloadableComponent("session_store", get_session_store, ("session_memory_backend",), _apply_session_store),
+    # Per-minute limits are read per check; the shared store holds the async repository built above.
+    ReloadableComponent(
+        "rate_limiter",
+        get_rate_limiter,
+        ("rate_limit_backend", "rate_limit_max_keys") + _SUPABASE_CLIENT_FIELDS + ("supabase_http_",),
+    ),
+]
+
+
+@dataclass
+class ReloadResult:
+    changed: list[str] = field(default_factory=list)
+    rebuilt: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    restart_required: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+    retired: list[Any] = field(default_factory=list)
+
+
+def changed_fields(previous: Settings, current: Settings) -> list[str]:
+    before, after = previous.model_dump(), current.model_dump()
+    return sorted(name for name in after if before.get(name) != after[name])
+
+
+def apply_settings(
+    previous: Settings,
+    current: Settings,
+    components: list[ReloadableComponent] | None = None,
+) -> ReloadResult:
+    """Propagate a settings swap to the cached components, touching only those whose inputs changed."""
+    result = ReloadResult(changed=changed_fields(previous, current))
+    result.restart_required = [name for name in result.changed if name in RESTART_REQUIRED_FIELDS]
+    if not result.changed:
+        return result
+
+    for component in COMPONENTS if components is None else components:
+        if component.getter.cache_info().currsize == 0:
+            # Never built: the next get_* call constructs it from the new settings.
+            continue
+        instance = component.getter()
+        if any(_matches(name, component.rebuild_on) for name in result.changed):
+            component.getter.cache_clear()
+            result.retired.append(instance)
+            try:
+                component.getter()
+                result.rebuilt.append(component.name)
+            except Exception as exc:
+                # Left uncached; it is rebuilt (and fails loudly) on next use.
+                component.getter.cache_clear()
+                result.errors[component.name] = str(exc)
+                logger.warning("settings reload: rebuilding %s failed: %s", component.name, exc)
+        else:
+            component.apply(instance, current)
+            result.updated.append(component.name)
+    return result
+
+
+def reload_application_settings() -> ReloadResult:
+    """Re-read configuration, swap it atomically and refresh dependent components."""
+    with _RELOAD_LOCK:
+        previous, current = reload_settings()
+        result = apply_settings(previous, current)
+    logger.info(
+        "settings reloaded changed=%s rebuilt=%s updated=%s restart_required=%s",
+        result.changed,
+        result.rebuilt,
+        result.updated,
+        result.restart_required,
+    )
+    return result
@@ -0,0 +1,162 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import record_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Per-tenant overrides read from tenant_settings.config. Connection-level settings (API keys,
+# index host, backend) stay global: tenants share clients. The namespace prefix is global too,
+# because ingest, the active-version pointer, the sparse index, the answer cache and GC are not
+# keyed by tenant; a tenant prefix would only redirect the dense query.
+TENANT_OVERRIDABLE_FIELDS = (
+    "llm_primary_provider",
+    "openai_model_classifier",
+    "openai_model_generation",
+    "openai_model_generation_upgrade",
+    "gemini_model_classifier",
+    "gemini_model_generation",
+    "gemini_model_generation_upgrade",
+    "retriever_k",
+    "reranker_top_n",
+    "generation_context_token_budget",
+    "generation_upgrade_context_token_budget",
+    "classification_confidence_threshold",
+    "source_score_threshold",
+    "sparse_score_threshold",
+    "faq_direct_answer_enabled",
+    "faq_direct_score_threshold",
+    "faq_direct_sparse_min_words",
+    "default_answer_closing",
+    "default_courier_code",
+    "tenant_max_concurrency",
+    "tenant_max_queue",
+    "tenant_queue_timeout_seconds",
+    "chat_coalescing_enabled",
+    "answer_cache_enabled",
+)
+
+_SCOPED: contextvars.ContextVar[Settings | None] = contextvars.ContextVar("shop_ai_tenant_settings", default=None)
+
+
+@contextmanager
+def tenant_scope(settings: Settings) -> Iterator[None]:
+    """Resolve settings inside the block (graph nodes, RAG, classifier) to one tenant's effective settings."""
+    token = _SCOPED.set(settings)
+    try:
+        yield
+    finally:
+        _SCOPED.reset(token)
+
+
+def scoped_settings(default: Settings) -> Settings:
+    return _SCOPED.get() or default
+
+
+class TenantScopedSettings:
+    """Descriptor for long-lived services: `self.settings` follows the active tenant_scope()."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._attr = f"_{name}"
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        return _SCOPED.get() or instance.__dict__[self._attr]
+
+    def __set__(self, instance: Any, value: Settings) -> None:
+        instance.__dict__[self._attr] = value
+
+
+def apply_tenant_overrides(base: Settings, overrides: dict[str, Any] | None) -> Settings:
+    """Overlay whitelisted, type-valid overrides; anything else is logged and ignored."""
+    update: dict[str, Any] = {}
+    for name, value in (overrides or {}).items():
+        if name not in TENANT_OVERRIDABLE_FIELDS:
+            logger.warning("ignoring non-overridable tenant setting %s", name)
+            continue
+        try:
+            update[name] = TypeAdapter(Settings.model_fields[name].annotation).validate_python(value)
+        except ValidationError as exc:
+            logger.warning("ignoring invalid tenant setting %s: %s", name, exc.errors()[0]["msg"])
+    return base.model_copy(update=update) if update else base
+
+
+class TenantConfigCache:
+    """
+    TTL cache of effective per-tenant Settings, rebuilt when the global settings are reloaded.
+    tenant_id comes from the client, so entries are capped and the least recently used is evicted.
+    """
+
+    def __init__(self, loader=None):
+        self._loader = loader or _load_from_supabase
+        self._entries: OrderedDict[str, tuple[float, Settings, Settings]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, tenant_id: str, base: Settings | None = None) -> Settings | None:
+        base = base or get_settings()
+        entry = self._entries.get(tenant_id)
+        if entry is None or entry[1] is not base or entry[0] <= time.monotonic():
+            return None
+        return entry[2]
+
+    def get(self, tenant_id: str, base: Settings | None = None) -> Settings:
+        """Effective settings for `tenant_id`: `base` (the global settings by default) plus its overrides."""
+        base = base or get_settings()
+        settings = self.cached(tenant_id, base)
+        record_cache("tenant_config", settings is not None)
+        if settings is not None:
+            with self._lock:
+                if tenant_id in self._entries:
+                    self._entries.move_to_end(tenant_id)
+            return settings
+        if not tenant_id:
+            return base
+        try:
+            settings = apply_tenant_overrides(base, self._loader(tenant_id))
+        except Exception as exc:
+            logger.warning("tenant config load failed for %s: %s", tenant_id, exc)
+            stale = self._entries.get(tenant_id)
+            # Keep serving the last known config (or the global one) until the next refresh.
+            settings = stale[2] if stale is not None and stale[1] is base else base
+        with self._lock:
+            self._entries[tenant_id] = (time.monotonic() + base.tenant_config_ttl_seconds, base, settings)
+            self._entries.move_to_end(tenant_id)
+            while len(self._entries) > max(1, base.tenant_config_max_entries):
+                self._entries.popitem(last=False)
+        return settings
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, tenant_id: str | None = None) -> None:
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
+
+
+def _load_from_supabase(tenant_id: str) -> dict[str, Any]:
+    from app.repositories.supabase_repo import get_supabase_repo
+
+    return get_supabase_repo().get_tenant_config(tenant_id) or {}
+
+
+@lru_cache(maxsize=1)
+def get_tenant_config_cache() -> TenantConfigCache:
+    return TenantConfigCache()
+
+
+def get_tenant_settings(tenant_id: str, base: Settings | None = None) -> Settings:
+    return get_tenant_config_cache().get(tenant_id, base)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator
+
+from app.core.config import Settings
+from app.core.metrics import TENANT_QUEUE_WAIT, TENANT_REJECTIONS
+
+
+logger = logging.getLogger(__name__)
+
+
+class TenantBusyError(RuntimeError):
+    def __init__(self, tenant_id: str, reason: str):
+        super().__init__(f"tenant {tenant_id} is over its concurrency limit ({reason})")
+        self.tenant_id = tenant_id
+        self.reason = reason
+
+
+class TenantLimiter:
+    """
+    Per-tenant concurrency slots with a bounded FIFO wait queue, so a spike from one tenant
+    queues (and then sheds) on its own instead of filling the shared worker threads.
+    Runs on the server's event loop; not thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._active: dict[str, int] = {}
+        self._waiters: dict[str, deque[asyncio.Future]] = {}
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        tenants = set(self._active) | {tenant for tenant, waiters in self._waiters.items() if waiters}
+        return {
+            tenant: {"active": self._active.get(tenant, 0), "queued": len(self._waiters.get(tenant, ()))}
+            for tenant in sorted(tenants)
+        }
+
+    async def _acquire(self, tenant_id: str, limit: int, max_queue: int, timeout_seconds: float) -> None:
+        waiters = self._waiters.setdefault(tenant_id, deque())
+        active = self._active.get(tenant_id, 0)
+        if active < limit and not waiters:
+            self._active[tenant_id] = active + 1
+            return
+        if len(waiters) >= max_queue:
+            TENANT_REJECTIONS.labels(reason="queue_full").inc()
+            raise TenantBusyError(tenant_id, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, timeout_seconds)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait timed out; give it back.
+                self._release(tenant_id)
+            else:
+                try:
+                    waiters.remove(future)
+                except ValueError:
+                    pass
+            TENANT_REJECTIONS.labels(reason="queue_timeout").inc()
+            raise TenantBusyError(tenant_id, "queue_timeout") from None
+        finally:
+            TENANT_QUEUE_WAIT.observe(time.perf_counter() - started)
+
+    def _release(self, tenant_id: str) -> None:
+        waiters = self._waiters.get(tenant_id)
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                # Hand the slot straight to the next waiter; the active count is unchanged.
+                future.set_result(None)
+                return
+        remaining = self._active.get(tenant_id, 1) - 1
+        if remaining > 0:
+            self._active[tenant_id] = remaining
+        else:
+            self._active.pop(tenant_id, None)
+            self._waiters.pop(tenant_id, None)
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str, settings: Settings) -> AsyncIterator[None]:
+        """Hold one of the tenant's `tenant_max_concurrency` slots (0 = unlimited) for the block."""
+        if settings.tenant_max_concurrency <= 0:
+            yield
+            return
+        await self._acquire(
+            tenant_id,
+            settings.tenant_max_concurrency,
+            max(0, settings.tenant_max_queue),
+            settings.tenant_queue_timeout_seconds,
+        )
+        try:
+            yield
+        finally:
+            self._release(tenant_id)
+
+
+@lru_cache(maxsize=1)
+def get_tenant_limiter() -> TenantLimiter:
+    return TenantLimiter()
@@ -0,0 +1,332 @@
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Iterator
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+
+from app.core.config import Settings
+from app.core.metrics import LLM_TOKENS
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+_TENANT: contextvars.ContextVar[str | None] = contextvars.ContextVar("shop_ai_usage_tenant", default=None)
+_PURPOSE: contextvars.ContextVar[str | None] = contextvars.ContextVar("shop_ai_usage_purpose", default=None)
+
+
+@contextmanager
+def usage_scope(tenant_id: str) -> Iterator[None]:
+    """Attribute LLM/embedding usage inside the block to `tenant_id`."""
+    token = _TENANT.set(tenant_id)
+    try:
+        yield
+    finally:
+        _TENANT.reset(token)
+
+
+@contextmanager
+def purpose_scope(purpose: str) -> Iterator[None]:
+    token = _PURPOSE.set(purpose)
+    try:
+        yield
+    finally:
+        _PURPOSE.reset(token)
+
+
+def current_tenant() -> str:
+    return _TENANT.get() or DEFAULT_TENANT
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+UsageKey = tuple[str, str, str, str]  # tenant_id, purpose, provider, model
+
+
+class UsageAggregator:
+    """
+    In-memory usage per (tenant, purpose, provider, model) since the last flush,
+    plus per-tenant daily totals for budget checks. Daily totals are process-local:
+    they are seeded once from llm_usage when the flusher starts, then only count
+    this process's own calls, so other instances' usage after startup is not seen.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[UsageKey, UsageTotals] = {}
+        self._window_start = datetime.now(tz=timezone.utc)
+        self._daily: dict[tuple[str, date], int] = {}
+
+    def record(
+        self,
+        *,
+        tenant_id: str,
+        purpose: str,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        key = (tenant_id, purpose, provider, model)
+        today = datetime.now(tz=timezone.utc).date()
+        with self._lock:
+            totals = self._pending.setdefault(key, UsageTotals())
+            totals.calls += 1
+            totals.input_tokens += input_tokens
+            totals.output_tokens += output_tokens
+            daily_key = (tenant_id, today)
+            self._daily[daily_key] = self._daily.get(daily_key, 0) + input_tokens + output_tokens
+
+    def seed_daily(self, rows: list[dict[str, Any]]) -> None:
+        """Add already-flushed llm_usage rows from today (UTC) to the budget counters."""
+        today = datetime.now(tz=timezone.utc).date()
+        with self._lock:
+            for row in rows:
+                window_start = datetime.fromisoformat(str(row["window_start"]))
+                if window_start.astimezone(timezone.utc).date() != today:
+                    continue
+                daily_key = (row["tenant_id"], today)
+                tokens = int(row.get("total_tokens") or 0)
+                self._daily[daily_key] = self._daily.get(daily_key, 0) + tokens
+
+    def tokens_today(self, tenant_id: str) -> int:
+        today = datetime.now(tz=timezone.utc).date()
+        with self._lock:
+            return self._daily.get((tenant_id, today), 0)
+
+    def _rows(self, pending: dict[UsageKey, UsageTotals], window_start: datetime, window_end: datetime) -> list[dict]:
+        return [
+            {
+                "tenant_id": tenant_id,
+                "purpose": purpose,
+                "provider": provider,
+                "model": model,
+                "calls": totals.calls,
+                "input_tokens": totals.input_tokens,
+                "output_tokens": totals.output_tokens,
+                "total_tokens": totals.total_tokens,
+                "window_start": window_start.isoformat(),
+                "window_end": window_end.isoformat(),
+            }
+            for (tenant_id, purpose, provider, model), totals in pending.items()
+        ]
+
+    def pending_rows(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return self._rows(dict(self._pending), self._window_start, datetime.now(tz=timezone.utc))
+
+    def drain(self) -> list[dict[str, Any]]:
+        now = datetime.now(tz=timezone.utc)
+        with self._lock:
+            pending, window_start = self._pending, self._window_start
+            self._pending = {}
+            self._window_start = now
+            # Keep only today's budget counters.
+            self._daily = {key: value for key, value in self._daily.items() if key[1] == now.date()}
+        return self._rows(pending, window_start, now)
+
+    def restore(self, rows: list[dict[str, Any]]) -> None:
+        """Put back rows whose flush failed so the next flush retries them."""
+        with self._lock:
+            for row in rows:
+                key = (row["tenant_id"], row["purpose"], row["provider"], row["model"])
+                totals = self._pending.setdefault(key, UsageTotals())
+                totals.calls += int(row["calls"])
+                totals.input_tokens += int(row["input_tokens"])
+                totals.output_tokens += int(row["output_tokens"])
+
+
+_AGGREGATOR = UsageAggregator()
+
+
+def get_usage_aggregator() -> UsageAggregator:
+    return _AGGREGATOR
+
+
+def record_usage(*, provider: str, model: str, input_tokens: int, output_tokens: int, purpose: str | None = None) -> None:
+    purpose = purpose or _PURPOSE.get() or "unknown"
+    _AGGREGATOR.record(
+        tenant_id=current_tenant(),
+        purpose=purpose,
+        provider=provider,
+        model=model,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+    )
+    LLM_TOKENS.labels(provider=provider, purpose=purpose, direction="input").inc(input_tokens)
+    LLM_TOKENS.labels(provider=provider, purpose=purpose, direction="output").inc(output_tokens)
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                input_tokens += int(usage.get("input_tokens") or 0)
+                output_tokens += int(usage.get("output_tokens") or 0)
+    if input_tokens or output_tokens:
+        return input_tokens, output_tokens
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return int(token_usage.get("prompt_tokens") or 0), int(token_usage.get("completion_tokens") or 0)
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Attached to cached chat models; purpose and tenant come from the calling context."""
+
+    run_inline = True
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        try:
+            input_tokens, output_tokens = _token_usage(response)
+            record_usage(
+                provider=self.provider,
+                model=self.model,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+            )
+        except Exception:  # pragma: no cover - accounting must never fail a request
+            logger.debug("failed to record LLM usage", exc_info=True)
+
+
+class MeteredEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that records usage with purpose="embedding".
+    LangChain embedding clients drop the provider's usage field, so tokens are estimated.
+    """
+
+    def __init__(self, inner: Any, *, provider: str, model: str):
+        self._inner = inner
+        self.provider = provider
+        self.model = model
+
+    def _record(self, texts: list[str]) -> None:
+        from app.rag.context_builder import estimate_tokens
+
+        record_usage(
+            provider=self.provider,
+            model=self.model,
+            input_tokens=sum(estimate_tokens(text) for text in texts),
+            output_tokens=0,
+            purpose="embedding",
+        )
+
+    def embed_query(self, text: str) -> list[float]:
+        vector = self._inner.embed_query(text)
+        self._record([text])
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._inner.embed_documents(texts)
+        self._record(list(texts))
+        return vectors
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+
+def token_budget_for(settings: Settings, tenant_id: str) -> int:
+    """USAGE_TENANT_TOKEN_BUDGETS=tenant-a:200000,tenant-b:50000 overrides USAGE_DAILY_TOKEN_BUDGET."""
+    for item in settings.usage_tenant_token_budgets.split(","):
+        name, _, value = item.partition(":")
+        if name.strip() == tenant_id and value.strip().isdigit():
+            return int(value.strip())
+    return settings.usage_daily_token_budget
+
+
+def is_over_budget(settings: Settings, tenant_id: str) -> bool:
+    """Per-process check: see UsageAggregator for how daily totals are seeded."""
+    budget = token_budget_for(settings, tenant_id)
+    return budget > 0 and _AGGREGATOR.tokens_today(tenant_id) >= budget
+
+
+def flush_usage(repo: Any | None = None) -> int:
+    rows = _AGGREGATOR.drain()
+    if not rows:
+        return 0
+    try:
+        if repo is None:
+            from app.repositories.supabase_repo import get_supabase_repo
+
+            repo = get_supabase_repo()
+        repo.insert_llm_usage(rows)
+    except Exception:
+        logger.exception("failed to flush LLM usage; will retry")
+        _AGGREGATOR.restore(rows)
+        return 0
+    return len(rows)
+
+
+def seed_daily_usage(repo: Any | None = None) -> bool:
+    """Start today's budget counters from rows earlier processes already flushed."""
+    since = datetime.now(tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        if repo is None:
+            from app.repositories.supabase_repo import get_supabase_repo
+
+            repo = get_supabase_repo()
+        rows = repo.list_llm_usage(since=since)
+    except Exception:
+        logger.exception("failed to seed daily LLM usage; budgets start from zero")
+        return False
+    _AGGREGATOR.seed_daily(rows)
+    return True
+
+
+_FLUSHER_LOCK = threading.Lock()
+_FLUSHER_STOP_EVENT = threading.Event()
+_FLUSHER_THREAD: threading.Thread | None = None
+
+
+def _flusher_loop(interval_seconds: float) -> None:
+    # Seeded here rather than in start_usage_flusher so a slow Supabase does not hold up startup.
+    seed_daily_usage()
+    while not _FLUSHER_STOP_EVENT.wait(interval_seconds):
+        flush_usage()
+
+
+def start_usage_flusher(settings: Settings) -> bool:
+    global _FLUSHER_THREAD
+    with _FLUSHER_LOCK:
+        if _FLUSHER_THREAD and _FLUSHER_THREAD.is_alive():
+            return False
+        _FLUSHER_STOP_EVENT.clear()
+        _FLUSHER_THREAD = threading.Thread(
+            target=_flusher_loop,
+            args=(max(1.0, settings.usage_flush_interval_seconds),),
+            name="llm-usage-flusher",
+            daemon=True,
+        )
+        _FLUSHER_THREAD.start()
+        return True
+
+
+def stop_usage_flusher() -> None:
+    global _FLUSHER_THREAD
+    with _FLUSHER_LOCK:
+        thread = _FLUSHER_THREAD
+        _FLUSHER_THREAD = None
+        _FLUSHER_STOP_EVENT.set()
+    if thread and thread.is_alive():
+        thread.join(timeout=2.0)
+    flush_usage()
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from app.core.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+_STATE_LOCK = threading.Lock()
+_STATE: dict[str, Any] = {"status": "skipped", "steps": {}, "duration_ms": 0}
+_DONE = threading.Event()
+
+
+def warmup_status() -> dict[str, Any]:
+    """skipped (not enabled) | warming | ok | degraded (some step failed), plus per-step results."""
+    with _STATE_LOCK:
+        return {"status": _STATE["status"], "steps": dict(_STATE["steps"]), "duration_ms": _STATE["duration_ms"]}
+
+
+def _warm_support_graph(settings: Settings) -> None:
+    from app.agents.langgraph.support_graph import get_support_graph
+
+    get_support_graph()
+
+
+def _warm_rag_service(settings: Settings) -> None:
+    from app.rag.retriever import get_rag_service
+
+    get_rag_service().warm()
+
+
+def _warm_llm_clients(settings: Settings) -> None:
+    from app.services.classifier import get_intent_classifier
+    from app.services.llm_provider import warm_chat_models
+
+    get_intent_classifier()
+    warm_chat_models(settings)
+
+
+def _warm_crewai(settings: Settings) -> None:
+    if settings.crewai_review_enabled:
+        import crewai  # noqa: F401
+
+
+WARMUP_STEPS: dict[str, Callable[[Settings], None]] = {
+    "support_graph": _warm_support_graph,
+    "rag_service": _warm_rag_service,
+    "llm_clients": _warm_llm_clients,
+    "crewai": _warm_crewai,
+}
+
+
+def run_warmup(settings: Settings) -> dict[str, Any]:
+    """Run every step, recording failures instead of raising: a cold dependency must not block startup."""
+    with _STATE_LOCK:
+        _STATE.update(status="warming", steps={}, duration_ms=0)
+    _DONE.clear()
+    started = time.perf_counter()
+    failed = False
+    for name, step in WARMUP_STEPS.items():
+        step_started = time.perf_counter()
+        try:
+            step(settings)
+            result = {"status": "ok"}
+        except Exception as exc:
+            failed = True
+            logger.warning("warmup step %s failed: %s", name, exc)
+            result = {"status": "fail", "error": str(exc)}
+        result["latency_ms"] = int((time.perf_counter() - step_started) * 1000)
+        with _STATE_LOCK:
+            _STATE["steps"][name] = result
+    with _STATE_LOCK:
+        _STATE.update(status="degraded" if failed else "ok", duration_ms=int((time.perf_counter() - started) * 1000))
+    _DONE.set()
+    logger.info("warmup finished status=%s duration_ms=%d", _STATE["status"], _STATE["duration_ms"])
+    return warmup_status()
+
+
+def start_warmup(settings: Settings) -> threading.Thread | None:
+    if not settings.startup_warmup_enabled:
+        return None
+    with _STATE_LOCK:
+        _STATE.update(status="warming", steps={}, duration_ms=0)
+    _DONE.clear()
+    thread = threading.Thread(target=run_warmup, args=(settings,), name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for_warmup(timeout_seconds: float) -> bool:
+    """Block until warmup finishes; False when it is still running after `timeout_seconds`."""
+    return _DONE.wait(timeout_seconds)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of the LLM call path with and without cached prompts/chains.
+No network: the chat model is constructed with a dummy key and never invoked.
+
+    python scripts/bench_prompt_cache.py [--iterations 2000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from app.core.config import Settings  # noqa: E402
+from app.rag.retriever import GENERATION_HUMAN_PROMPT, GENERATION_PROMPT, GENERATION_SYSTEM_PROMPT  # noqa: E402
+from app.services.classifier import CLASSIFIER_PROMPT, IntentClassification  # noqa: E402
+from app.services.llm_provider import _build_chat_model, cached_chain  # noqa: E402
+
+
+INPUTS = {
+    "question": "반품은 며칠 이내에 가능한가요?",
+    "context": "[source=1 score=0.900] 수령 후 7일 이내 반품 가능",
+    "closing": "추가로 궁금하신 점 있으신가요?",
+}
+
+
+def _uncached_call(settings: Settings) -> None:
+    llm = ChatOpenAI(model=settings.openai_model_generation, temperature=0, api_key=settings.openai_api_key)
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", GENERATION_SYSTEM_PROMPT),
+            ("human", GENERATION_HUMAN_PROMPT + f"'{INPUTS['closing']}'"),
+        ]
+    )
+    chain = prompt | llm
+    chain.first.invoke({"question": INPUTS["question"], "context": INPUTS["context"]})
+    (CLASSIFIER_PROMPT | llm.with_structured_output(IntentClassification))
+
+
+def _cached_call(settings: Settings) -> None:
+    llm = _build_chat_model(settings, "openai", "generation")
+    chain = cached_chain("rag_generation", llm, lambda model: GENERATION_PROMPT | model)
+    chain.first.invoke(INPUTS)
+    cached_chain(
+        "intent_classifier",
+        llm,
+        lambda model: CLASSIFIER_PROMPT | model.with_structured_output(IntentClassification),
+    )
+
+
+def _measure(fn, settings: Settings, iterations: int) -> float:
+    fn(settings)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(settings)
+    return (time.perf_counter() - started) * 1_000_000 / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cached prompt templates and chains.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    settings = Settings(_env_file=None, openai_api_key="sk-bench", gemini_api_key="")
+    uncached = _measure(_uncached_call, settings, args.iterations)
+    cached = _measure(_cached_call, settings, args.iterations)
+    print(f"[bench] uncached: {uncached:,.1f} us/call")
+    print(f"[bench] cached:   {cached:,.1f} us/call")
+    print(f"[bench] saving:   {uncached - cached:,.1f} us/call ({uncached / max(cached, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,742 @@
+#!/usr/bin/env python3
+"""
+Load test for the API with every external dependency replaced by an in-process fake.
+LLMs, embeddings, Pinecone, SweetTracker, Naver Commerce and Supabase sleep a log-normal
+latency around a configurable median and fail at a configurable rate; the app code itself
+(graph, retriever, clients, routes, middleware) runs unmodified over httpx's ASGI transport.
+
+Reports throughput, p50/p95/p99 per scenario and a per-stage breakdown taken from the
+tracing span buffer (fake upstream calls show up as `upstream.<name>` spans).
+
+    python scripts/loadtest.py --requests 200 --concurrency 8
+    python scripts/loadtest.py --mix chat=1 --llm-ms 800 --llm-error-rate 0.05 --json out.json
+    python scripts/loadtest.py --set SPECULATIVE_RETRIEVAL_ENABLED=false --baseline out.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator
+from unittest import mock
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+import requests  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from app.api.routes import chat as chat_route, leads as leads_route  # noqa: E402
+from app.core import config  # noqa: E402
+from app.core.tracing import get_span_buffer, span  # noqa: E402
+from app.integrations.naver import client as naver_client  # noqa: E402
+from app.integrations.shipping import client as shipping_client  # noqa: E402
+from app.rag import retriever  # noqa: E402
+from app.rag.context_builder import estimate_tokens  # noqa: E402
+from app.rag.index_versions import build_version_store, promote_version  # noqa: E402
+from app.rag.ingest import _chunk_documents, collect_gold_documents  # noqa: E402
+from app.rag.sparse_index import SparseIndex, sparse_index_path  # noqa: E402
+from app.repositories import supabase_repo  # noqa: E402
+from app.services import classifier, llm_provider, rate_limit, session_memory  # noqa: E402
+from app.services.usage import MeteredEmbeddings, UsageCallbackHandler  # noqa: E402
+
+
+GOLD_DIR = ROOT / "data" / "gold"
+VERSION_TAG = "loadtest"
+NAVER_AUTOREPLY_TOKEN = "loadtest-token"
+SCENARIOS = ("chat", "track", "naver")
+# Median latency (ms) per fake upstream; roughly what production traces show.
+UPSTREAM_DEFAULTS = {
+    "llm": 450.0,
+    "embedding": 80.0,
+    "pinecone": 60.0,
+    "shipping": 180.0,
+    "naver": 150.0,
+    "supabase": 40.0,
+}
+QUESTION_PATTERN = re.compile(r"질문:\s*(.+)")
+
+
+class FakeUpstreamError(RuntimeError):
+    pass
+
+
+@dataclass
+class UpstreamProfile:
+    median_ms: float
+    error_rate: float = 0.0
+
+
+@dataclass
+class LoadTestOptions:
+    requests: int = 200
+    concurrency: int = 8
+    warmup: int = 10
+    mix: dict[str, float] = field(default_factory=lambda: {"chat": 8.0, "track": 1.0, "naver": 1.0})
+    seed: int = 7
+    jitter: float = 0.35
+    naver_batch: int = 3
+    upstreams: dict[str, UpstreamProfile] = field(
+        default_factory=lambda: {name: UpstreamProfile(median_ms) for name, median_ms in UPSTREAM_DEFAULTS.items()}
+    )
+    overrides: dict[str, str] = field(default_factory=dict)
+
+
+class FakeUpstream:
+    """One external dependency: sleeps a log-normal latency and fails at `error_rate`."""
+
+    def __init__(self, name: str, profile: UpstreamProfile, *, jitter: float, seed: int):
+        self.name = name
+        self.profile = profile
+        self.jitter = jitter
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(f"{seed}:{name}")
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, bool]:
+        with self._lock:
+            latency_ms = (
+                self._rng.lognormvariate(math.log(self.profile.median_ms), self.jitter)
+                if self.profile.median_ms > 0
+                else 0.0
+            )
+            failed = self._rng.random() < self.profile.error_rate
+            self.calls += 1
+            self.errors += int(failed)
+        return latency_ms, failed
+
+    def call(self) -> bool:
+        """Simulate one round-trip; returns False when this call should fail."""
+        latency_ms, failed = self._draw()
+        with span(f"upstream.{self.name}") as item:
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            if failed:
+                item.set_attribute("injected_error", True)
+        return not failed
+
+    async def acall(self) -> bool:
+        """`call` for async clients: waits on the event loop instead of blocking a thread."""
+        latency_ms, failed = self._draw()
+        with span(f"upstream.{self.name}") as item:
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000)
+            if failed:
+                item.set_attribute("injected_error", True)
+        return not failed
+
+
+def _question_from_prompt(prompt: Any) -> str:
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    match = QUESTION_PATTERN.search(text)
+    return match.group(1).strip() if match else text
+
+
+def _fake_intent(question: str) -> str:
+    normalized = question.replace(" ", "")
+    if classifier.TRACKING_NUMBER_PATTERN.search(question) or any(
+        word in normalized for word in classifier.TRACKING_HINT_WORDS
+    ):
+        return "tracking"
+    if any(word in normalized for word in classifier.POLICY_HINT_WORDS):
+        return "policy"
+    return "fallback"
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers from canned text; token usage is reported like a real provider."""
+
+    provider: str
+    model: str
+    upstream: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "loadtest-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if not self.upstream.call():
+            raise FakeUpstreamError(f"{self.provider} unavailable")
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = "문의하신 내용은 안내된 기준에 따라 처리됩니다. 자세한 조건은 근거 문서를 확인해 주세요."
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        def _classify(prompt):
+            self.invoke(prompt)
+            # confidence=0 lets the classifier apply its own heuristic confidence.
+            return schema.model_validate({"intent": _fake_intent(_question_from_prompt(prompt)), "confidence": 0.0})
+
+        return RunnableLambda(_classify)
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, upstream: FakeUpstream, dimension: int = 8):
+        self.upstream = upstream
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> list[float]:
+        rng = random.Random(text)
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dimension)]
+
+    def embed_query(self, text: str) -> list[float]:
+        if not self.upstream.call():
+            raise FakeUpstreamError("embedding unavailable")
+        return self._vector(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not self.upstream.call():
+            raise FakeUpstreamError("embedding unavailable")
+        return [self._vector(text) for text in texts]
+
+
+class FakeVectorStore:
+    """Stands in for PineconeVectorStore: embeds the query, then ranks the gold corpus lexically."""
+
+    def __init__(self, *, embedding: Embeddings, corpus: SparseIndex, upstream: FakeUpstream):
+        self.embedding = embedding
+        self.corpus = corpus
+        self.upstream = upstream
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, namespace=None, filter=None):
+        self.embedding.embed_query(query)
+        if not self.upstream.call():
+            raise FakeUpstreamError("pinecone unavailable")
+        return [(doc, round(score * 0.97, 4)) for doc, score in self.corpus.search(query, k, metadata_filter=filter)]
+
+
+class FakeNaverQnaStore:
+    """Unanswered QnA queue that refills from the question pool, so every drain finds work."""
+
+    def __init__(self, questions: list[str], seed: int):
+        self._questions = questions
+        self._rng = random.Random(f"{seed}:naver-qna")
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending: dict[str, dict[str, Any]] = {}
+        self.answered = 0
+
+    def list(self, size: int) -> list[dict[str, Any]]:
+        with self._lock:
+            while len(self._pending) < size:
+                question_id = str(self._next_id)
+                self._next_id += 1
+                self._pending[question_id] = {
+                    "questionId": question_id,
+                    "question": self._rng.choice(self._questions),
+                    "productName": f"BEST{self._rng.randint(1, 10):03d}",
+                    "answered": False,
+                }
+            return list(self._pending.values())[:size]
+
+    def answer(self, question_id: str) -> None:
+        with self._lock:
+            self._pending.pop(question_id, None)
+            self.answered += 1
+
+
+def _json_response(status_code: int, payload: Any) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    return response
+
+
+class FakeHTTP:
+    """Replaces the `requests` module inside the shipping and Naver clients."""
+
+    RequestException = requests.RequestException
+    Response = requests.Response
+
+    def __init__(self, *, shipping: FakeUpstream, naver: FakeUpstream, qnas: FakeNaverQnaStore):
+        self.shipping = shipping
+        self.naver = naver
+        self.qnas = qnas
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        parts = urlsplit(url)
+        if parts.hostname == urlsplit(os.environ["SWEETTRACKER_BASE_URL"]).hostname:
+            return self._shipping(parts.path)
+        return self._naver(method.upper(), parts.path, kwargs.get("params") or {})
+
+    def _shipping(self, path: str) -> requests.Response:
+        if not self.shipping.call():
+            return _json_response(503, {"msg": "injected upstream error"})
+        if path.endswith("/companylist"):
+            return _json_response(200, {"Company": [{"Code": "08", "Name": "롯데택배"}]})
+        return _json_response(
+            200,
+            {
+                "result": "Y",
+                "trackingDetails": [
+                    {"kind": "집화완료", "timeString": "2026-10-18 09:12", "where": "서울송파"},
+                    {"kind": "배송중", "timeString": "2026-10-19 06:40", "where": "옥천HUB"},
+                ],
+            },
+        )
+
+    def _naver(self, method: str, path: str, params: dict[str, Any]) -> requests.Response:
+        if not self.naver.call():
+            return _json_response(503, {"message": "injected upstream error"})
+        if path.endswith("/oauth2/token"):
+            return _json_response(200, {"access_token": "loadtest", "token_type": "Bearer", "expires_in": 10800})
+        if method == "GET" and path.endswith("/contents/qnas"):
+            return _json_response(200, {"contents": self.qnas.list(int(params.get("size") or 20))})
+        if method == "PUT" and "/contents/qnas/" in path:
+            self.qnas.answer(path.rsplit("/", 1)[-1])
+            return _json_response(200, {})
+        return _json_response(404, {"message": f"unexpected fake route {method} {path}"})
+
+
+class _FakeQuery:
+    def __init__(self, upstream: FakeUpstream):
+        self._upstream = upstream
+
+    def __getattr__(self, name: str):
+        # insert/upsert/select/eq/order/limit... all just keep building the query.
+        return lambda *args, **kwargs: self
+
+    def execute(self) -> SimpleNamespace:
+        if not self._upstream.call():
+            raise FakeUpstreamError("supabase unavailable")
+        return SimpleNamespace(data=[])
+
+
+class FakeSupabaseClient:
+    def __init__(self, upstream: FakeUpstream):
+        self._upstream = upstream
+
+    def table(self, name: str) -> _FakeQuery:
+        return _FakeQuery(self._upstream)
+
+
+class FakePostgrestTransport(httpx.AsyncBaseTransport):
+    """PostgREST behind AsyncSupabaseRepository; each request is one `supabase` upstream round-trip."""
+
+    def __init__(self, upstream: FakeUpstream):
+        self._upstream = upstream
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not await self._upstream.acall():
+            return httpx.Response(503, json={"message": "injected upstream error"}, request=request)
+        if request.method == "GET":
+            return httpx.Response(200, json=[], request=request)
+        return httpx.Response(201, request=request)
+
+
+def _read_questions(path: Path) -> list[str]:
+    with path.open(encoding="utf-8") as handle:
+        return [row["question"].strip() for row in csv.DictReader(handle) if row.get("question", "").strip()]
+
+
+def _fake_env(workdir: Path, overrides: dict[str, str]) -> dict[str, str]:
+    env = {
+        "APP_ENV": "dev",
+        "LLM_PRIMARY_PROVIDER": "gemini",
+        "GEMINI_API_KEY": "loadtest",
+        "OPENAI_API_KEY": "loadtest",
+        "PINECONE_API_KEY": "loadtest",
+        "RETRIEVER_BACKEND": "hybrid",
+        "INDEX_VERSION_STORE": "file",
+        "INDEX_VERSION_POINTER_PATH": str(workdir / "active_version.json"),
+        "SPARSE_INDEX_DIR": str(workdir),
+        "SWEETTRACKER_API_KEY": "loadtest",
+        "SWEETTRACKER_BASE_URL": "http://sweettracker.loadtest",
+        "NAVER_COMMERCE_CLIENT_ID": "loadtest",
+        "NAVER_COMMERCE_CLIENT_SECRET": bcrypt.gensalt(rounds=4).decode("utf-8"),
+        "NAVER_COMMERCE_BASE_URL": "http://naver.loadtest",
+        "NAVER_AUTOREPLY_TOKEN": NAVER_AUTOREPLY_TOKEN,
+        "NAVER_AUTOREPLY_WORKER_ENABLED": "false",
+        "SUPABASE_URL": "",
+        "SUPABASE_SERVICE_ROLE_KEY": "",
+        "CREWAI_REVIEW_ENABLED": "false",
+        "SENTRY_DSN": "",
+        "TRACING_OTLP_ENDPOINT": "",
+        "TRACING_BUFFER_SIZE": "200000",
+        # Measure the pipeline, not the abuse guards; override these to load-test the limiter itself.
+        "RATE_LIMIT_ENABLED": "false",
+        "ADMISSION_CHAT_MAX_INFLIGHT": "0",
+    }
+    env.update(overrides)
+    return env
+
+
+def _clear_caches() -> None:
+    config.get_settings.cache_clear()
+    retriever.get_rag_service.cache_clear()
+    classifier.get_intent_classifier.cache_clear()
+    supabase_repo.get_supabase_repo.cache_clear()
+    session_memory.get_session_store.cache_clear()
+    rate_limit.get_rate_limiter.cache_clear()
+
+
+def _build_corpus(settings: config.Settings) -> SparseIndex:
+    """Chunk the gold data like ingest does, write the sparse index and promote it."""
+    corpus = SparseIndex(_chunk_documents(collect_gold_documents(GOLD_DIR, version_tag=VERSION_TAG)))
+    corpus.save(sparse_index_path(settings, VERSION_TAG))
+    promote_version(build_version_store(settings), VERSION_TAG)
+    return corpus
+
+
+@contextmanager
+def fake_backends(options: LoadTestOptions) -> Iterator[dict[str, Any]]:
+    """Point settings at the fakes and patch every upstream client for the duration of the block."""
+    with tempfile.TemporaryDirectory(prefix="shop-ai-loadtest-") as tmp, ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ, _fake_env(Path(tmp), options.overrides)))
+        _clear_caches()
+        stack.callback(_clear_caches)
+        settings = config.get_settings()
+        corpus = _build_corpus(settings)
+
+        upstreams = {
+            name: FakeUpstream(name, options.upstreams[name], jitter=options.jitter, seed=options.seed)
+            for name in UPSTREAM_DEFAULTS
+        }
+        qnas = FakeNaverQnaStore(_read_questions(GOLD_DIR / "faq" / "qa.csv"), options.seed)
+        http = FakeHTTP(shipping=upstreams["shipping"], naver=upstreams["naver"], qnas=qnas)
+
+        def _chat_model(provider, model_name, api_key):
+            return FakeChatModel(
+                provider=provider,
+                model=model_name,
+                upstream=upstreams["llm"],
+                callbacks=[UsageCallbackHandler(provider, model_name)],
+            )
+
+        def _embeddings(_settings):
+            return MeteredEmbeddings(FakeEmbeddings(upstreams["embedding"]), provider="fake", model="fake-embedding")
+
+        def _vector_store(*, index, embedding):
+            return FakeVectorStore(embedding=embedding, corpus=corpus, upstream=upstreams["pinecone"])
+
+        stack.enter_context(mock.patch.dict(llm_provider._CHAT_MODEL_CACHE, clear=True))
+        stack.enter_context(mock.patch.dict(llm_provider._CHAIN_CACHE, clear=True))
+        stack.enter_context(mock.patch.object(llm_provider, "_create_chat_model", _chat_model))
+        stack.enter_context(mock.patch.object(retriever, "build_embeddings", _embeddings))
+        stack.enter_context(mock.patch("pinecone.Pinecone", lambda api_key: SimpleNamespace(Index=lambda *a, **k: None)))
+        stack.enter_context(mock.patch("langchain_pinecone.PineconeVectorStore", _vector_store))
+        stack.enter_context(mock.patch.object(shipping_client, "requests", http))
+        stack.enter_context(mock.patch.object(naver_client, "requests", http))
+        repo = supabase_repo.get_supabase_repo()
+        stack.enter_context(mock.patch.object(repo, "_client", FakeSupabaseClient(upstreams["supabase"])))
+        async_repo = supabase_repo.AsyncSupabaseRepository(
+            settings.model_copy(
+                update={"supabase_url": "http://supabase.loadtest", "supabase_service_role_key": "loadtest"}
+            ),
+            transport=FakePostgrestTransport(upstreams["supabase"]),
+        )
+        stack.enter_context(mock.patch.object(chat_route, "get_async_supabase_repo", lambda: async_repo))
+        stack.enter_context(mock.patch.object(leads_route, "get_async_supabase_repo", lambda: async_repo))
+        yield {"settings": settings, "upstreams": upstreams, "qnas": qnas}
+
+
+def _chat_questions() -> list[str]:
+    questions = _read_questions(GOLD_DIR / "faq" / "qa.csv")
+    questions += _read_questions(GOLD_DIR / "faq" / "qa_paraphrases.csv")
+    questions += [f"BEST{index:03d} 상품 소재와 사이즈 알려주세요" for index in range(1, 11)]
+    questions += ["안녕하세요", "주문 취소해줘", "오늘 날씨 어때요?"]
+    return questions
+
+
+def build_plan(options: LoadTestOptions, count: int, *, salt: str) -> list[tuple[str, dict[str, Any]]]:
+    """Deterministic list of (scenario, httpx request kwargs) for `count` requests."""
+    rng = random.Random(f"{options.seed}:{salt}")
+    questions = _chat_questions()
+    scenarios = [name for name in SCENARIOS if options.mix.get(name, 0) > 0]
+    weights = [options.mix[name] for name in scenarios]
+    plan: list[tuple[str, dict[str, Any]]] = []
+    for seq in range(count):
+        scenario = rng.choices(scenarios, weights=weights)[0]
+        tracking_number = f"{rng.randint(10**11, 10**12 - 1)}"
+        headers = {"x-request-id": f"loadtest-{salt}-{seq}"}
+        if scenario == "chat":
+            message = rng.choice(questions)
+            if rng.random() < 0.2:
+                message = f"운송장 {tracking_number} 배송 조회 부탁드려요"
+            request = {
+                "method": "POST",
+                "url": "/v1/chat/query",
+                "json": {"tenant_id": "loadtest", "session_id": f"s-{seq % 50}", "user_message": message},
+            }
+        elif scenario == "track":
+            request = {
+                "method": "POST",
+                "url": "/v1/tools/track-delivery",
+                "json": {"courier_code": "lotte", "tracking_number": tracking_number},
+            }
+        else:
+            headers["x-naver-autoreply-token"] = NAVER_AUTOREPLY_TOKEN
+            request = {
+                "method": "POST",
+                "url": "/v1/tools/naver/auto-answer-drain",
+                "json": {"tenant_id": "loadtest", "max_iterations": options.naver_batch, "size": 20},
+            }
+        request["headers"] = headers
+        plan.append((scenario, request))
+    return plan
+
+
+@dataclass
+class Sample:
+    scenario: str
+    request_id: str
+    status_code: int
+    latency_ms: float
+
+
+async def _drive(app, plan: list[tuple[str, dict[str, Any]]], concurrency: int) -> tuple[list[Sample], float]:
+    """Closed-loop load: `concurrency` clients each send their next request as soon as the last returns."""
+    samples: list[Sample] = []
+    pending = iter(plan)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+
+        async def _worker() -> None:
+            for scenario, request in pending:
+                started = time.perf_counter()
+                try:
+                    status_code = (await client.request(**request)).status_code
+                except Exception:
+                    status_code = 0
+                samples.append(
+                    Sample(
+                        scenario=scenario,
+                        request_id=request["headers"]["x-request-id"],
+                        status_code=status_code,
+                        latency_ms=(time.perf_counter() - started) * 1000,
+                    )
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; `values` need not be sorted."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _latency_summary(values: list[float]) -> dict[str, float]:
+    return {
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(max(values), 2) if values else 0.0,
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float, spans: list[Any]) -> dict[str, Any]:
+    scenario_by_request = {sample.request_id: sample.scenario for sample in samples}
+    stage_latencies: dict[str, dict[str, list[float]]] = {}
+    for item in spans:
+        scenario = scenario_by_request.get(item.trace_id)
+        if scenario is None:
+            continue
+        stage_latencies.setdefault(scenario, {}).setdefault(item.name, []).append(item.duration_ms)
+
+    report: dict[str, Any] = {}
+    for scenario in sorted({sample.scenario for sample in samples}):
+        selected = [sample for sample in samples if sample.scenario == scenario]
+        latencies = [sample.latency_ms for sample in selected]
+        stages = {
+            name: {"count": len(values), **_latency_summary(values)}
+            for name, values in stage_latencies.get(scenario, {}).items()
+        }
+        report[scenario] = {
+            "requests": len(selected),
+            "errors": sum(1 for sample in selected if not 200 <= sample.status_code < 300),
+            "status_codes": dict(Counter(str(sample.status_code) for sample in selected)),
+            "throughput_rps": round(len(selected) / elapsed, 2) if elapsed else 0.0,
+            **_latency_summary(latencies),
+            "stages": dict(sorted(stages.items(), key=lambda entry: -entry[1]["mean_ms"] * entry[1]["count"])),
+        }
+    return report
+
+
+def run_load_test(options: LoadTestOptions) -> dict[str, Any]:
+    with fake_backends(options) as fakes:
+        from app.api.main import create_app
+
+        app = create_app()
+        if options.warmup:
+            asyncio.run(_drive(app, build_plan(options, options.warmup, salt="warmup"), options.concurrency))
+        get_span_buffer().clear()
+        samples, elapsed = asyncio.run(
+            _drive(app, build_plan(options, options.requests, salt="run"), options.concurrency)
+        )
+        # Let discarded speculative retrievals finish so their spans land in the buffer.
+        time.sleep(0.05)
+        spans = get_span_buffer().spans()
+        upstreams = {
+            name: {"calls": upstream.calls, "injected_errors": upstream.errors, **asdict(upstream.profile)}
+            for name, upstream in fakes["upstreams"].items()
+        }
+    return {
+        "options": {
+            "requests": options.requests,
+            "concurrency": options.concurrency,
+            "mix": options.mix,
+            "seed": options.seed,
+            "jitter": options.jitter,
+            "overrides": options.overrides,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "scenarios": summarize(samples, elapsed, spans),
+        "upstreams": upstreams,
+    }
+
+
+def compare_to_baseline(report: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Return one message per scenario whose p95 grew or throughput shrank by more than `max_regression`."""
+    regressions: list[str] = []
+    for scenario, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{scenario}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{scenario}: throughput {previous['throughput_rps']:.2f} -> {current['throughput_rps']:.2f} req/s"
+            )
+    return regressions
+
+
+def print_report(report: dict[str, Any]) -> None:
+    options = report["options"]
+    print(
+        f"[loadtest] {options['requests']} requests, concurrency={options['concurrency']}, "
+        f"{report['elapsed_s']:.2f}s, {report['throughput_rps']:.2f} req/s"
+    )
+    print(f"{'scenario':<10}{'reqs':>6}{'err':>5}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for scenario, row in report["scenarios"].items():
+        print(
+            f"{scenario:<10}{row['requests']:>6}{row['errors']:>5}{row['throughput_rps']:>8.2f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+        )
+    for scenario, row in report["scenarios"].items():
+        print(f"\n[stages:{scenario}]")
+        print(f"  {'stage':<28}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}")
+        for name, stage in row["stages"].items():
+            print(
+                f"  {name:<28}{stage['count']:>7}{stage['mean_ms']:>9.1f}"
+                f"{stage['p50_ms']:>9.1f}{stage['p95_ms']:>9.1f}"
+            )
+    print("\n[upstreams]")
+    for name, upstream in report["upstreams"].items():
+        print(
+            f"  {name:<10} calls={upstream['calls']:<6} injected_errors={upstream['injected_errors']:<4} "
+            f"median_ms={upstream['median_ms']:g} error_rate={upstream['error_rate']:g}"
+        )
+
+
+def _parse_pairs(raw: str, value_type=float) -> dict[str, Any]:
+    pairs: dict[str, Any] = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip():
+            pairs[name.strip()] = value_type(value.strip())
+    return pairs
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the API against fake upstreams.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--mix", default="chat=8,track=1,naver=1", help="Scenario weights, e.g. chat=1,track=1")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--jitter", type=float, default=0.35, help="Log-normal sigma of upstream latency.")
+    parser.add_argument("--naver-batch", type=int, default=3, help="max_iterations per Naver drain request.")
+    for name, median_ms in UPSTREAM_DEFAULTS.items():
+        parser.add_argument(f"--{name}-ms", type=float, default=median_ms, help=f"Median {name} latency.")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Extra settings env.")
+    parser.add_argument("--json", type=Path, help="Write the report as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Previous --json report to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    options = LoadTestOptions(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        mix=_parse_pairs(args.mix),
+        seed=args.seed,
+        jitter=args.jitter,
+        naver_batch=args.naver_batch,
+        upstreams={
+            name: UpstreamProfile(
+                median_ms=getattr(args, f"{name}_ms"),
+                error_rate=getattr(args, f"{name}_error_rate"),
+            )
+            for name in UPSTREAM_DEFAULTS
+        },
+        overrides=_parse_pairs(",".join(args.set), str),
+    )
+    report = run_load_test(options)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n[loadtest] report written to {args.json}")
+    if args.baseline:
+        regressions = compare_to_baseline(
+            report,
+            json.loads(args.baseline.read_text(encoding="utf-8")),
+            args.max_regression,
+        )
+        for message in regressions:
+            print(f"[loadtest] REGRESSION {message}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
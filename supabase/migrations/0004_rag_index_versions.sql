@@ -0,0 +1,6 @@
+create table if not exists rag_index_versions (
+  tenant_id text primary key,
+  active_version text null,
+  history jsonb not null default '[]'::jsonb,
+  updated_at timestamptz not null default now()
+);
@@ -0,0 +1,17 @@
+create table if not exists llm_usage (
+  id bigserial primary key,
+  tenant_id text not null,
+  purpose text not null,
+  provider text not null,
+  model text not null,
+  calls integer not null default 0,
+  input_tokens bigint not null default 0,
+  output_tokens bigint not null default 0,
+  total_tokens bigint not null default 0,
+  window_start timestamptz not null,
+  window_end timestamptz not null,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists idx_llm_usage_tenant_window
+on llm_usage (tenant_id, window_start desc);
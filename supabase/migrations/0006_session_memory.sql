@@ -0,0 +1,11 @@
+create table if not exists session_memory (
+  tenant_id text not null,
+  session_id text not null,
+  memory jsonb not null default '{}'::jsonb,
+  expires_at timestamptz not null,
+  updated_at timestamptz not null default now(),
+  primary key (tenant_id, session_id)
+);
+
+create index if not exists idx_session_memory_expires_at
+on session_memory (expires_at);
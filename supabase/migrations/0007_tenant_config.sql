@@ -0,0 +1 @@
+alter table tenant_settings add column if not exists config jsonb not null default '{}'::jsonb;
@@ -0,0 +1,38 @@
+create table if not exists rate_limit_buckets (
+  bucket_key text primary key,
+  tokens double precision not null,
+  updated_at timestamptz not null default now()
+);
+
+create index if not exists idx_rate_limit_buckets_updated_at
+on rate_limit_buckets (updated_at);
+
+-- Refill by elapsed time, then take p_cost tokens. The upsert row lock makes this atomic across replicas.
+-- Returns 0 when allowed, otherwise the seconds until enough tokens are available.
+create or replace function take_rate_limit_token(
+  p_key text,
+  p_rate double precision,
+  p_capacity double precision,
+  p_cost double precision default 1
+)
+returns double precision
+language plpgsql
+as $$
+declare
+  v_now timestamptz := clock_timestamp();
+  v_tokens double precision;
+begin
+  insert into rate_limit_buckets as b (bucket_key, tokens, updated_at)
+  values (p_key, p_capacity, v_now)
+  on conflict (bucket_key) do update
+    set tokens = least(p_capacity, b.tokens + extract(epoch from (v_now - b.updated_at)) * p_rate),
+        updated_at = v_now
+  returning tokens into v_tokens;
+
+  if v_tokens >= p_cost then
+    update rate_limit_buckets set tokens = v_tokens - p_cost where bucket_key = p_key;
+    return 0;
+  end if;
+  return (p_cost - v_tokens) / p_rate;
+end;
+$$;
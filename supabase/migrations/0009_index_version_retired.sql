@@ -0,0 +1,3 @@
+-- Versions trimmed from the rollback window; GC deletes their namespaces and promotion refuses them.
+alter table rag_index_versions
+add column if not exists retired jsonb not null default '[]'::jsonb;
@@ -1,6 +1,7 @@
 create table if not exists tenant_settings (
   tenant_id text primary key,
   display_name text not null default '',
+  config jsonb not null default '{}'::jsonb,
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now()
 );
@@ -56,6 +57,44 @@ create table if not exists lead_signups (
   created_at timestamptz not null default now()
 );
 
+create table if not exists rag_index_versions (
+  tenant_id text primary key,
+  active_version text null,
+  history jsonb not null default '[]'::jsonb,
+  retired jsonb not null default '[]'::jsonb,
+  updated_at timestamptz not null default now()
+);
+
+create table if not exists llm_usage (
+  id bigserial primary key,
+  tenant_id text not null,
+  purpose text not null,
+  provider text not null,
+  model text not null,
+  calls integer not null default 0,
+  input_tokens bigint not null default 0,
+  output_tokens bigint not null default 0,
+  total_tokens bigint not null default 0,
+  window_start timestamptz not null,
+  window_end timestamptz not null,
+  created_at timestamptz not null default now()
+);
+
+create table if not exists session_memory (
+  tenant_id text not null,
+  session_id text not null,
+  memory jsonb not null default '{}'::jsonb,
+  expires_at timestamptz not null,
+  updated_at timestamptz not null default now(),
+  primary key (tenant_id, session_id)
+);
+
+create table if not exists rate_limit_buckets (
+  bucket_key text primary key,
+  tokens double precision not null,
+  updated_at timestamptz not null default now()
+);
+
 alter table conversation_logs add column if not exists why_fallback text;
 alter table tool_call_logs add column if not exists why_fallback text;
 alter table rag_ingest_jobs add column if not exists why_fallback text;
@@ -66,3 +105,42 @@ where why_fallback is not null;
 
 create index if not exists idx_lead_signups_created_at
 on lead_signups (created_at desc);
+
+create index if not exists idx_llm_usage_tenant_window
+on llm_usage (tenant_id, window_start desc);
+
+create index if not exists idx_session_memory_expires_at
+on session_memory (expires_at);
+
+create index if not exists idx_rate_limit_buckets_updated_at
+on rate_limit_buckets (updated_at);
+
+-- Refill by elapsed time, then take p_cost tokens. The upsert row lock makes this atomic across replicas.
+-- Returns 0 when allowed, otherwise the seconds until enough tokens are available.
+create or replace function take_rate_limit_token(
+  p_key text,
+  p_rate double precision,
+  p_capacity double precision,
+  p_cost double precision default 1
+)
+returns double precision
+language plpgsql
+as $$
+declare
+  v_now timestamptz := clock_timestamp();
+  v_tokens double precision;
+begin
+  insert into rate_limit_buckets as b (bucket_key, tokens, updated_at)
+  values (p_key, p_capacity, v_now)
+  on conflict (bucket_key) do update
+    set tokens = least(p_capacity, b.tokens + extract(epoch from (v_now - b.updated_at)) * p_rate),
+        updated_at = v_now
+  returning tokens into v_tokens;
+
+  if v_tokens >= p_cost then
+    update rate_limit_buckets set tokens = v_tokens - p_cost where bucket_key = p_key;
+    return 0;
+  end if;
+  return (p_cost - v_tokens) / p_rate;
+end;
+$$;
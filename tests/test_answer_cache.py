@@ -0,0 +1,173 @@
+from pathlib import Path
+
+import pytest
+
+from app.agents.langgraph import support_graph
+from app.core.config import Settings
+from app.rag import retriever
+from app.rag.answer_cache import (
+    AnswerCache,
+    PrecomputedAnswer,
+    answer_cache_path,
+    build_answer_cache,
+    lookup_precomputed_answer,
+    settings_fingerprint,
+)
+from app.rag.index_versions import IndexVersionPointer, collect_garbage
+from app.services.session_memory import InMemorySessionStore
+
+
+VECTORS = {
+    "반품 기간은 얼마나 되나요?": [1.0, 0.0, 0.0],
+    "반품은 며칠 안에 해야 하나요?": [0.98, 0.2, 0.0],
+    "배송 조회 1234567890": [0.0, 1.0, 0.0],
+    "회원 등급 기준이 궁금해요": [0.0, 0.0, 1.0],
+}
+
+
+def _write_faq(root: Path) -> None:
+    (root / "faq").mkdir(parents=True)
+    (root / "faq" / "qa.csv").write_text(
+        "question,answer,category,priority,last_updated\n"
+        "반품 기간은 얼마나 되나요?,수령 후 7일,returns,high,2026-02-19\n"
+        "배송 조회 1234567890,조회,shipping,high,2026-02-19\n",
+        encoding="utf-8",
+    )
+    (root / "faq" / "qa_paraphrases.csv").write_text(
+        "question,answer,category,priority,last_updated,seed_question\n"
+        "반품 기간은 얼마나 되나요 ?,수령 후 7일,returns,high,2026-02-19,반품 기간은 얼마나 되나요?\n"
+        "반품은 며칠 안에 해야 하나요?,수령 후 7일,returns,high,2026-02-19,반품 기간은 얼마나 되나요?\n",
+        encoding="utf-8",
+    )
+
+
+class _Service:
+    def __init__(self, version: str, vectors: dict[str, list[float]] | None = None) -> None:
+        self.version = version
+        self.vectors = vectors or {}
+        self.embedded: list[str] = []
+
+    def active_version(self) -> str:
+        return self.version
+
+    def embed_query(self, text: str) -> list[float] | None:
+        self.embedded.append(text)
+        return self.vectors.get(text)
+
+
+def _cache(settings: Settings, version: str, answer: str) -> AnswerCache:
+    return AnswerCache(
+        version_tag=version,
+        fingerprint=settings_fingerprint(settings),
+        entries=[
+            PrecomputedAnswer(
+                question="반품 기간은 얼마나 되나요?",
+                answer=answer,
+                intent="policy",
+                confidence=0.9,
+                sources=[{"source_id": "faq", "title": "qa.csv", "snippet": "반품", "score": 0.9}],
+                embedding=VECTORS["반품 기간은 얼마나 되나요?"],
+            )
+        ],
+    )
+
+
+def test_build_runs_each_question_once_on_the_pinned_version(tmp_path) -> None:
+    _write_faq(tmp_path)
+    settings = Settings(app_env="dev", sparse_index_dir=str(tmp_path), answer_cache_build_workers=2)
+    # A previous build of the same version must not be copied forward through the support flow.
+    _cache(settings, "v2", "이전 빌드 답변").save(answer_cache_path(settings, "v2"))
+    seen: list[tuple[str, str | None]] = []
+
+    def _answerer(question: str) -> dict:
+        assert lookup_precomputed_answer(settings, question, _Service("v2", VECTORS)) is None
+        seen.append((question, retriever._PINNED_VERSION.get()))
+        if "배송" in question:
+            return {"intent": "tracking", "route": "tracking", "answer": "배송중", "sources": []}
+        return {
+            "intent": "policy",
+            "route": "rag",
+            "confidence": 0.9,
+            "answer": "수령 후 7일 이내 반품 가능합니다.",
+            "sources": [{"source_id": "faq", "title": "qa.csv", "snippet": "반품", "score": 0.9}],
+            "needs_human": False,
+        }
+
+    cache = build_answer_cache(settings, tmp_path, "v2", answerer=_answerer, embed=VECTORS.get)
+    cache.save(answer_cache_path(settings, "v2"))
+    loaded = AnswerCache.load(answer_cache_path(settings, "v2"))
+
+    # The spacing variant of the seed is the same lookup key and is answered once.
+    assert sorted(question for question, _ in seen) == sorted(
+        ["반품 기간은 얼마나 되나요?", "배송 조회 1234567890", "반품은 며칠 안에 해야 하나요?"]
+    )
+    assert {version for _, version in seen} == {"v2"}
+    assert retriever._PINNED_VERSION.get() is None
+    assert len(loaded) == 2
+    assert loaded.exact("반품 기간은 얼마나 되나요").answer == "수령 후 7일 이내 반품 가능합니다."
+    assert loaded.exact("반품 기간은 얼마나 되나요") is not None
+    assert loaded.exact("배송 조회 1234567890") is None
+
+
+def test_lookup_matches_exact_then_embedding_per_active_version(tmp_path) -> None:
+    settings = Settings(app_env="dev", sparse_index_dir=str(tmp_path), answer_cache_similarity_threshold=0.95)
+    _cache(settings, "v1", "v1 답변").save(answer_cache_path(settings, "v1"))
+    _cache(settings, "v2", "v2 답변").save(answer_cache_path(settings, "v2"))
+    service = _Service("v1", VECTORS)
+
+    entry, match = lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요", service)
+    assert (entry.answer, match) == ("v1 답변", "exact")
+    assert service.embedded == []
+
+    entry, match = lookup_precomputed_answer(settings, "반품은 며칠 안에 해야 하나요?", service)
+    assert (entry.answer, match) == ("v1 답변", "semantic")
+    assert lookup_precomputed_answer(settings, "회원 등급 기준이 궁금해요", service) is None
+
+    service.version = "v2"
+    assert lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요?", service)[0].answer == "v2 답변"
+    service.version = "v3"
+    assert lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요?", service) is None
+
+    changed = settings.model_copy(update={"default_answer_closing": "감사합니다."})
+    service.version = "v1"
+    assert lookup_precomputed_answer(changed, "반품 기간은 얼마나 되나요?", service) is None
+
+
+def test_lookup_picks_up_a_cache_file_written_after_a_miss(tmp_path) -> None:
+    settings = Settings(app_env="dev", sparse_index_dir=str(tmp_path))
+    service = _Service("v-late", VECTORS)
+    assert lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요?", service) is None
+
+    _cache(settings, "v-late", "늦게 만든 답변").save(answer_cache_path(settings, "v-late"))
+    assert lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요?", service)[0].answer == "늦게 만든 답변"
+
+    _cache(settings, "v-late", "다시 만든 더 긴 답변").save(answer_cache_path(settings, "v-late"))
+    assert lookup_precomputed_answer(settings, "반품 기간은 얼마나 되나요?", service)[0].answer == "다시 만든 더 긴 답변"
+
+
+def test_support_flow_serves_precomputed_answer_without_running_graph(monkeypatch, tmp_path) -> None:
+    settings = Settings(app_env="dev", sparse_index_dir=str(tmp_path), index_version_keep=1)
+    _cache(settings, "v1", "수령 후 7일 이내 반품 가능합니다.").save(answer_cache_path(settings, "v1"))
+    store = InMemorySessionStore(ttl_seconds=60, max_sessions=10)
+    monkeypatch.setattr("app.services.session_memory.get_session_store", lambda: store)
+    monkeypatch.setattr(support_graph, "get_settings", lambda: settings)
+    monkeypatch.setattr(support_graph, "get_rag_service", lambda: _Service("v1"))
+    monkeypatch.setattr(support_graph, "get_support_graph", lambda: pytest.fail("graph must not run"))
+
+    state = support_graph.run_support_flow(tenant_id="t1", session_id="s1", user_message="반품 기간은 얼마나 되나요?")
+
+    assert state["answer"] == "수령 후 7일 이내 반품 가능합니다."
+    assert state["answer_mode"] == "precomputed"
+    assert state["sources"][0]["source_id"] == "faq"
+    assert [trace["tool"] for trace in state["tool_trace"]] == ["answer_cache"]
+    assert store.get("t1", "s1").last_intent == "policy"
+
+    class _Index:
+        def describe_index_stats(self):
+            return {"namespaces": {"gold-v1": {}, "gold-v2": {}}}
+
+        def delete(self, *, delete_all: bool, namespace: str) -> None:
+            pass
+
+    collect_garbage(index=_Index(), settings=settings, pointer=IndexVersionPointer(active="v2", history=["v2"], retired=["v1"]))
+    assert not answer_cache_path(settings, "v1").exists()
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.langgraph import support_graph
+from app.api.routes import chat
+from app.api.routes.chat import ChatQueryRequest
+from app.core.config import Settings
+from app.services.coalescing import SingleFlight
+from app.services.session_memory import InMemorySessionStore
+
+
+def test_single_flight_shares_result_and_errors_then_forgets_key() -> None:
+    flight = SingleFlight()
+    calls: list[str] = []
+
+    async def _work(value: str) -> str:
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if value == "boom":
+            raise ValueError("boom")
+        return value.upper()
+
+    async def _scenario() -> None:
+        results = await asyncio.gather(*(flight.do("k", lambda: _work("ok")) for _ in range(3)))
+        assert results == [("OK", False), ("OK", True), ("OK", True)]
+        assert flight.inflight() == 0
+
+        errors = await asyncio.gather(*(flight.do("k", lambda: _work("boom")) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(item, ValueError) for item in errors)
+
+        assert await flight.do("k", lambda: _work("again")) == ("AGAIN", False)
+
+    asyncio.run(_scenario())
+    assert calls == ["ok", "boom", "again"]
+
+
+def test_coalescing_key_skips_follow_ups_and_normalizes_spacing() -> None:
+    assert support_graph.coalescing_key("t1", " 반품  규정 알려줘?") == support_graph.coalescing_key("t1", "반품 규정 알려줘")
+    assert support_graph.coalescing_key("t1", "반품 규정") != support_graph.coalescing_key("t2", "반품 규정")
+    assert support_graph.coalescing_key("t1", "그럼 교환은요?") is None
+    assert support_graph.coalescing_key("t1", "내 택배 어디쯤이야") is None
+    assert support_graph.coalescing_key("t1", "운송장 123456789012 조회") is None
+    assert support_graph.coalescing_key("t1", "반품 배송비 얼마예요?") is not None
+
+    assert support_graph.is_shareable_result({"intent": "policy", "tool_trace": []})
+    assert not support_graph.is_shareable_result({"intent": "tracking", "tool_trace": []})
+    assert not support_graph.is_shareable_result(
+        {"intent": "policy", "tool_trace": [{"tool": "session_memory", "status": "carried_over"}]}
+    )
+
+
+@pytest.mark.parametrize("intent, expected_runs", [("policy", 1), ("tracking", 3)])
+def test_identical_concurrent_questions_run_the_graph_once(monkeypatch, intent: str, expected_runs: int) -> None:
+    settings = Settings(app_env="dev")
+    store = InMemorySessionStore(ttl_seconds=60, max_sessions=10)
+    monkeypatch.setattr("app.services.session_memory.get_session_store", lambda: store)
+    monkeypatch.setattr(support_graph, "get_settings", lambda: settings)
+    runs: list[str] = []
+
+    def _flow(*, tenant_id: str, session_id: str, user_message: str) -> dict:
+        runs.append(session_id)
+        time.sleep(0.05)
+        state = {
+            "tenant_id": tenant_id,
+            "session_id": session_id,
+            "user_message": user_message,
+            "intent": intent,
+            "confidence": 0.9,
+            "entities": {},
+            "route": "rag",
+            "answer": "반품은 수령 후 7일 이내 가능합니다.",
+            "sources": [],
+            "tool_trace": [],
+            "needs_human": False,
+        }
+        support_graph._finish_turn(
+            settings, tenant_id=tenant_id, session_id=session_id, user_message=user_message, memory=None, state=state
+        )
+        return state
+
+    monkeypatch.setattr(chat, "run_support_flow", _flow)
+
+    async def _scenario() -> list[dict]:
+        payloads = [
+            ChatQueryRequest(tenant_id="t1", session_id=f"s{index}", user_message="반품 규정 알려줘")
+            for index in range(3)
+        ]
+        return await asyncio.gather(*(chat._answer(payload, settings) for payload in payloads))
+
+    states = asyncio.run(_scenario())
+
+    assert len(runs) == expected_runs
+    assert [state["session_id"] for state in states] == ["s0", "s1", "s2"]
+    assert {state["answer"] for state in states} == {"반품은 수령 후 7일 이내 가능합니다."}
+    # Every asker keeps its own session history whether or not its answer was shared.
+    assert store.stats()["sessions"] == 3
+    if intent == "policy":
+        assert [trace["tool"] for trace in states[1]["tool_trace"]] == ["coalesced"]
+        assert states[0]["tool_trace"] == []
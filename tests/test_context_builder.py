@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from app.rag.context_builder import build_context, estimate_tokens
+
+
+@dataclass
+class _Hit:
+    document: Document
+    score: float
+
+
+SECTION = {"source_file": "policies/refund_policy.md", "section_path": "반품 및 환불 정책"}
+
+
+def test_build_context_removes_overlap_between_adjacent_chunks() -> None:
+    overlap = "반품 상품이 물류센터에 도착하고 검수 완료되면 환불됩니다."
+    first = _Hit(Document(page_content=f"상품 수령 후 7일 이내 접수해야 합니다. {overlap}", metadata=SECTION), 0.9)
+    second = _Hit(Document(page_content=f"{overlap} 영업일 기준 2~3일 소요됩니다.", metadata=SECTION), 0.8)
+
+    built = build_context([second, first], budget_tokens=1000)
+    assert built.text.count(overlap) == 1
+    assert built.text.startswith("[source=1 score=0.900]")
+    assert "영업일 기준 2~3일 소요됩니다." in built.text
+    assert built.token_count == estimate_tokens(built.text)
+
+
+def test_build_context_respects_token_budget() -> None:
+    hits = [
+        _Hit(Document(page_content="가" * 200, metadata={"source_file": f"f{idx}", "section_path": "s"}), 0.9 - idx / 10)
+        for idx in range(3)
+    ]
+    built = build_context(hits, budget_tokens=450)
+    assert len(built.docs) == 2
+    assert built.dropped == 1
+    assert built.token_count <= 450
+
+    tiny = build_context(hits[:1], budget_tokens=50)
+    assert len(tiny.docs) == 1
+    assert tiny.token_count <= 50
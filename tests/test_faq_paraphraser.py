@@ -1,8 +1,20 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from app.core.config import Settings
+from app.rag import faq_paraphraser
 from app.rag.faq_paraphraser import (
+    build_paraphrase_cache,
+    checkpoint_path,
     deduplicate_paraphrases,
     parse_paraphrases_from_json,
     preserves_numeric_constraints,
+    seed_hash,
 )
+from app.services.rate_limit import InMemoryBucketStore
 
 
 def test_parse_paraphrases_from_json() -> None:
@@ -32,3 +44,92 @@ def test_deduplicate_paraphrases_filters_duplicates() -> None:
     assert len(deduped) == 5
     assert len(set(deduped)) == 5
 
+
+def _write_seeds(path) -> None:
+    path.write_text(
+        "question,answer,category,priority,last_updated\n"
+        "반품 기간은?,수령 후 7일,returns,high,2026-02-19\n"
+        "배송비는?,3000원,shipping,high,2026-02-19\n"
+        "교환 방법은?,마이페이지,exchange,medium,2026-02-19\n",
+        encoding="utf-8",
+    )
+
+
+def test_build_paraphrase_cache_checkpoints_and_resumes(monkeypatch, tmp_path) -> None:
+    settings = Settings(app_env="dev", openai_api_key="sk-test", paraphrase_workers=3, paraphrase_requests_per_minute=0)
+    monkeypatch.setattr(faq_paraphraser, "get_settings", lambda: settings)
+    seeds, output = tmp_path / "qa.csv", tmp_path / "qa_paraphrases.csv"
+    _write_seeds(seeds)
+    calls: list[str] = []
+
+    def _generate(*, seed_question: str, count: int, throttle=None) -> list[str]:
+        calls.append(seed_question)
+        if seed_question == "배송비는?" and calls.count(seed_question) == 1:
+            raise RuntimeError("provider timeout")
+        return [f"{seed_question} {rank}" for rank in range(count)]
+
+    monkeypatch.setattr(faq_paraphraser, "generate_paraphrases", _generate)
+
+    with pytest.raises(RuntimeError, match="배송비는"):
+        build_paraphrase_cache(input_path=seeds, output_path=output, per_question=2)
+    assert not output.exists()
+    checkpointed = [json.loads(line) for line in checkpoint_path(output).read_text(encoding="utf-8").splitlines()]
+    assert sorted(record["rows"][0]["seed_question"] for record in checkpointed) == ["교환 방법은?", "반품 기간은?"]
+
+    assert build_paraphrase_cache(input_path=seeds, output_path=output, per_question=2) == 6
+    # Only the failed seed is regenerated on the rerun.
+    assert sorted(calls) == ["교환 방법은?", "반품 기간은?", "배송비는?", "배송비는?"]
+    written = pd.read_csv(output)
+    assert list(written["seed_question"]) == ["반품 기간은?"] * 2 + ["배송비는?"] * 2 + ["교환 방법은?"] * 2
+    assert list(written["paraphrase_rank"]) == [1, 2] * 3
+    assert not checkpoint_path(output).exists()
+
+    assert build_paraphrase_cache(input_path=seeds, output_path=output, per_question=2) == 6
+    assert len(calls) == 4
+
+
+def test_resume_regenerates_seed_cut_off_inside_a_quoted_answer(monkeypatch, tmp_path) -> None:
+    settings = Settings(app_env="dev", openai_api_key="sk-test", paraphrase_requests_per_minute=0)
+    monkeypatch.setattr(faq_paraphraser, "get_settings", lambda: settings)
+    seeds, output = tmp_path / "qa.csv", tmp_path / "qa_paraphrases.csv"
+    answer = '수령 후 7일, 단 "세일" 상품은\n교환만 가능'
+    pd.DataFrame(
+        {
+            "question": ["반품 기간은?", "배송비는?"],
+            "answer": [answer, "3,000원"],
+            "category": ["returns", "shipping"],
+            "priority": ["high", "high"],
+            "last_updated": ["2026-02-19", "2026-02-19"],
+        }
+    ).to_csv(seeds, index=False)
+    calls: list[str] = []
+
+    def _generate(*, seed_question: str, count: int, throttle=None) -> list[str]:
+        calls.append(seed_question)
+        return [f"{seed_question} {rank}" for rank in range(count)]
+
+    monkeypatch.setattr(faq_paraphraser, "generate_paraphrases", _generate)
+    shipping = {"question": "배송비 얼마예요?", "answer": "3,000원", "seed_question": "배송비는?"}
+    returns = {"question": "반품 기간은? 0", "answer": answer, "seed_question": "반품 기간은?"}
+    complete = json.dumps({"seed_question_hash": seed_hash("배송비는?"), "rows": [shipping] * 2}, ensure_ascii=False)
+    partial = json.dumps({"seed_question_hash": seed_hash("반품 기간은?"), "rows": [returns] * 2}, ensure_ascii=False)
+    # The process died mid-append, inside the quoted answer of the second seed.
+    checkpoint_path(output).write_text(complete + "\n" + partial[: partial.index("세일")], encoding="utf-8")
+
+    assert build_paraphrase_cache(input_path=seeds, output_path=output, per_question=2) == 4
+    assert calls == ["반품 기간은?"]
+    written = pd.read_csv(output)
+    assert list(written["answer"]) == [answer, answer, "3,000원", "3,000원"]
+
+
+def test_bucket_acquire_waits_for_refill() -> None:
+    bucket = InMemoryBucketStore(max_keys=1)
+    slept: list[float] = []
+
+    def _sleep(seconds: float) -> None:
+        slept.append(seconds)
+        time.sleep(seconds)
+
+    assert bucket.acquire("openai", rate=20.0, capacity=1, sleep=_sleep) == 0.0
+    waited = bucket.acquire("openai", rate=20.0, capacity=1, sleep=_sleep)
+    assert slept and 0 < waited <= 0.1
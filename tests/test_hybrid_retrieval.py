@@ -0,0 +1,189 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.core.config import Settings
+from app.rag.index_versions import FileIndexVersionStore, promote_version
+from app.rag.retriever import RAGService, pinned_index_version
+from app.rag.sparse_index import SparseIndex, reciprocal_rank_fusion, sparse_index_path, tokenize
+
+
+def _doc(text: str, source: str) -> Document:
+    return Document(page_content=text, metadata={"source_file": source, "section_path": "root"})
+
+
+CORPUS = [
+    _doc("Q: 반품은 며칠 내에 접수해야 하나요?\nA: 상품 수령 후 7일 이내에 반품 접수가 가능합니다.", "faq/qa.csv"),
+    _doc("Q: 무료 배송 기준은 무엇인가요?\nA: 실결제금액 50,000원 이상이면 무료 배송입니다.", "faq/qa.csv"),
+    _doc("# 모션쿨 스트레치 셔츠 (BEST003)\n- 찬물 단독 세탁 권장", "products/product_BEST003.md"),
+    _doc("# 데일리 린넨 팬츠 (BEST004)\n- 손세탁 권장", "products/product_BEST004.md"),
+]
+
+
+def _settings(tmp_path, **overrides) -> Settings:
+    defaults = {
+        "app_env": "dev",
+        "service_name": "api",
+        "retriever_backend": "local",
+        "sparse_index_dir": str(tmp_path),
+        "index_version_pointer_path": str(tmp_path / "active_version.json"),
+        "index_version_refresh_seconds": 0.0,
+    }
+    defaults.update(overrides)
+    return Settings(**defaults)
+
+
+def test_tokenize_keeps_exact_korean_cs_tokens() -> None:
+    tokens = tokenize("BEST003 셔츠 50,000원 이상, 7일 이내")
+    assert "best003" in tokens
+    assert "50000원" in tokens
+    assert "7일" in tokens
+    assert "셔츠" in tokens
+
+
+def test_sparse_index_ranks_exact_sku_first() -> None:
+    index = SparseIndex(CORPUS)
+    results = index.search("BEST003 세탁 방법", k=2)
+    assert results[0][0].metadata["source_file"].endswith("product_BEST003.md")
+    assert 0.0 < results[0][1] <= 1.0
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60)
+    assert max(fused, key=fused.get) == "b"
+
+
+def test_rag_service_local_backend_reads_sparse_index_for_active_version(tmp_path) -> None:
+    settings = _settings(tmp_path)
+    SparseIndex(CORPUS).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+
+    service = RAGService(settings)
+    results = service.retrieve("무료 배송 50,000원 기준", k=2)
+    assert results[0].document.page_content.startswith("Q: 무료 배송")
+    assert results[0].sparse_score is not None
+
+
+def test_sparse_indexes_are_cached_per_version(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path)
+    SparseIndex(CORPUS[:2]).save(sparse_index_path(settings, "v1"))
+    SparseIndex(CORPUS[2:]).save(sparse_index_path(settings, "v2"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+    service = RAGService(settings)
+    loads: list[str] = []
+    original_load = SparseIndex.load
+    monkeypatch.setattr(SparseIndex, "load", lambda path: loads.append(path.name) or original_load(path))
+
+    # A pinned precompute build and live traffic alternating must each keep their own index.
+    for _ in range(3):
+        with pinned_index_version("v2"):
+            assert service.retrieve("BEST003 세탁", k=1)[0].document.metadata["source_file"].endswith("BEST003.md")
+        assert service.retrieve("무료 배송 50,000원", k=1)[0].document.page_content.startswith("Q: 무료 배송")
+    assert sorted(loads) == ["sparse_v1.json", "sparse_v2.json"]
+
+
+def test_rag_service_hybrid_fuses_dense_and_sparse(tmp_path) -> None:
+    settings = _settings(tmp_path, retriever_backend="hybrid")
+    SparseIndex(CORPUS).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+
+    class StubVectorStore:
+        def similarity_search_with_relevance_scores(
+            self,
+            question: str,
+            k: int,
+            namespace: str | None = None,
+            filter: dict | None = None,
+        ):
+            assert namespace == "gold-v1"
+            return [(CORPUS[3], 0.52), (CORPUS[2], 0.5)]
+
+    service = RAGService(settings, vector_store=StubVectorStore())
+
+    results = service.retrieve("BEST003 찬물", k=2)
+    assert results[0].document.metadata["source_file"].endswith("product_BEST003.md")
+    assert results[0].dense_score == 0.5
+    assert results[0].sparse_score is not None
+
+
+FAQ_DOC = CORPUS[1].model_copy(update={"metadata": {**CORPUS[1].metadata, "doc_type": "faq"}})
+
+
+def _fail_generate(**kwargs):
+    raise AssertionError("generation must be skipped for direct FAQ answers")
+
+
+def test_sparse_only_hits_need_the_sparse_threshold_to_count_as_sources(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path, retriever_backend="hybrid", source_score_threshold=0.35, sparse_score_threshold=0.75)
+    SparseIndex(CORPUS).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+
+    class StubVectorStore:
+        def similarity_search_with_relevance_scores(self, question: str, k: int, namespace=None, filter=None):
+            return [(CORPUS[3], 0.2)]
+
+    service = RAGService(settings, vector_store=StubVectorStore())
+    monkeypatch.setattr(service, "_generate", lambda **kwargs: pytest.fail("no source may reach generation"))
+
+    results = service.retrieve("린넨 반품 접수", k=3)
+    refund = next(item for item in results if item.document.page_content.startswith("Q: 반품"))
+    linen = next(item for item in results if item.document is CORPUS[3])
+    # 2/3 term coverage clears the dense threshold numerically but is not dense relevance.
+    assert refund.dense_score is None and 0.35 <= refund.score < 0.75
+    assert linen.score == linen.dense_score == 0.2
+
+    result = service.answer("린넨 반품 접수", intent="policy")
+    assert result.answer_mode == "no_source"
+    assert result.needs_human
+
+
+def test_rag_service_answers_high_confidence_faq_without_generation(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path, retriever_backend="hybrid", faq_direct_score_threshold=0.9)
+    SparseIndex([FAQ_DOC]).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+
+    class StubVectorStore:
+        def similarity_search_with_relevance_scores(self, question: str, k: int, namespace=None, filter=None):
+            return [(FAQ_DOC, 0.93)]
+
+    service = RAGService(settings, vector_store=StubVectorStore())
+    monkeypatch.setattr(service, "_generate", _fail_generate)
+
+    result = service.answer("배송비 안 내려면?", intent="policy")
+    assert result.answer_mode == "faq_direct"
+    assert result.answer.startswith("실결제금액 50,000원 이상이면 무료 배송입니다.")
+    assert result.answer.endswith(settings.default_answer_closing)
+    assert not result.needs_human
+
+
+def test_short_generic_query_does_not_short_circuit_on_sparse_coverage(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path, faq_direct_score_threshold=0.9, source_score_threshold=0.1)
+    SparseIndex([FAQ_DOC]).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+    service = RAGService(settings)
+    monkeypatch.setattr(service, "_generate", lambda **kwargs: "생성된 답변")
+
+    # Both words are covered (sparse score 1.0), but two words are not enough to trust lexical overlap.
+    assert service.retrieve("배송 기준", k=1)[0].score == 1.0
+    assert service.answer("배송 기준", intent="policy").answer_mode == "generated"
+
+    monkeypatch.setattr(service, "_generate", _fail_generate)
+    assert service.answer("무료 배송 기준은 무엇인가요?", intent="policy").answer_mode == "faq_direct"
+
+
+def test_rag_service_records_prompt_tokens_in_trace(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path, faq_direct_answer_enabled=False, source_score_threshold=0.1)
+    SparseIndex(CORPUS).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+    service = RAGService(settings)
+    captured: dict = {}
+
+    def fake_generate(*, question: str, context: str, strong_model: bool = False) -> str:
+        captured["context"] = context
+        return service._append_closing("7일 이내 반품 접수가 가능합니다.")
+
+    monkeypatch.setattr(service, "_generate", fake_generate)
+    result = service.answer("반품은 며칠 내에 접수해야 하나요?", intent="policy")
+    assert result.answer_mode == "generated"
+    assert result.trace[0]["tool"] == "generation"
+    assert result.trace[0]["prompt_tokens"] > 0
+    assert captured["context"].startswith("[source=1")
@@ -0,0 +1,106 @@
+import pytest
+
+from app.core.config import Settings
+from app.rag import ingest
+from app.rag.index_versions import (
+    FileIndexVersionStore,
+    IndexVersionPointer,
+    collect_garbage,
+    namespace_for_version,
+    promote_version,
+    rollback_version,
+    unretire_version,
+)
+
+
+def _settings(**overrides) -> Settings:
+    defaults = {"app_env": "dev", "service_name": "api", "index_version_keep": 2, "sparse_index_dir": "/nonexistent"}
+    defaults.update(overrides)
+    return Settings(**defaults)
+
+
+def test_promote_and_rollback_swap_active_pointer(tmp_path) -> None:
+    store = FileIndexVersionStore(tmp_path / "active_version.json")
+    assert store.read().active is None
+
+    promote_version(store, "v1")
+    promote_version(store, "v2")
+    assert store.read().active == "v2"
+    assert store.read().history == ["v2", "v1"]
+
+    pointer = rollback_version(store)
+    assert pointer.active == "v1"
+    assert store.read().active == "v1"
+
+
+def test_promote_same_version_does_not_duplicate_history(tmp_path) -> None:
+    store = FileIndexVersionStore(tmp_path / "active_version.json")
+    promote_version(store, "v1")
+    promote_version(store, "v1")
+    assert store.read().history == ["v1"]
+
+
+def test_collect_garbage_keeps_active_and_rollback_window() -> None:
+    settings = _settings()
+
+    class StubIndex:
+        def __init__(self) -> None:
+            self.deleted: list[str] = []
+
+        def describe_index_stats(self):
+            return {
+                "namespaces": {"gold-v1": {}, "gold-v2": {}, "gold-v3": {}, "gold-v4": {}, "": {}, "other": {}}
+            }
+
+        def delete(self, *, delete_all: bool, namespace: str) -> None:
+            self.deleted.append(namespace)
+
+    index = StubIndex()
+    pointer = IndexVersionPointer(active="v3", history=["v3", "v2"], retired=["v0", "v1"])
+    deleted = collect_garbage(index=index, settings=settings, pointer=pointer)
+    # v4 was staged with --no-promote (or is still being written): never promoted, never collected.
+    assert deleted == ["gold-v1"]
+    assert index.deleted == ["gold-v1"]
+    assert namespace_for_version(settings, None) is None
+
+
+def test_rollback_never_lands_on_a_collected_version(tmp_path) -> None:
+    settings = _settings(index_version_keep=2)
+    store = FileIndexVersionStore(tmp_path / "active_version.json")
+    for tag in ("v1", "v2", "v3"):
+        pointer = promote_version(store, tag, keep=settings.index_version_keep)
+    assert (pointer.history, pointer.retired) == (["v3", "v2"], ["v1"])
+
+    class StubIndex:
+        def __init__(self) -> None:
+            self.namespaces = {"gold-v1": {}, "gold-v2": {}, "gold-v3": {}}
+
+        def describe_index_stats(self):
+            return {"namespaces": dict(self.namespaces)}
+
+        def delete(self, *, delete_all: bool, namespace: str) -> None:
+            self.namespaces.pop(namespace)
+
+    index = StubIndex()
+    assert collect_garbage(index=index, settings=settings, pointer=store.read()) == ["gold-v1"]
+
+    assert rollback_version(store).active == "v2"
+    with pytest.raises(ValueError, match="No retained"):
+        rollback_version(store)
+    assert store.read().active == "v2"
+    with pytest.raises(ValueError, match="retired"):
+        promote_version(store, "v1")
+
+    # Re-staging v1 takes it off the retired list, so GC no longer targets its new namespace.
+    assert unretire_version(store, "v1")
+    index.namespaces["gold-v1"] = {}
+    assert collect_garbage(index=index, settings=settings, pointer=store.read()) == []
+    assert promote_version(store, "v1", keep=settings.index_version_keep).history == ["v1", "v2"]
+
+
+def test_ingest_refuses_the_active_version_tag(monkeypatch, tmp_path) -> None:
+    settings = _settings(pinecone_api_key="pc-test", index_version_pointer_path=str(tmp_path / "active_version.json"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+    monkeypatch.setattr(ingest, "get_settings", lambda: settings)
+    with pytest.raises(ValueError, match="active index version"):
+        ingest.ingest_gold_data(data_root=tmp_path, version_tag="v1")
@@ -1,4 +1,11 @@
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
 from app.api.routes import infra
+from app.rag import retriever
+from app.repositories import supabase_repo
 from app.core.config import Settings
 
 
@@ -56,3 +63,86 @@ def test_ready_returns_degraded_when_single_dependency_fails(monkeypatch) -> Non
     assert response.status == "degraded"
     assert response.checks.supabase == "ok"
     assert response.checks.pinecone == "fail"
+
+
+def test_ready_serves_prober_snapshot_without_rechecking(monkeypatch) -> None:
+    settings = _ready_settings(health_probe_interval_seconds=60)
+    calls: list[str] = []
+    monkeypatch.setattr(infra, "get_settings", lambda: settings)
+    monkeypatch.setattr(infra, "_check_supabase", lambda: calls.append("supabase"))
+    monkeypatch.setattr(infra, "_check_pinecone", lambda: calls.append("pinecone"))
+
+    assert infra.start_health_prober(settings)
+    try:
+        deadline = time.monotonic() + 2.0
+        while infra._SNAPSHOT is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        first = infra.ready()
+        second = infra.ready()
+    finally:
+        infra.stop_health_prober()
+
+    assert sorted(calls) == ["pinecone", "supabase"]
+    assert first.status == second.status == "ok"
+    assert first.details.checked_at == second.details.checked_at
+    assert second.details.stale is False
+
+
+def test_ready_degrades_when_snapshot_is_stale(monkeypatch) -> None:
+    settings = _ready_settings(health_probe_stale_seconds=5)
+    monkeypatch.setattr(infra, "get_settings", lambda: settings)
+    snapshot = infra.DependencySnapshot(
+        results={"supabase": (True, ""), "pinecone": (True, "")},
+        checked_at=datetime.now(tz=timezone.utc),
+        checked_monotonic=time.monotonic() - 60,
+    )
+    monkeypatch.setattr(infra, "_SNAPSHOT", snapshot)
+    monkeypatch.setattr(infra, "_PROBER_THREAD", object())
+
+    response = infra.ready()
+
+    assert response.status == "degraded"
+    assert response.details.stale is True
+    assert any(item.startswith("probe:stale") for item in response.details.failed)
+
+
+def test_dependency_checks_reuse_long_lived_clients(monkeypatch) -> None:
+    pings: list[str] = []
+    monkeypatch.setattr(infra, "get_settings", lambda: _ready_settings())
+    monkeypatch.setattr(
+        supabase_repo, "get_supabase_repo", lambda: SimpleNamespace(ping=lambda: pings.append("supabase"))
+    )
+    monkeypatch.setattr(retriever, "get_rag_service", lambda: SimpleNamespace(ping=lambda: pings.append("pinecone")))
+
+    results = infra._run_dependency_checks(infra.READINESS_TIMEOUT_SECONDS)
+
+    assert results == {"supabase": (True, ""), "pinecone": (True, "")}
+    assert sorted(pings) == ["pinecone", "supabase"]
+
+
+def test_hung_probe_does_not_block_later_checks(monkeypatch) -> None:
+    release = threading.Event()
+    calls: list[str] = []
+    monkeypatch.setattr(infra, "_OVERRUNNING", {})
+
+    def hung_supabase() -> None:
+        calls.append("supabase")
+        release.wait(5)
+
+    monkeypatch.setattr(infra, "_check_supabase", hung_supabase)
+    monkeypatch.setattr(infra, "_check_pinecone", lambda: calls.append("pinecone"))
+    try:
+        first = infra._run_dependency_checks(0.05)
+        second = infra._run_dependency_checks(0.05)
+    finally:
+        release.set()
+
+    assert first == {"supabase": (False, "timeout"), "pinecone": (True, "")}
+    # The still-hung supabase probe is not stacked; pinecone keeps being checked.
+    assert second == {"supabase": (False, "timeout: previous probe still running"), "pinecone": (True, "")}
+    assert calls.count("supabase") == 1 and calls.count("pinecone") == 2
+
+    deadline = time.monotonic() + 2.0
+    while not infra._OVERRUNNING["supabase"].done() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert infra._run_dependency_checks(0.5)["supabase"] == (True, "")
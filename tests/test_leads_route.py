@@ -9,14 +9,14 @@ class _StubLeadRepo:
         self.save_result = save_result
         self.calls: list[dict] = []
 
-    def save_lead_signup(self, *, email: str, source: str, metadata: dict | None = None) -> bool:
+    async def save_lead_signup(self, *, email: str, source: str, metadata: dict | None = None) -> bool:
         self.calls.append({"email": email, "source": source, "metadata": metadata or {}})
         return self.save_result
 
 
 def test_lead_signup_success(monkeypatch) -> None:
     stub = _StubLeadRepo(save_result=True)
-    monkeypatch.setattr(leads, "get_supabase_repo", lambda: stub)
+    monkeypatch.setattr(leads, "get_async_supabase_repo", lambda: stub)
 
     app = create_app()
     client = TestClient(app)
@@ -35,7 +35,7 @@ def test_lead_signup_success(monkeypatch) -> None:
 
 def test_lead_signup_queued_when_repo_disabled(monkeypatch) -> None:
     stub = _StubLeadRepo(save_result=False)
-    monkeypatch.setattr(leads, "get_supabase_repo", lambda: stub)
+    monkeypatch.setattr(leads, "get_async_supabase_repo", lambda: stub)
 
     app = create_app()
     client = TestClient(app)
@@ -51,7 +51,7 @@ def test_lead_signup_queued_when_repo_disabled(monkeypatch) -> None:
 
 def test_lead_signup_validates_email(monkeypatch) -> None:
     stub = _StubLeadRepo(save_result=True)
-    monkeypatch.setattr(leads, "get_supabase_repo", lambda: stub)
+    monkeypatch.setattr(leads, "get_async_supabase_repo", lambda: stub)
 
     app = create_app()
     client = TestClient(app)
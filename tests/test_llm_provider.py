@@ -1,7 +1,7 @@
 import pytest
 
 from app.core.config import Settings
-from app.services.llm_provider import available_provider_order
+from app.services.llm_provider import _build_chat_model, available_provider_order, cached_chain, warm_chat_models
 
 
 def _settings(**overrides) -> Settings:
@@ -35,3 +35,26 @@ def test_available_provider_order_requires_at_least_one_key() -> None:
     settings = _settings(openai_api_key="", gemini_api_key="")
     with pytest.raises(ValueError):
         available_provider_order(settings)
+
+
+def test_chat_model_and_chain_are_reused_per_provider_and_model() -> None:
+    settings = _settings()
+    llm = _build_chat_model(settings, "openai", "generation")
+    assert _build_chat_model(settings, "openai", "generation") is llm
+    assert _build_chat_model(settings, "openai", "generation_upgrade") is not llm
+
+    calls: list[object] = []
+
+    def _factory(model):
+        calls.append(model)
+        return ("chain", model)
+
+    first = cached_chain("test_chain", llm, _factory)
+    assert cached_chain("test_chain", llm, _factory) is first
+    assert len(calls) == 1
+
+
+def test_warm_chat_models_builds_every_provider_purpose_client() -> None:
+    settings = _settings(gemini_api_key="")
+    assert warm_chat_models(settings) == 3
+    assert _build_chat_model(settings, "openai", "classifier") is _build_chat_model(settings, "openai", "classifier")
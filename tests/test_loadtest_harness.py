@@ -0,0 +1,47 @@
+import importlib.util
+from pathlib import Path
+
+from app.core.config import get_settings
+
+
+def _load_script():
+    path = Path(__file__).resolve().parents[1] / "scripts" / "loadtest.py"
+    spec = importlib.util.spec_from_file_location("shop_ai_loadtest", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_loadtest_runs_all_scenarios_against_fakes_and_restores_settings() -> None:
+    loadtest = _load_script()
+    options = loadtest.LoadTestOptions(
+        requests=12,
+        concurrency=3,
+        warmup=0,
+        mix={"chat": 1.0, "track": 1.0, "naver": 1.0},
+        naver_batch=1,
+        upstreams={name: loadtest.UpstreamProfile(median_ms=0.0) for name in loadtest.UPSTREAM_DEFAULTS},
+    )
+    settings_before = get_settings()
+
+    report = loadtest.run_load_test(options)
+
+    scenarios = report["scenarios"]
+    assert set(scenarios) == {"chat", "track", "naver"}
+    assert sum(row["requests"] for row in scenarios.values()) == 12
+    assert all(row["errors"] == 0 for row in scenarios.values())
+    assert "upstream.shipping" in scenarios["track"]["stages"]
+    assert "graph.classify" in scenarios["chat"]["stages"]
+    assert report["upstreams"]["llm"]["calls"] > 0
+    assert get_settings().naver_autoreply_token == settings_before.naver_autoreply_token
+
+
+def test_compare_to_baseline_flags_p95_and_throughput_regressions() -> None:
+    loadtest = _load_script()
+    baseline = {"scenarios": {"chat": {"p95_ms": 100.0, "throughput_rps": 10.0}}}
+    current = {"scenarios": {"chat": {"p95_ms": 130.0, "throughput_rps": 7.0}}}
+
+    messages = loadtest.compare_to_baseline(current, baseline, 0.2)
+
+    assert len(messages) == 2
+    assert loadtest.compare_to_baseline(baseline, baseline, 0.2) == []
@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+from app.api.main import create_app
+from app.core.metrics import record_cache
+
+
+def test_metrics_endpoint_exposes_route_latency_and_cache_counters() -> None:
+    client = TestClient(create_app())
+    client.get("/health")
+    record_cache("chain", True)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'shop_ai_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert 'shop_ai_cache_requests_total{cache="chain",result="hit"}' in body
+    assert "shop_ai_llm_call_duration_seconds" in body
+    assert "shop_ai_naver_worker_cycle_duration_seconds" in body
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from app.core.config import Settings
+from app.rag.evaluate import first_hit_rank, holdout_filter, load_eval_queries, run_evaluation
+from app.rag.retriever import ScoredDocument
+from app.rag.sparse_index import matches_filter
+
+
+GOLD_DIR = Path(__file__).resolve().parents[1] / "data" / "gold"
+
+
+def test_holdout_filter_hides_only_the_query_paraphrase_rank() -> None:
+    metadata_filter = holdout_filter(2)
+    assert not matches_filter({"doc_type": "faq", "paraphrase_rank": 2}, metadata_filter)
+    assert matches_filter({"doc_type": "faq", "paraphrase_rank": 0}, metadata_filter)
+    assert matches_filter({"doc_type": "policy"}, metadata_filter)
+
+
+def test_first_hit_rank_uses_relevant_seed_hashes() -> None:
+    items = [
+        ScoredDocument(document=Document(page_content="a", metadata={"seed_question_hash": "x"}), score=0.9),
+        ScoredDocument(document=Document(page_content="b", metadata={"seed_question_hash": "y"}), score=0.8),
+    ]
+    assert first_hit_rank(items, frozenset({"y"})) == 2
+    assert first_hit_rank(items, frozenset({"z"})) is None
+
+
+def test_local_evaluation_reports_recall_mrr_and_latency_per_k_and_reranker() -> None:
+    queries = load_eval_queries(GOLD_DIR, ranks=[1])
+    assert queries and all(query.paraphrase_rank == 1 for query in queries)
+
+    results = run_evaluation(
+        Settings(_env_file=None),
+        data_root=GOLD_DIR,
+        backends=["local"],
+        rerankers=["none", "lexical"],
+        ks=[1, 5],
+        ranks=[1],
+        limit=20,
+    )
+
+    assert [(item.reranker, item.k) for item in results] == [("none", 1), ("lexical", 1), ("none", 5), ("lexical", 5)]
+    by_key = {(item.reranker, item.k): item for item in results}
+    assert by_key[("none", 5)].recall_at_k >= by_key[("none", 1)].recall_at_k > 0
+    assert 0 < by_key[("none", 5)].mrr <= by_key[("none", 5)].recall_at_k
+    assert all(item.queries == 20 and item.retrieve_p95_ms >= item.retrieve_p50_ms for item in results)
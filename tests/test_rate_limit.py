@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.api import guards
+from app.api.main import create_app
+from app.api.routes import chat
+from app.core.config import Settings
+from app.services import rate_limit
+from app.services.rate_limit import (
+    AdmissionController,
+    AdmissionRejected,
+    InMemoryBucketStore,
+    RateLimiter,
+    RateLimitExceeded,
+)
+
+
+def _request(forwarded: str | None = None, host: str = "10.0.0.9") -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+
+def test_bucket_refills_over_time_and_caps_keys(monkeypatch) -> None:
+    clock = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: clock[0])
+    store = InMemoryBucketStore(max_keys=2)
+
+    assert [store.take("a", rate=1.0, capacity=2).allowed for _ in range(3)] == [True, True, False]
+    assert store.take("a", rate=1.0, capacity=2).retry_after == pytest.approx(1.0)
+    clock[0] += 1.0
+    assert store.take("a", rate=1.0, capacity=2).allowed
+
+    store.take("b", rate=1.0, capacity=2)
+    store.take("c", rate=1.0, capacity=2)
+    assert len(store) == 2
+    # "a" was evicted, so it starts again from a full bucket.
+    assert store.take("a", rate=1.0, capacity=2).allowed
+
+
+def test_limiter_checks_narrowest_key_first_and_falls_back_when_shared_store_fails(monkeypatch) -> None:
+    settings = Settings(
+        app_env="dev",
+        rate_limit_chat_session_per_minute=1,
+        rate_limit_chat_ip_per_minute=2,
+        rate_limit_chat_tenant_per_minute=0,
+    )
+    limiter = RateLimiter(settings)
+
+    class _DownRepo:
+        async def take_rate_limit_token(self, **kwargs) -> float:
+            raise RuntimeError("supabase down")
+
+    limiter._shared = rate_limit.SupabaseBucketStore(_DownRepo())
+    keys = {"session": "t1:s1", "ip": "1.1.1.1", "tenant": "t1"}
+
+    async def _scenario() -> None:
+        await limiter.check("chat", keys)
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.check("chat", keys)
+        assert exc.value.key_kind == "session"
+        # The rejected request did not spend an IP token, so another session still gets through.
+        await limiter.check("chat", {**keys, "session": "t1:s2"})
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.check("chat", {**keys, "session": "t1:s3"})
+        assert exc.value.key_kind == "ip"
+
+    asyncio.run(_scenario())
+
+
+def test_client_ip_only_trusts_configured_proxy_hops() -> None:
+    spoofed = "6.6.6.6, 203.0.113.7"
+    assert guards.client_ip(_request(spoofed), Settings(app_env="dev", rate_limit_trusted_proxy_hops=1)) == "203.0.113.7"
+    assert guards.client_ip(_request(spoofed), Settings(app_env="dev", rate_limit_trusted_proxy_hops=0)) == "10.0.0.9"
+    assert guards.client_ip(_request(), Settings(app_env="dev", rate_limit_trusted_proxy_hops=1)) == "10.0.0.9"
+
+    controller = AdmissionController()
+    settings = Settings(app_env="dev", admission_chat_max_inflight=1)
+    with controller.admit("chat", settings):
+        with pytest.raises(AdmissionRejected):
+            with controller.admit("chat", settings):
+                pass
+    assert controller.inflight("chat") == 0
+
+
+def test_chat_query_returns_429_before_running_the_flow(monkeypatch) -> None:
+    settings = Settings(app_env="dev", rate_limit_chat_session_per_minute=1)
+    monkeypatch.setattr(guards, "get_rate_limiter", lambda: limiter)
+    limiter = RateLimiter(settings)
+    calls: list[str] = []
+
+    def _flow(**kwargs) -> dict:
+        calls.append(kwargs["session_id"])
+        raise ValueError("stop after admission")
+
+    monkeypatch.setattr(chat, "run_support_flow", _flow)
+    monkeypatch.setattr(chat, "get_tenant_settings", lambda tenant_id: settings)
+    client = TestClient(create_app())
+    body = {"tenant_id": "t1", "session_id": "s1", "user_message": "반품 규정 알려줘"}
+
+    assert client.post("/v1/chat/query", json=body).status_code == 400
+    limited = client.post("/v1/chat/query", json=body)
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+    assert calls == ["s1"]
+
+    saturated = AdmissionController()
+    monkeypatch.setattr(guards, "get_admission_controller", lambda: saturated)
+    saturated._inflight["chat"] = settings.admission_chat_max_inflight
+    shed = client.post("/v1/chat/query", json={**body, "session_id": "s2"})
+    assert shed.status_code == 429
+    assert calls == ["s1"]
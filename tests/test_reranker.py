@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from app.core.config import Settings
+from app.rag.reranker import LexicalOverlapReranker, get_reranker, rerank
+
+
+@dataclass
+class _Hit:
+    document: Document
+    score: float
+
+
+def _hits(*texts: str) -> list[_Hit]:
+    return [_Hit(Document(page_content=text), 0.5) for text in texts]
+
+
+def test_lexical_rerank_promotes_overlapping_passage() -> None:
+    items = _hits("적립금은 지급일 기준 12개월 동안 유효합니다.", "반품은 수령 후 7일 이내에 접수해야 합니다.")
+    ranked = rerank("반품 접수 기간은 7일인가요?", items, reranker=LexicalOverlapReranker(), top_n=1)
+    assert ranked == [items[1]]
+
+
+def test_rerank_keeps_unscored_items_when_budget_is_spent() -> None:
+    class SlowReranker:
+        name = "slow"
+
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def score(self, query: str, passages: list[str]) -> list[float]:
+            self.calls += 1
+            return [float(idx) for idx in range(len(passages))]
+
+    items = _hits("a", "b", "c", "d")
+    reranker = SlowReranker()
+    ranked = rerank("q", items, reranker=reranker, top_n=4, batch_size=2, budget_ms=0)
+    assert reranker.calls == 1
+    assert ranked == [items[1], items[0], items[2], items[3]]
+
+
+def test_get_reranker_falls_back_to_lexical_when_onnx_model_missing() -> None:
+    settings = Settings(app_env="dev", service_name="api", reranker="onnx", reranker_onnx_model_path="/missing.onnx")
+    assert get_reranker(settings).name == "lexical"
+    assert get_reranker(settings.model_copy(update={"reranker": "none"})) is None
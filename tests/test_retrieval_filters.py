@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from app.rag.ingest import collect_gold_documents
+from app.rag.retriever import build_retrieval_filter, extract_sku
+from app.rag.sparse_index import SparseIndex, matches_filter
+
+
+def _gold_index() -> SparseIndex:
+    root = Path(__file__).resolve().parents[1] / "data" / "gold"
+    return SparseIndex(collect_gold_documents(root, version_tag="test-v1"))
+
+
+def test_build_retrieval_filter_by_intent_and_sku() -> None:
+    assert build_retrieval_filter("반품 기간 알려줘", "policy") == {"doc_type": {"$in": ["policy", "faq"]}}
+    assert build_retrieval_filter("best003 세탁 방법", "fallback") == {
+        "doc_type": {"$eq": "product"},
+        "sku": {"$eq": "BEST003"},
+    }
+    combined = build_retrieval_filter("BEST003 반품 되나요?", "policy")
+    assert combined is not None and len(combined["$or"]) == 2
+    assert build_retrieval_filter("안녕하세요", "fallback") is None
+    assert extract_sku("운송장 123456789012") is None
+
+
+def test_matches_filter_supports_pinecone_operators() -> None:
+    metadata = {"doc_type": "product", "sku": "BEST003", "category": "product"}
+    assert matches_filter(metadata, {"doc_type": {"$in": ["product"]}, "sku": "BEST003"})
+    assert not matches_filter(metadata, {"doc_type": {"$nin": ["product"]}})
+    assert matches_filter(metadata, {"$or": [{"doc_type": "faq"}, {"sku": {"$eq": "BEST003"}}]})
+    assert not matches_filter(metadata, {"$and": [{"doc_type": "product"}, {"sku": {"$ne": "BEST003"}}]})
+
+
+def test_sparse_search_respects_sku_filter() -> None:
+    index = _gold_index()
+    metadata_filter = build_retrieval_filter("BEST003 세탁 방법 알려주세요", "fallback")
+    results = index.search("BEST003 세탁 방법 알려주세요", k=4, metadata_filter=metadata_filter)
+    assert results
+    assert all(doc.metadata.get("sku") == "BEST003" for doc, _ in results)
+
+
+def test_sparse_search_policy_filter_excludes_products() -> None:
+    index = _gold_index()
+    metadata_filter = build_retrieval_filter("교환 배송비는 얼마인가요?", "policy")
+    results = index.search("교환 배송비는 얼마인가요?", k=6, metadata_filter=metadata_filter)
+    assert results
+    assert {doc.metadata["doc_type"] for doc, _ in results} <= {"policy", "faq"}
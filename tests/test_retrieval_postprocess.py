@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+from app.rag.postprocess import collapse_paraphrases, diversify, mmr_select
+
+
+@dataclass
+class _Hit:
+    document: Document
+    score: float
+
+
+def _faq(question: str, seed_hash: str, score: float) -> _Hit:
+    return _Hit(
+        document=Document(
+            page_content=f"Q: {question}\nA: 상품 수령 후 7일 이내에 반품 접수가 가능합니다.",
+            metadata={"doc_type": "faq", "seed_question_hash": seed_hash},
+        ),
+        score=score,
+    )
+
+
+def test_collapse_paraphrases_keeps_best_score_per_seed() -> None:
+    hits = [
+        _faq("반품은 며칠 내에?", "seed-a", 0.81),
+        _faq("반품 기한이 어떻게 되나요?", "seed-a", 0.9),
+        _faq("반품 접수 기간 알려주세요", "seed-a", 0.7),
+        _faq("교환 배송비는 얼마인가요?", "seed-b", 0.6),
+    ]
+    collapsed = collapse_paraphrases(hits)
+    assert [hit.document.metadata["seed_question_hash"] for hit in collapsed] == ["seed-a", "seed-b"]
+    assert collapsed[0].score == 0.9
+
+
+def test_mmr_prefers_distinct_evidence() -> None:
+    near_duplicate = _Hit(Document(page_content="무료 배송 기준은 50,000원 이상입니다."), 0.8)
+    hits = [
+        _Hit(Document(page_content="무료 배송 기준은 50,000원 이상입니다."), 0.9),
+        near_duplicate,
+        _Hit(Document(page_content="제주/도서산간은 3,000원 추가 배송비가 부과됩니다."), 0.7),
+    ]
+    selected = mmr_select(hits, k=2, lambda_mult=0.5)
+    assert near_duplicate not in selected
+    assert len(selected) == 2
+
+
+def test_diversify_returns_distinct_seeds_at_same_k() -> None:
+    hits = [_faq(f"반품 질문 {idx}", "seed-a", 0.9 - idx * 0.01) for idx in range(5)]
+    hits += [_faq("적립금 유효기간", "seed-b", 0.5), _faq("주문 취소 방법", "seed-c", 0.45)]
+    selected = diversify(hits, k=3)
+    assert len({hit.document.metadata["seed_question_hash"] for hit in selected}) == 3
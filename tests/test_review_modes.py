@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Any
+
+from app.agents.crewai import review_crew
+from app.core.config import Settings
+
+
+def _settings(**overrides) -> Settings:
+    defaults = {
+        "app_env": "dev",
+        "service_name": "api",
+        "crewai_review_enabled": True,
+        "crewai_review_sample_rate": 0.0,
+    }
+    defaults.update(overrides)
+    return Settings(**defaults)
+
+
+def _review(**overrides) -> dict[str, Any]:
+    payload = {
+        "tenant_id": "t1",
+        "session_id": "s1",
+        "question": "반품 기간은?",
+        "answer": "수령 후 7일 이내 가능합니다.",
+        "intent": "policy",
+        "sources": [{"source_id": "policy.md::반품"}],
+        "confidence": 0.95,
+    }
+    payload.update(overrides)
+    return review_crew.review_for_mode(**payload)
+
+
+def _stub_crew(monkeypatch, approved: bool) -> list[str]:
+    calls: list[str] = []
+
+    def _fake_crew_review(settings, *, question, answer, intent, sources):
+        calls.append(question)
+        return {"approved": approved, "reason": "stub"}
+
+    monkeypatch.setattr(review_crew, "_crew_review", _fake_crew_review)
+    return calls
+
+
+def test_sampled_mode_reviews_low_confidence_policy_answers_only(monkeypatch) -> None:
+    settings = _settings(crewai_review_mode="sampled")
+    monkeypatch.setattr(review_crew, "get_settings", lambda: settings)
+    calls = _stub_crew(monkeypatch, approved=False)
+
+    skipped = _review(confidence=0.95)
+    assert skipped == {"approved": True, "reason": "", "review_mode": "skipped"}
+
+    sampled = _review(confidence=0.6)
+    assert sampled["review_mode"] == "sampled"
+    assert sampled["approved"] is False
+    assert len(calls) == 1
+
+
+def test_async_mode_returns_immediately_and_logs_retraction(monkeypatch) -> None:
+    settings = _settings(crewai_review_mode="async")
+    monkeypatch.setattr(review_crew, "get_settings", lambda: settings)
+    _stub_crew(monkeypatch, approved=False)
+    logged: list[dict[str, Any]] = []
+
+    class StubRepo:
+        def log_tool_call(self, **kwargs) -> None:
+            logged.append(kwargs)
+
+    monkeypatch.setattr("app.repositories.supabase_repo.get_supabase_repo", lambda: StubRepo())
+    submitted = []
+    original_submit = review_crew.submit_background_review
+
+    def _capture_submit(**kwargs):
+        future = original_submit(**kwargs)
+        submitted.append(future)
+        return future
+
+    monkeypatch.setattr(review_crew, "submit_background_review", _capture_submit)
+    result = _review()
+    assert result == {"approved": True, "reason": "", "review_mode": "async"}
+
+    submitted[0].result(timeout=5)
+    assert logged[0]["tool"] == "crewai_review"
+    assert logged[0]["status"] == "retracted"
+
+
+def test_heuristic_guardrail_still_blocks_inline_in_async_mode(monkeypatch) -> None:
+    settings = _settings(crewai_review_mode="async")
+    monkeypatch.setattr(review_crew, "get_settings", lambda: settings)
+    calls = _stub_crew(monkeypatch, approved=True)
+
+    result = _review(sources=[])
+    assert result["approved"] is False
+    assert result["review_mode"] == "heuristic"
+    assert calls == []
+
+
+def test_async_mode_skips_reviews_past_the_pending_bound(monkeypatch) -> None:
+    settings = _settings(crewai_review_mode="async", crewai_review_max_pending=1)
+    monkeypatch.setattr(review_crew, "get_settings", lambda: settings)
+    release = threading.Event()
+
+    def _blocking_review(settings, **kwargs):
+        release.wait(timeout=5)
+        return {"approved": True, "reason": ""}
+
+    monkeypatch.setattr(review_crew, "_run_background_review", _blocking_review)
+    first = _review()
+    second = _review()
+    assert first["review_mode"] == "async"
+    assert second["review_mode"] == "async_skipped"
+    assert second["approved"] is True
+    assert review_crew.pending_reviews() == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while review_crew.pending_reviews() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert review_crew.pending_reviews() == 0
+    assert _review()["review_mode"] == "async"
@@ -0,0 +1,95 @@
+from typing import Any
+
+from app.agents.langgraph import support_graph
+from app.core.config import Settings
+from app.rag.retriever import RAGAnswer
+from app.services import session_memory
+from app.services.classifier import IntentClassification, IntentEntities
+from app.services.session_memory import InMemorySessionStore, SessionMemory
+
+
+def test_store_expires_by_ttl_evicts_lru_and_tracks_bytes(monkeypatch) -> None:
+    clock = [100.0]
+    monkeypatch.setattr(session_memory.time, "monotonic", lambda: clock[0])
+    store = InMemorySessionStore(ttl_seconds=60, max_sessions=2)
+    for session_id in ("a", "b"):
+        store.put("t1", session_id, SessionMemory(last_intent="policy"))
+    assert store.get("t1", "a") is not None  # "a" is now most recently used
+
+    store.put("t1", "c", SessionMemory())
+    assert store.get("t1", "b") is None
+    assert store.stats()["sessions"] == 2
+
+    clock[0] += 61
+    assert store.get("t1", "a") is None
+    assert store.get("t1", "c") is None
+    assert store.stats() == {"sessions": 0, "bytes": 0}
+
+
+def test_memory_is_capped_by_turns_and_bytes() -> None:
+    memory = SessionMemory()
+    memory.remember(
+        user_message="1234567890 배송 조회",
+        intent="tracking",
+        entities={"tracking_number": "1234567890", "courier_code": None},
+        resolved=True,
+        max_turns=3,
+        max_bytes=4096,
+    )
+    for index in range(5):
+        size = memory.remember(
+            user_message=f"반품 규정 질문 {index} " + "가" * 100,
+            intent="policy",
+            entities={},
+            resolved=True,
+            max_turns=3,
+            max_bytes=600,
+        )
+
+    assert size <= 600
+    assert 1 <= len(memory.turns) <= 3
+    assert memory.turns[-1].user.startswith("반품 규정 질문 4")
+    assert memory.last_intent == "policy"
+    assert memory.last_entities == {"tracking_number": "1234567890"}
+
+
+def test_follow_up_uses_session_intent_and_previous_question(monkeypatch) -> None:
+    settings = Settings(app_env="dev", speculative_retrieval_enabled=False)
+    store = InMemorySessionStore(ttl_seconds=60, max_sessions=10)
+    questions: list[tuple[str, str | None]] = []
+
+    class FakeClassifier:
+        def classify(self, question: str) -> IntentClassification:
+            if "반품" in question:
+                return IntentClassification(intent="policy", confidence=0.9)
+            return IntentClassification(intent="fallback", confidence=0.3, entities=IntentEntities())
+
+    class FakeRAGService:
+        def answer(self, question: str, intent: str, upgrade_generation: bool = False, **kwargs: Any) -> RAGAnswer:
+            questions.append((question, kwargs.get("retrieval_question")))
+            source = {"source_id": "faq/qa.csv::q1", "title": "FAQ", "snippet": "교환/반품 배송비"}
+            return RAGAnswer(answer="안내드립니다.", sources=[source], needs_human=False, answer_mode="generated")
+
+    monkeypatch.setattr(support_graph, "get_settings", lambda: settings)
+    monkeypatch.setattr(session_memory, "get_session_store", lambda: store)
+    monkeypatch.setattr(support_graph, "get_intent_classifier", lambda: FakeClassifier())
+    monkeypatch.setattr(support_graph, "get_rag_service", lambda: FakeRAGService())
+
+    first = support_graph.run_support_flow(tenant_id="t1", session_id="s1", user_message="반품 배송비 얼마예요?")
+    follow_up = support_graph.run_support_flow(tenant_id="t1", session_id="s1", user_message="그럼 교환은요?")
+    other_session = support_graph.run_support_flow(tenant_id="t1", session_id="s2", user_message="그럼 교환은요?")
+    # Confidently classified on its own: the 은요 ending alone must not drag in the previous turn.
+    standalone = support_graph.run_support_flow(tenant_id="t1", session_id="s1", user_message="반품 기간은요?")
+
+    assert first["intent"] == "policy"
+    assert follow_up["intent"] == "policy"
+    assert follow_up["why_fallback"] is None
+    assert any(trace["tool"] == "session_memory" for trace in follow_up["tool_trace"])
+    assert questions == [
+        ("반품 배송비 얼마예요?", None),
+        ("그럼 교환은요?", "반품 배송비 얼마예요? 그럼 교환은요?"),
+        ("반품 기간은요?", None),
+    ]
+    assert other_session["why_fallback"] == "clarify_low_confidence"
+    assert not any(trace["tool"] == "session_memory" for trace in standalone["tool_trace"])
+    assert [turn.user for turn in store.get("t1", "s1").turns] == ["반품 배송비 얼마예요?", "그럼 교환은요?", "반품 기간은요?"]
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.api.main import create_app
+from app.core import config
+from app.core.config import Settings
+from app.services import settings_reload
+from app.services.settings_reload import ReloadableComponent, apply_settings
+
+
+def test_reload_settings_swaps_cached_instance(monkeypatch) -> None:
+    monkeypatch.setenv("SOURCE_SCORE_THRESHOLD", "0.35")
+    config.get_settings.cache_clear()
+    try:
+        before = config.get_settings()
+        monkeypatch.setenv("SOURCE_SCORE_THRESHOLD", "0.5")
+        previous, current = config.reload_settings()
+
+        assert previous is before
+        assert config.get_settings() is current
+        assert current.source_score_threshold == 0.5
+    finally:
+        config.get_settings.cache_clear()
+
+
+def test_apply_settings_rebuilds_only_components_whose_inputs_changed() -> None:
+    previous = Settings(source_score_threshold=0.35, pinecone_api_key="old")
+    current = Settings(source_score_threshold=0.5, pinecone_api_key="new")
+    built: list[str] = []
+
+    def _component(name: str, rebuild_on: tuple[str, ...]) -> ReloadableComponent:
+        @lru_cache(maxsize=1)
+        def getter():
+            built.append(name)
+            return SimpleNamespace(settings=previous)
+
+        return ReloadableComponent(name, getter, rebuild_on)
+
+    rag = _component("rag_service", ("pinecone_",))
+    classifier = _component("intent_classifier", ())
+    never_built = _component("session_store", ("source_score_threshold",))
+    rag_before, classifier_before = rag.getter(), classifier.getter()
+
+    result = apply_settings(previous, current, [rag, classifier, never_built])
+
+    assert result.changed == ["pinecone_api_key", "source_score_threshold"]
+    assert result.rebuilt == ["rag_service"] and result.retired == [rag_before]
+    assert rag.getter() is not rag_before
+    assert result.updated == ["intent_classifier"]
+    assert classifier.getter() is classifier_before and classifier_before.settings is current
+    assert built == ["rag_service", "intent_classifier", "rag_service"]
+
+
+def test_reload_endpoint_requires_token_and_reports_field_names(monkeypatch) -> None:
+    monkeypatch.setenv("INFRA_TEST_TOKEN", "secret")
+    monkeypatch.setenv("CLASSIFICATION_CONFIDENCE_THRESHOLD", "0.75")
+    config.get_settings.cache_clear()
+    monkeypatch.setattr(settings_reload, "COMPONENTS", [])
+    try:
+        client = TestClient(create_app())
+        assert client.post("/v1/infra/settings/reload").status_code == 401
+
+        monkeypatch.setenv("CLASSIFICATION_CONFIDENCE_THRESHOLD", "0.6")
+        body = client.post("/v1/infra/settings/reload", headers={"x-infra-test-token": "secret"}).json()
+
+        assert body["status"] == "ok"
+        assert body["changed"] == ["classification_confidence_threshold"]
+        assert config.get_settings().classification_confidence_threshold == 0.6
+    finally:
+        config.get_settings.cache_clear()
@@ -0,0 +1,125 @@
+from concurrent.futures import Future
+from typing import Any
+
+from langchain_core.documents import Document
+
+from app.agents.langgraph import support_graph
+from app.core.config import Settings
+from app.rag.index_versions import FileIndexVersionStore, promote_version
+from app.rag.retriever import RAGAnswer, RAGService, RetrievalPrefetch
+from app.rag.sparse_index import SparseIndex, sparse_index_path
+from app.services.classifier import IntentClassification
+
+
+CORPUS = [
+    Document(
+        page_content="Q: 교환 배송비는 얼마인가요?\nA: 단순 변심 교환은 왕복 배송비 6,000원입니다.",
+        metadata={"source_file": "faq/qa.csv", "section_path": "q1", "doc_type": "faq"},
+    ),
+    Document(
+        page_content="# 모션쿨 스트레치 셔츠 (BEST003)\n- 교환 시 배송비 안내는 정책을 따릅니다.",
+        metadata={"source_file": "products/product_BEST003.md", "section_path": "root", "doc_type": "product"},
+    ),
+]
+
+
+def _settings(tmp_path, **overrides) -> Settings:
+    defaults = {
+        "app_env": "dev",
+        "service_name": "api",
+        "retriever_backend": "local",
+        "sparse_index_dir": str(tmp_path),
+        "index_version_pointer_path": str(tmp_path / "active_version.json"),
+        "index_version_refresh_seconds": 0.0,
+        "reranker": "none",
+        "faq_direct_answer_enabled": False,
+    }
+    defaults.update(overrides)
+    return Settings(**defaults)
+
+
+def test_prefetched_candidates_are_filtered_by_intent_locally(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path)
+    SparseIndex(CORPUS).save(sparse_index_path(settings, "v1"))
+    promote_version(FileIndexVersionStore(tmp_path / "active_version.json"), "v1")
+    service = RAGService(settings)
+
+    question = "교환 배송비 알려주세요"
+    prefetched = service.prefetch(question)
+    assert {item.document.metadata["doc_type"] for item in prefetched.candidates} == {"faq", "product"}
+
+    def _no_index_calls(*args, **kwargs):
+        raise AssertionError("prefetched candidates should be reused")
+
+    contexts: list[str] = []
+    monkeypatch.setattr(service, "_candidates", _no_index_calls)
+    monkeypatch.setattr(service, "_generate", lambda question, context, strong_model: contexts.append(context) or "답변")
+    result = service.answer(question, "policy", prefetched=prefetched)
+
+    assert result.answer_mode == "generated"
+    assert [src["source_id"] for src in result.sources] == ["faq/qa.csv::q1"]
+    assert "BEST003" not in contexts[0]
+
+
+def test_classify_node_discards_prefetch_off_the_rag_route(monkeypatch) -> None:
+    class FakeClassifier:
+        def classify(self, question: str) -> IntentClassification:
+            return IntentClassification(intent="tracking", confidence=0.95)
+
+    class FakeRAGService:
+        def prefetch(self, question: str) -> RetrievalPrefetch:
+            return RetrievalPrefetch(question=question, version=None, candidates=[], latency_ms=7)
+
+    monkeypatch.setattr(support_graph, "get_intent_classifier", lambda: FakeClassifier())
+    monkeypatch.setattr(support_graph, "get_rag_service", lambda: FakeRAGService())
+    state: dict[str, Any] = {"user_message": "배송 어디쯤인가요?", "tool_trace": []}
+    out = support_graph.classify_node(state)  # type: ignore[arg-type]
+
+    assert out["route"] == "tracking"
+    assert out["retrieval_prefetch"] is None
+    assert out["tool_trace"][0]["tool"] == "retrieval_prefetch"
+    assert out["tool_trace"][0]["status"] in {"cancelled", "discarded"}
+
+
+def test_rag_node_passes_prefetch_to_rag_service(monkeypatch) -> None:
+    received: dict[str, Any] = {}
+
+    class FakeRAGService:
+        def prefetch(self, question: str) -> RetrievalPrefetch:
+            return RetrievalPrefetch(question=question, version="v1", candidates=[], latency_ms=12)
+
+        def answer(self, question: str, intent: str, upgrade_generation: bool = False, prefetched=None) -> RAGAnswer:
+            received["prefetched"] = prefetched
+            return RAGAnswer(answer="답변", sources=[], needs_human=False)
+
+    class FakeClassifier:
+        def classify(self, question: str) -> IntentClassification:
+            return IntentClassification(intent="policy", confidence=0.95)
+
+    monkeypatch.setattr(support_graph, "get_intent_classifier", lambda: FakeClassifier())
+    monkeypatch.setattr(support_graph, "get_rag_service", lambda: FakeRAGService())
+    state: dict[str, Any] = {"user_message": "교환 배송비 알려주세요", "tool_trace": []}
+    classified = support_graph.classify_node(state)  # type: ignore[arg-type]
+    # A real classifier call outlasts the prefetch; wait so it is not cancelled as still queued.
+    classified["retrieval_prefetch"].result(timeout=1)
+    out = support_graph.rag_node(classified)
+
+    assert received["prefetched"].version == "v1"
+    assert {"tool": "retrieval_prefetch", "status": "ok", "latency_ms": 12} in out["tool_trace"]
+
+
+def test_queued_or_slow_prefetch_falls_back_to_inline_retrieval() -> None:
+    settings = Settings(app_env="dev", speculative_retrieval_wait_seconds=0.05)
+    queued: Future = Future()
+    state: dict[str, Any] = {"retrieval_prefetch": queued, "tool_trace": []}
+    assert support_graph._take_retrieval_prefetch(state, settings) is None  # type: ignore[arg-type]
+    assert queued.cancelled()
+    assert [trace["status"] for trace in state["tool_trace"]] == ["cancelled"]
+
+    running: Future = Future()
+    running.set_running_or_notify_cancel()
+    state = {"retrieval_prefetch": running, "tool_trace": []}
+    assert support_graph._take_retrieval_prefetch(state, settings) is None  # type: ignore[arg-type]
+    running.set_result(RetrievalPrefetch(question="q", version="v1", candidates=[], latency_ms=3000))
+
+    assert [trace["status"] for trace in state["tool_trace"]] == ["timeout"]
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.api import main
+from app.api.routes import infra
+from app.core.config import Settings
+from app.services import warmup
+
+
+ROOT = Path(__file__).resolve().parents[1]
+# SDKs that must stay out of API startup; they are imported on first use.
+LAZY_MODULES = (
+    "pandas",
+    "supabase",
+    "crewai",
+    "langgraph",
+    "pinecone",
+    "langchain_pinecone",
+    "langchain_openai",
+    "langchain_google_genai",
+)
+
+
+def _import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        if cumulative.isdigit():
+            profile[name] = int(cumulative)
+    return profile
+
+
+def test_api_import_skips_heavy_sdks_and_stays_within_budget() -> None:
+    profile = _import_profile("app.api.main")
+
+    assert [name for name in LAZY_MODULES if name in profile] == []
+    budget_ms = float(os.getenv("IMPORT_TIME_BUDGET_MS", "3000"))
+    assert profile["app.api.main"] / 1000 < budget_ms
+
+
+def _ready_settings(**overrides) -> Settings:
+    values = {
+        "app_env": "dev",
+        "openai_api_key": "x",
+        "gemini_api_key": "x",
+        "pinecone_api_key": "x",
+        "deliveryapi_key": "x",
+        "supabase_url": "https://example.supabase.co",
+        "supabase_service_role_key": "x",
+        "token_encryption_key": "x",
+        "cors_allowed_origins": "https://console.example.com",
+    }
+    values.update(overrides)
+    return Settings(_env_file=None, **values)
+
+
+def test_warmup_runs_in_lifespan_and_reports_failed_steps_in_readiness(monkeypatch) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(warmup, "_STATE", {"status": "skipped", "steps": {}, "duration_ms": 0})
+
+    def _fail(settings) -> None:
+        raise RuntimeError("pinecone unreachable")
+
+    monkeypatch.setattr(
+        warmup,
+        "WARMUP_STEPS",
+        {"support_graph": lambda settings: calls.append("graph"), "rag_service": _fail},
+    )
+    settings = _ready_settings(startup_warmup_enabled=True, naver_autoreply_worker_enabled=False)
+    monkeypatch.setattr(main, "get_settings", lambda: settings)
+    monkeypatch.setattr(infra, "get_settings", lambda: settings)
+    monkeypatch.setattr(infra, "_check_supabase", lambda: None)
+    monkeypatch.setattr(infra, "_check_pinecone", lambda: None)
+
+    with TestClient(main.create_app()) as client:
+        body = client.get("/ready").json()
+
+    assert calls == ["graph"]
+    assert body["checks"]["warmup"] == "degraded"
+    assert body["status"] == "degraded"
+    assert "warmup:rag_service:pinecone unreachable" in body["details"]["failed"]
+
+
+def test_ready_is_not_green_while_warming(monkeypatch) -> None:
+    settings = _ready_settings()
+    monkeypatch.setattr(infra, "get_settings", lambda: settings)
+    monkeypatch.setattr(infra, "_check_supabase", lambda: None)
+    monkeypatch.setattr(infra, "_check_pinecone", lambda: None)
+    monkeypatch.setattr(infra, "warmup_status", lambda: {"status": "warming", "steps": {}, "duration_ms": 0})
+
+    assert infra.ready().status == "warming"
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+
+from app.core.config import Settings
+from app.repositories.supabase_repo import AsyncSupabaseRepository
+
+
+def _settings(**overrides) -> Settings:
+    defaults = {
+        "supabase_url": "https://example.supabase.co/",
+        "supabase_service_role_key": "service-key",
+        "token_encryption_key": "passphrase",
+    }
+    defaults.update(overrides)
+    return Settings(**defaults)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.rows: dict[str, list[dict]] = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        table = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "GET":
+            return httpx.Response(200, json=self.rows.get(table, []))
+        payload = json.loads(request.content)
+        self.rows.setdefault(table, []).append(payload)
+        return httpx.Response(201)
+
+
+def test_async_repo_writes_through_postgrest_concurrently() -> None:
+    recorder = _Recorder()
+    repo = AsyncSupabaseRepository(_settings(), transport=httpx.MockTransport(recorder))
+
+    async def _run() -> None:
+        await asyncio.gather(
+            repo.log_chat_interaction("t1", "s1", "hi", {"answer": "hello"}),
+            repo.log_tool_call("t1", "s1", "rag", "ok", 12),
+            repo.save_cafe24_tokens("t1", "access", "refresh", datetime(2026, 1, 1, tzinfo=timezone.utc)),
+        )
+        await repo.aclose()
+
+    asyncio.run(_run())
+
+    assert {request.url.path for request in recorder.requests} == {
+        "/rest/v1/conversation_logs",
+        "/rest/v1/tool_call_logs",
+        "/rest/v1/oauth_tokens",
+    }
+    for request in recorder.requests:
+        assert request.headers["apikey"] == "service-key"
+        assert request.headers["authorization"] == "Bearer service-key"
+    upsert = next(request for request in recorder.requests if request.url.path.endswith("oauth_tokens"))
+    assert upsert.url.params["on_conflict"] == "tenant_id,provider"
+    assert "resolution=merge-duplicates" in upsert.headers["prefer"]
+    assert recorder.rows["oauth_tokens"][0]["refresh_token_encrypted"] != "refresh"
+
+
+def test_async_repo_reads_back_encrypted_refresh_token() -> None:
+    recorder = _Recorder()
+    repo = AsyncSupabaseRepository(_settings(), transport=httpx.MockTransport(recorder))
+
+    async def _run() -> str | None:
+        await repo.save_cafe24_tokens("t1", "access", "refresh", datetime(2026, 1, 1, tzinfo=timezone.utc))
+        return await repo.get_cafe24_refresh_token("t1")
+
+    assert asyncio.run(_run()) == "refresh"
+    lookup = recorder.requests[-1]
+    assert lookup.url.params["tenant_id"] == "eq.t1"
+    assert lookup.url.params["provider"] == "eq.cafe24"
+
+
+def test_async_repo_is_noop_without_supabase_and_reports_lead_failures() -> None:
+    disabled = AsyncSupabaseRepository(_settings(supabase_url=""))
+    failing = AsyncSupabaseRepository(
+        _settings(), transport=httpx.MockTransport(lambda request: httpx.Response(500, json={"message": "down"}))
+    )
+
+    async def _run() -> tuple:
+        await disabled.log_chat_interaction("t1", "s1", "hi", {})
+        return (
+            await disabled.save_lead_signup(email="a@b.co", source="homepage"),
+            await failing.save_lead_signup(email="a@b.co", source="homepage"),
+        )
+
+    assert asyncio.run(_run()) == (False, False)
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import create_app
+from app.api.routes import chat
+from app.core.config import Settings
+from app.services import tenant_config
+from app.services.tenant_config import (
+    TenantConfigCache,
+    TenantScopedSettings,
+    apply_tenant_overrides,
+    tenant_scope,
+)
+from app.services.tenant_limits import TenantBusyError, TenantLimiter
+
+
+def test_overrides_are_whitelisted_validated_and_scoped() -> None:
+    base = Settings(app_env="dev")
+    tenant = apply_tenant_overrides(
+        base,
+        {
+            "retriever_k": "7",
+            "pinecone_namespace_prefix": "shop-b",
+            "source_score_threshold": "high",
+            "openai_api_key": "sk-tenant",
+        },
+    )
+
+    assert tenant.retriever_k == 7
+    assert tenant.pinecone_namespace_prefix == base.pinecone_namespace_prefix
+    assert tenant.source_score_threshold == base.source_score_threshold
+    assert tenant.openai_api_key == base.openai_api_key
+    assert apply_tenant_overrides(base, {}) is base
+
+    class _Service:
+        settings = TenantScopedSettings()
+
+        def __init__(self, settings: Settings) -> None:
+            self.settings = settings
+
+    service = _Service(base)
+    with tenant_scope(tenant):
+        assert service.settings is tenant
+    assert service.settings is base
+
+
+def test_cache_expires_follows_reload_and_keeps_stale_on_loader_error(monkeypatch) -> None:
+    clock = [100.0]
+    monkeypatch.setattr(tenant_config.time, "monotonic", lambda: clock[0])
+    calls: list[str] = []
+    failing = [False]
+
+    def _loader(tenant_id: str) -> dict:
+        calls.append(tenant_id)
+        if failing[0]:
+            raise RuntimeError("supabase down")
+        return {"retriever_k": 9}
+
+    cache = TenantConfigCache(loader=_loader)
+    base = Settings(app_env="dev", tenant_config_ttl_seconds=60)
+    assert cache.get("t1", base).retriever_k == 9
+    assert cache.get("t1", base).retriever_k == 9
+    assert calls == ["t1"]
+
+    reloaded = Settings(app_env="dev", tenant_config_ttl_seconds=60, reranker_top_n=2)
+    assert cache.get("t1", reloaded).reranker_top_n == 2
+    assert calls == ["t1", "t1"]
+
+    clock[0] += 61
+    failing[0] = True
+    stale = cache.get("t1", reloaded)
+    assert stale.retriever_k == 9
+    assert calls == ["t1", "t1", "t1"]
+
+
+def test_cache_is_bounded_for_client_supplied_tenant_ids() -> None:
+    cache = TenantConfigCache(loader=lambda tenant_id: {})
+    base = Settings(app_env="dev", tenant_config_max_entries=2)
+    for tenant_id in ("t1", "t2", "t1", "t3"):
+        cache.get(tenant_id, base)
+    assert len(cache) == 2
+    # t1 was used again after t2, so t2 is the least recently used entry.
+    assert cache.cached("t2", base) is None
+    assert cache.cached("t1", base) is not None and cache.cached("t3", base) is not None
+
+
+def test_limiter_hands_off_queues_and_sheds() -> None:
+    settings = Settings(app_env="dev", tenant_max_concurrency=1, tenant_max_queue=1, tenant_queue_timeout_seconds=0.05)
+    limiter = TenantLimiter()
+
+    async def _scenario() -> list[str]:
+        events: list[str] = []
+        release = asyncio.Event()
+
+        async def _hold(name: str) -> None:
+            async with limiter.slot("t1", settings):
+                events.append(f"{name}:start")
+                await release.wait()
+            events.append(f"{name}:done")
+
+        first = asyncio.create_task(_hold("a"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_hold("b"))
+        await asyncio.sleep(0)
+        assert limiter.stats() == {"t1": {"active": 1, "queued": 1}}
+
+        with pytest.raises(TenantBusyError) as full:
+            async with limiter.slot("t1", settings):
+                pass
+        assert full.value.reason == "queue_full"
+        # Other tenants are unaffected by t1's backlog.
+        async with limiter.slot("t2", settings):
+            events.append("t2")
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert limiter.stats() == {}
+
+        async with limiter.slot("t1", settings):
+            with pytest.raises(TenantBusyError) as timed_out:
+                async with limiter.slot("t1", settings):
+                    pass
+        assert timed_out.value.reason == "queue_timeout"
+        assert limiter.stats() == {}
+        return events
+
+    events = asyncio.run(_scenario())
+    assert events == ["a:start", "t2", "a:done", "b:start", "b:done"]
+
+
+def test_chat_query_returns_429_when_tenant_is_saturated(monkeypatch) -> None:
+    settings = Settings(app_env="dev", tenant_max_concurrency=1, tenant_max_queue=0, tenant_queue_timeout_seconds=2)
+    limiter = TenantLimiter()
+    limiter._active["t1"] = 1
+    monkeypatch.setattr(chat, "get_tenant_settings", lambda tenant_id: settings)
+    monkeypatch.setattr(chat, "get_tenant_config_cache", lambda: TenantConfigCache(loader=lambda tenant_id: {}))
+    monkeypatch.setattr(chat, "get_tenant_limiter", lambda: limiter)
+    monkeypatch.setattr(chat, "run_support_flow", lambda **kwargs: pytest.fail("flow must not run"))
+
+    client = TestClient(create_app())
+    response = client.post(
+        "/v1/chat/query",
+        json={"tenant_id": "t1", "session_id": "s1", "user_message": "반품 규정 알려줘"},
+    )
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import create_app
+from app.api.routes import infra_test
+from app.core.config import Settings
+from app.core.tracing import get_span_buffer, span, submit_with_context, traced
+
+
+def test_spans_nest_and_record_errors() -> None:
+    buffer = get_span_buffer()
+    buffer.clear()
+
+    @traced("graph.classify")
+    def _node(state: dict) -> dict:
+        return state
+
+    with span("http.request", trace_id="req-1") as root:
+        _node({})
+        with pytest.raises(ValueError):
+            with span("llm.invoke", provider="openai", model="gpt-4o-mini", purpose="classifier"):
+                raise ValueError("boom")
+
+    spans = {item.name: item for item in buffer.spans(trace_id="req-1")}
+    assert spans["graph.classify"].parent_id == root.span_id
+    assert spans["llm.invoke"].status == "error"
+    assert spans["llm.invoke"].attributes["provider"] == "openai"
+    assert spans["http.request"].duration_ms >= spans["graph.classify"].duration_ms
+
+
+def test_submit_with_context_keeps_parent_span_in_worker_thread() -> None:
+    buffer = get_span_buffer()
+    buffer.clear()
+
+    def _work() -> None:
+        with span("rag.prefetch"):
+            pass
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with span("graph.classify", trace_id="req-2") as parent:
+            submit_with_context(executor, _work).result(timeout=5)
+
+    child = buffer.spans(trace_id="req-2", name="rag.prefetch")[0]
+    assert child.parent_id == parent.span_id
+
+
+def test_traces_route_returns_request_spans(monkeypatch) -> None:
+    settings = Settings(app_env="dev", service_name="api", infra_test_token="token-123")
+    monkeypatch.setattr(infra_test, "get_settings", lambda: settings)
+    get_span_buffer().clear()
+    client = TestClient(create_app())
+
+    assert client.get("/v1/infra/traces").status_code == 401
+
+    client.get("/health", headers={"x-request-id": "req-health"})
+    response = client.get(
+        "/v1/infra/traces",
+        params={"trace_id": "req-health"},
+        headers={"x-infra-test-token": "token-123"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 1
+    assert body["spans"][0]["name"] == "http.request"
+    assert body["spans"][0]["attributes"]["status_code"] == 200
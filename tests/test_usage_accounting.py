@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from app.agents.langgraph import support_graph
+from app.core.config import Settings
+from app.rag.retriever import RAGAnswer
+from app.repositories.supabase_repo import SupabaseRepository
+from app.services.usage import (
+    UsageAggregator,
+    UsageCallbackHandler,
+    flush_usage,
+    get_usage_aggregator,
+    is_over_budget,
+    purpose_scope,
+    seed_daily_usage,
+    usage_scope,
+)
+
+
+def _llm_result(input_tokens: int, output_tokens: int) -> LLMResult:
+    message = AIMessage(
+        content="답변",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    )
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def _pending_for(tenant_id: str) -> list[dict[str, Any]]:
+    return [row for row in get_usage_aggregator().pending_rows() if row["tenant_id"] == tenant_id]
+
+
+def test_callback_attributes_usage_to_tenant_and_purpose_from_context() -> None:
+    handler = UsageCallbackHandler("openai", "gpt-4o-mini")
+    with usage_scope("t-usage"), purpose_scope("generation"):
+        handler.on_llm_end(_llm_result(120, 30))
+        handler.on_llm_end(_llm_result(80, 20))
+
+    rows = _pending_for("t-usage")
+    assert len(rows) == 1
+    assert rows[0]["purpose"] == "generation"
+    assert rows[0]["model"] == "gpt-4o-mini"
+    assert rows[0]["calls"] == 2
+    assert rows[0]["total_tokens"] == 250
+    assert get_usage_aggregator().tokens_today("t-usage") >= 250
+
+
+def test_flush_usage_writes_batch_and_keeps_rows_when_insert_fails() -> None:
+    with usage_scope("t-flush"), purpose_scope("classifier"):
+        UsageCallbackHandler("gemini", "gemini-2.0-flash-lite").on_llm_end(_llm_result(10, 5))
+
+    class FailingRepo:
+        def insert_llm_usage(self, rows):
+            raise RuntimeError("supabase down")
+
+    class StubRepo:
+        def __init__(self):
+            self.rows: list[dict[str, Any]] = []
+
+        def insert_llm_usage(self, rows):
+            self.rows.extend(rows)
+
+    assert flush_usage(FailingRepo()) == 0
+    assert _pending_for("t-flush")
+
+    repo = StubRepo()
+    assert flush_usage(repo) >= 1
+    assert [row["total_tokens"] for row in repo.rows if row["tenant_id"] == "t-flush"] == [15]
+    assert _pending_for("t-flush") == []
+
+
+def test_rag_node_downgrades_upgrade_generation_over_budget(monkeypatch) -> None:
+    received: dict[str, Any] = {}
+
+    class FakeRAGService:
+        def answer(self, question: str, intent: str, upgrade_generation: bool = False) -> RAGAnswer:
+            received["upgrade_generation"] = upgrade_generation
+            return RAGAnswer(answer="답변", sources=[{"source_id": "a", "title": "a", "snippet": "a"}], needs_human=False)
+
+    settings = Settings(app_env="dev", service_name="api", usage_tenant_token_budgets="t-budget:100")
+    monkeypatch.setattr(support_graph, "get_settings", lambda: settings)
+    monkeypatch.setattr(support_graph, "get_rag_service", lambda: FakeRAGService())
+    with usage_scope("t-budget"), purpose_scope("generation_upgrade"):
+        UsageCallbackHandler("openai", "gpt-4o").on_llm_end(_llm_result(90, 20))
+
+    state: dict[str, Any] = {
+        "tenant_id": "t-budget",
+        "user_message": "환불 정책 알려줘",
+        "intent": "policy",
+        "confidence": 0.6,
+        "tool_trace": [],
+    }
+    out = support_graph.rag_node(state)  # type: ignore[arg-type]
+    assert received["upgrade_generation"] is False
+    assert out["tool_trace"][0]["status"] == "budget_downgraded"
+
+
+def test_aggregator_restore_merges_failed_rows() -> None:
+    aggregator = UsageAggregator()
+    aggregator.record(tenant_id="t", purpose="generation", provider="openai", model="m", input_tokens=3, output_tokens=1)
+    rows = aggregator.drain()
+    aggregator.restore(rows)
+    assert aggregator.pending_rows()[0]["total_tokens"] == 4
+
+
+def test_list_llm_usage_reads_every_page() -> None:
+    table_rows = [{"id": index, "tenant_id": "t1", "total_tokens": 1} for index in range(1, 8)]
+
+    class StubQuery:
+        def __init__(self) -> None:
+            self.bounds = (0, 0)
+
+        def select(self, columns: str) -> "StubQuery":
+            return self
+
+        def eq(self, column: str, value: Any) -> "StubQuery":
+            return self
+
+        def gte(self, column: str, value: Any) -> "StubQuery":
+            return self
+
+        def order(self, column: str) -> "StubQuery":
+            return self
+
+        def range(self, start: int, end: int) -> "StubQuery":
+            self.bounds = (start, end)
+            return self
+
+        def execute(self) -> "StubQuery":
+            self.data = table_rows[self.bounds[0] : self.bounds[1] + 1]
+            return self
+
+    class StubClient:
+        def table(self, name: str) -> StubQuery:
+            return StubQuery()
+
+    repo = SupabaseRepository(Settings(app_env="dev"))
+    repo._client = StubClient()
+    rows = repo.list_llm_usage(tenant_id="t1", page_size=3)
+    assert [row["id"] for row in rows] == list(range(1, 8))
+
+
+def test_seed_daily_usage_counts_todays_flushed_rows_toward_the_budget() -> None:
+    now = datetime.now(tz=timezone.utc)
+    flushed = [
+        {"tenant_id": "t-seed", "total_tokens": 70, "window_start": now.isoformat()},
+        {"tenant_id": "t-seed", "total_tokens": 500, "window_start": (now - timedelta(days=1)).isoformat()},
+    ]
+    requested: dict[str, Any] = {}
+
+    class StubRepo:
+        def list_llm_usage(self, *, since):
+            requested["since"] = since
+            return flushed
+
+    settings = Settings(app_env="dev", service_name="api", usage_tenant_token_budgets="t-seed:100")
+    assert seed_daily_usage(StubRepo())
+    assert requested["since"] == now.replace(hour=0, minute=0, second=0, microsecond=0)
+    assert get_usage_aggregator().tokens_today("t-seed") == 70
+    assert not is_over_budget(settings, "t-seed")
+
+    with usage_scope("t-seed"), purpose_scope("generation"):
+        UsageCallbackHandler("openai", "gpt-4o-mini").on_llm_end(_llm_result(20, 10))
+    assert is_over_budget(settings, "t-seed")